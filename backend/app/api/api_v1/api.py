@@ -3,7 +3,7 @@ from fastapi import APIRouter
 from app.api.api_v1.endpoints import (
     auth, courses, ai, analytics, modules, content, quiz,
     enrollments, learning_paths, content_generation, adaptive_assessment,
-    preferences, notifications, search
+    preferences, notifications, search, jobs
 )
 
 api_router = APIRouter()
@@ -22,3 +22,4 @@ api_router.include_router(notifications.router, prefix="/notifications", tags=["
 api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(ai.router, prefix="/ai", tags=["ai"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
@@ -1,8 +1,9 @@
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 
+from app.core.disconnect import run_until_disconnected
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
 from app.services.ai.adaptive_assessment_service import (
@@ -21,7 +22,8 @@ class AssessmentSubmission(BaseModel):
     answers: List[AnswerSubmission]
 
 @router.post("/create/{course_id}")
-def create_assessment(
+async def create_assessment(
+    request: Request,
     course_id: str,
     num_questions: int = 10,
     current_user: User = Depends(get_current_user)
@@ -35,7 +37,10 @@ def create_assessment(
             detail="Number of questions must be between 5 and 30"
         )
     
-    assessment = create_adaptive_assessment(current_user.id, course_id, num_questions)
+    assessment = await run_until_disconnected(
+        request,
+        create_adaptive_assessment(current_user.id, course_id, num_questions)
+    )
     
     if "error" in assessment:
         raise HTTPException(
@@ -46,7 +51,8 @@ def create_assessment(
     return assessment
 
 @router.post("/submit")
-def submit_assessment(
+async def submit_assessment(
+    request: Request,
     submission: AssessmentSubmission,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
@@ -68,7 +74,10 @@ def submit_assessment(
         for answer in submission.answers
     ]
     
-    result = evaluate_adaptive_assessment(current_user.id, submission.assessment_id, answers)
+    result = await run_until_disconnected(
+        request,
+        evaluate_adaptive_assessment(current_user.id, submission.assessment_id, answers)
+    )
     
     if "error" in result:
         raise HTTPException(
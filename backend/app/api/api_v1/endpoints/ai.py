@@ -1,30 +1,50 @@
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
+from app.core.disconnect import run_until_disconnected
+from app.schemas.job import Job
 from app.schemas.recommendation import Recommendation
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
+from app.services.ai import background_jobs  # noqa: F401 - registers the job handlers
 from app.services.ai.recommendation_service import get_recommendations_for_user
+from app.services.job_queue import job_queue
 
 router = APIRouter()
 
 @router.get("/recommendations", response_model=List[Recommendation])
-def get_recommendations(
+async def get_recommendations(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get personalized recommendations for the current user.
     """
-    return get_recommendations_for_user(user_id=current_user.id)
+    return await run_until_disconnected(request, get_recommendations_for_user(user_id=current_user.id))
+
+@router.post("/recommendations/refresh", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def refresh_recommendations(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Start generating new recommendations for the current user in the background.
+    Poll /jobs/{job_id} for the result.
+    """
+    return await job_queue.enqueue("recommendations", {"user_id": str(current_user.id)}, user_id=current_user.id)
 
 @router.post("/analyze-learning-style")
-def analyze_learning_style(
+async def analyze_learning_style(
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Analyze the user's learning style based on their activity.
-    This is an asynchronous operation that will update the user's profile.
+    This is an asynchronous operation that will update the user's profile;
+    poll /jobs/{job_id} for the result.
     """
-    # This would trigger an async task to analyze the user's learning style
-    return {"status": "analysis_started", "message": "Learning style analysis has been started"}
+    job = await job_queue.enqueue("learning_style", {"user_id": str(current_user.id)}, user_id=current_user.id)
+    return {
+        "status": "analysis_started",
+        "message": "Learning style analysis has been started",
+        "job_id": job["id"]
+    }
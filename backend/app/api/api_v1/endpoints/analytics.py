@@ -78,6 +78,22 @@ def read_user_retention(
         )
     return user_analytics.get_user_retention(days=days)
 
+@router.get("/cohort-retention")
+def read_cohort_retention(
+    weeks: int = Query(12, ge=1, le=53),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Calculate week-N retention for users grouped by signup week.
+    Only available to admins.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return user_analytics.get_cohort_retention(weeks=weeks)
+
 @router.get("/content-engagement/{content_id}")
 def read_content_engagement(
     content_id: str,
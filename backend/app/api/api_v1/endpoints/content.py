@@ -3,27 +3,33 @@ from typing import Any, List
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from supabase import AsyncClient
 
 from app.schemas.content import Content, ContentCreate, ContentUpdate
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
-from app.services.content.content_service import create_content, get_content, get_content_by_module, update_content
-from app.services.db import get_supabase_client
+from app.services.content.content_service import (
+    create_content_async,
+    get_content_async,
+    get_content_by_module_async,
+    update_content_async
+)
+from app.services.db import get_async_db
 
 router = APIRouter()
 
 @router.get("/module/{module_id}", response_model=List[Content])
-def read_content_by_module(
+async def read_content_by_module(
     module_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Retrieve all content items for a specific module.
     """
-    return get_content_by_module(module_id=module_id)
+    return await get_content_by_module_async(module_id=module_id)
 
 @router.post("/", response_model=Content)
-def create_new_content(
+async def create_new_content(
     content_in: ContentCreate,
     current_user: User = Depends(get_current_user)
 ) -> Any:
@@ -35,17 +41,17 @@ def create_new_content(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return create_content(content_in=content_in)
+    return await create_content_async(content_in=content_in)
 
 @router.get("/{content_id}", response_model=Content)
-def read_content(
+async def read_content(
     content_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get content item by ID.
     """
-    content = get_content(content_id=content_id)
+    content = await get_content_async(content_id=content_id)
     if not content:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,7 +60,7 @@ def read_content(
     return content
 
 @router.put("/{content_id}", response_model=Content)
-def update_content_endpoint(
+async def update_content_endpoint(
     content_id: str,
     content_in: ContentUpdate,
     current_user: User = Depends(get_current_user)
@@ -68,27 +74,26 @@ def update_content_endpoint(
             detail="Not enough permissions"
         )
 
-    content = get_content(content_id=content_id)
+    content = await get_content_async(content_id=content_id)
     if not content:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Content not found"
         )
 
-    return update_content(content_id=content_id, content_in=content_in)
+    return await update_content_async(content_id=content_id, content_in=content_in)
 
 @router.post("/{content_id}/complete")
-def mark_content_complete(
+async def mark_content_complete(
     content_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    supabase: AsyncClient = Depends(get_async_db)
 ) -> Any:
     """
     Mark a content item as completed by the current user.
     """
-    supabase = get_supabase_client()
-
     # Check if content exists
-    content = get_content(content_id=content_id)
+    content = await get_content_async(content_id=content_id)
     if not content:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -96,11 +101,11 @@ def mark_content_complete(
         )
 
     # Check if progress record exists
-    progress = supabase.table("user_progress").select("*").eq("user_id", str(current_user.id)).eq("content_id", content_id).execute()
+    progress = await supabase.table("user_progress").select("*").eq("user_id", str(current_user.id)).eq("content_id", content_id).execute()
 
     if progress.data:
         # Update existing progress
-        supabase.table("user_progress").update({
+        await supabase.table("user_progress").update({
             "status": "completed",
             "completion_percentage": 100,
             "last_accessed": datetime.utcnow().isoformat()
@@ -108,7 +113,7 @@ def mark_content_complete(
     else:
         # Create new progress record
         progress_id = str(uuid4())
-        supabase.table("user_progress").insert({
+        await supabase.table("user_progress").insert({
             "progress_id": progress_id,
             "user_id": str(current_user.id),
             "content_id": content_id,
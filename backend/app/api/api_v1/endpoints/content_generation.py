@@ -1,35 +1,48 @@
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from app.core.disconnect import run_until_disconnected
+from app.core.streaming import ndjson_response
+from app.schemas.job import Job
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
+from app.services.ai import background_jobs  # noqa: F401 - registers the job handlers
 from app.services.ai.content_generation_service import (
     generate_quiz_questions,
     generate_content_summary,
     generate_learning_objectives,
-    generate_content_outline
+    generate_content_outline,
+    stream_quiz_questions,
+    stream_content_summary,
+    stream_learning_objectives,
+    stream_content_outline
 )
+from app.services.job_queue import job_queue
 
 router = APIRouter()
 
-@router.post("/quiz-questions")
-def create_quiz_questions(
-    topic: str,
-    difficulty: str,
-    num_questions: int = 5,
-    current_user: User = Depends(get_current_user)
-) -> List[Dict]:
+class QuizTopic(BaseModel):
+    topic: str
+    difficulty: str
+    num_questions: int = 5
+
+def _check_generation_permissions(current_user: User) -> None:
     """
-    Generate quiz questions for a given topic.
-    Only available to instructors or admins.
+    Only instructors and admins may generate content.
     """
     if current_user.role not in ["instructor", "admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    
+
+def _check_quiz_questions_params(difficulty: str, num_questions: int) -> None:
+    """
+    Validate quiz question generation parameters.
+    """
     if difficulty not in ["easy", "medium", "hard"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -41,26 +54,11 @@ def create_quiz_questions(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Number of questions must be between 1 and 20"
         )
-    
-    questions = generate_quiz_questions(topic, difficulty, num_questions)
-    return questions
 
-@router.post("/content-summary")
-def create_content_summary(
-    content_text: str,
-    max_length: int = 500,
-    current_user: User = Depends(get_current_user)
-) -> Dict:
+def _check_content_summary_params(content_text: str, max_length: int) -> None:
     """
-    Generate a summary of educational content.
-    Only available to instructors or admins.
+    Validate content summary generation parameters.
     """
-    if current_user.role not in ["instructor", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
     if not content_text:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,27 +70,11 @@ def create_content_summary(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Max length must be between 100 and 2000 characters"
         )
-    
-    summary = generate_content_summary(content_text, max_length)
-    return {"summary": summary}
 
-@router.post("/learning-objectives")
-def create_learning_objectives(
-    topic: str,
-    difficulty: str,
-    num_objectives: int = 5,
-    current_user: User = Depends(get_current_user)
-) -> Dict:
+def _check_learning_objectives_params(difficulty: str, num_objectives: int) -> None:
     """
-    Generate learning objectives for a given topic.
-    Only available to instructors or admins.
+    Validate learning objective generation parameters.
     """
-    if current_user.role not in ["instructor", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
     if difficulty not in ["beginner", "intermediate", "advanced"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -104,31 +86,204 @@ def create_learning_objectives(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Number of objectives must be between 1 and 10"
         )
+
+def _check_content_outline_params(num_sections: int) -> None:
+    """
+    Validate content outline generation parameters.
+    """
+    if num_sections < 1 or num_sections > 10:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Number of sections must be between 1 and 10"
+        )
+
+@router.post("/quiz-questions")
+async def create_quiz_questions(
+    request: Request,
+    topic: str,
+    difficulty: str,
+    num_questions: int = 5,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> List[Dict]:
+    """
+    Generate quiz questions for a given topic.
+    Only available to instructors or admins.
+    Repeated requests reuse the cached result unless force_refresh is set.
+    """
+    _check_generation_permissions(current_user)
+    _check_quiz_questions_params(difficulty, num_questions)
+    
+    questions = await run_until_disconnected(
+        request,
+        generate_quiz_questions(topic, difficulty, num_questions, force_refresh=force_refresh)
+    )
+    return questions
+
+@router.post("/quiz-questions/stream", response_class=StreamingResponse)
+async def create_quiz_questions_stream(
+    topic: str,
+    difficulty: str,
+    num_questions: int = 5,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Generate quiz questions for a given topic, streaming NDJSON events as they are written.
+    Only available to instructors or admins.
+    "token" events carry the raw output, "partial" events the questions parsed so far
+    and the final "done" event the same questions as /quiz-questions.
+    """
+    _check_generation_permissions(current_user)
+    _check_quiz_questions_params(difficulty, num_questions)
+    
+    return ndjson_response(stream_quiz_questions(topic, difficulty, num_questions, force_refresh=force_refresh))
+
+@router.post("/quiz-questions/bulk", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def create_quiz_questions_bulk(
+    topics: List[QuizTopic],
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Start generating quiz questions for several topics in the background.
+    Only available to instructors or admins.
+    Poll /jobs/{job_id} for the result.
+    """
+    _check_generation_permissions(current_user)
+    
+    if not topics or len(topics) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Between 1 and 50 topics are required"
+        )
+    
+    for item in topics:
+        _check_quiz_questions_params(item.difficulty, item.num_questions)
+    
+    return await job_queue.enqueue(
+        "quiz_questions",
+        {"topics": [item.model_dump() for item in topics], "force_refresh": force_refresh},
+        user_id=current_user.id
+    )
+
+@router.post("/content-summary")
+async def create_content_summary(
+    request: Request,
+    content_text: str,
+    max_length: int = 500,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> Dict:
+    """
+    Generate a summary of educational content.
+    Only available to instructors or admins.
+    Repeated requests reuse the cached result unless force_refresh is set.
+    """
+    _check_generation_permissions(current_user)
+    _check_content_summary_params(content_text, max_length)
+    
+    summary = await run_until_disconnected(
+        request,
+        generate_content_summary(content_text, max_length, force_refresh=force_refresh)
+    )
+    return {"summary": summary}
+
+@router.post("/content-summary/stream", response_class=StreamingResponse)
+async def create_content_summary_stream(
+    content_text: str,
+    max_length: int = 500,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Generate a summary of educational content, streaming NDJSON events as it is written.
+    Only available to instructors or admins.
+    "token" events carry the text and the final "done" event the complete summary.
+    """
+    _check_generation_permissions(current_user)
+    _check_content_summary_params(content_text, max_length)
+    
+    return ndjson_response(stream_content_summary(content_text, max_length, force_refresh=force_refresh))
+
+@router.post("/learning-objectives")
+async def create_learning_objectives(
+    request: Request,
+    topic: str,
+    difficulty: str,
+    num_objectives: int = 5,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> Dict:
+    """
+    Generate learning objectives for a given topic.
+    Only available to instructors or admins.
+    Repeated requests reuse the cached result unless force_refresh is set.
+    """
+    _check_generation_permissions(current_user)
+    _check_learning_objectives_params(difficulty, num_objectives)
     
-    objectives = generate_learning_objectives(topic, difficulty, num_objectives)
+    objectives = await run_until_disconnected(
+        request,
+        generate_learning_objectives(topic, difficulty, num_objectives, force_refresh=force_refresh)
+    )
     return {"objectives": objectives}
 
+@router.post("/learning-objectives/stream", response_class=StreamingResponse)
+async def create_learning_objectives_stream(
+    topic: str,
+    difficulty: str,
+    num_objectives: int = 5,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Generate learning objectives for a given topic, streaming NDJSON events as they are written.
+    Only available to instructors or admins.
+    "token" events carry the raw output, "partial" events the objectives parsed so far
+    and the final "done" event the complete list of objectives.
+    """
+    _check_generation_permissions(current_user)
+    _check_learning_objectives_params(difficulty, num_objectives)
+    
+    return ndjson_response(stream_learning_objectives(topic, difficulty, num_objectives, force_refresh=force_refresh))
+
 @router.post("/content-outline")
-def create_content_outline(
+async def create_content_outline(
+    request: Request,
     topic: str,
     num_sections: int = 5,
+    force_refresh: bool = False,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
     """
     Generate an outline for educational content.
     Only available to instructors or admins.
+    Repeated requests reuse the cached result unless force_refresh is set.
     """
-    if current_user.role not in ["instructor", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    if num_sections < 1 or num_sections > 10:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Number of sections must be between 1 and 10"
-        )
+    _check_generation_permissions(current_user)
+    _check_content_outline_params(num_sections)
     
-    outline = generate_content_outline(topic, num_sections)
+    outline = await run_until_disconnected(
+        request,
+        generate_content_outline(topic, num_sections, force_refresh=force_refresh)
+    )
     return outline
+
+@router.post("/content-outline/stream", response_class=StreamingResponse)
+async def create_content_outline_stream(
+    topic: str,
+    num_sections: int = 5,
+    force_refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Generate an outline for educational content, streaming NDJSON events as it is written.
+    Only available to instructors or admins.
+    "token" events carry the raw output, "partial" events the outline parsed so far
+    and the final "done" event the same outline as /content-outline.
+    """
+    _check_generation_permissions(current_user)
+    _check_content_outline_params(num_sections)
+    
+    return ndjson_response(stream_content_outline(topic, num_sections, force_refresh=force_refresh))
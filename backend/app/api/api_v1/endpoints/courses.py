@@ -5,12 +5,17 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.course import Course, CourseCreate, CourseUpdate
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
-from app.services.content.course_service import create_course, get_course, get_courses, update_course
+from app.services.content.course_service import (
+    create_course_async,
+    get_course_async,
+    get_courses_async,
+    update_course_async
+)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Course])
-def read_courses(
+async def read_courses(
     skip: int = 0, 
     limit: int = 100, 
     current_user: User = Depends(get_current_user)
@@ -18,10 +23,10 @@ def read_courses(
     """
     Retrieve courses.
     """
-    return get_courses(skip=skip, limit=limit)
+    return await get_courses_async(skip=skip, limit=limit)
 
 @router.post("/", response_model=Course)
-def create_new_course(
+async def create_new_course(
     course_in: CourseCreate, 
     current_user: User = Depends(get_current_user)
 ) -> Any:
@@ -33,17 +38,17 @@ def create_new_course(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return create_course(course_in=course_in, instructor_id=current_user.id)
+    return await create_course_async(course_in=course_in, instructor_id=current_user.id)
 
 @router.get("/{course_id}", response_model=Course)
-def read_course(
+async def read_course(
     course_id: str, 
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get course by ID.
     """
-    course = get_course(course_id=course_id)
+    course = await get_course_async(course_id=course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,7 +57,7 @@ def read_course(
     return course
 
 @router.put("/{course_id}", response_model=Course)
-def update_course_endpoint(
+async def update_course_endpoint(
     course_id: str,
     course_in: CourseUpdate,
     current_user: User = Depends(get_current_user)
@@ -60,7 +65,7 @@ def update_course_endpoint(
     """
     Update a course.
     """
-    course = get_course(course_id=course_id)
+    course = await get_course_async(course_id=course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,4 +76,4 @@ def update_course_endpoint(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return update_course(course_id=course_id, course_in=course_in)
+    return await update_course_async(course_id=course_id, course_in=course_in)
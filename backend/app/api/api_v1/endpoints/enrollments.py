@@ -6,24 +6,24 @@ from app.schemas.course import Course
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
 from app.services.content.enrollment_service import (
-    enroll_user_in_course,
-    get_course_enrollments,
-    get_enrolled_courses,
-    mark_course_completed,
-    unenroll_user_from_course
+    enroll_user_in_course_async,
+    get_course_enrollments_async,
+    get_enrolled_courses_async,
+    mark_course_completed_async,
+    unenroll_user_from_course_async
 )
 
 router = APIRouter()
 
 @router.post("/{course_id}/enroll")
-def enroll_in_course(
+async def enroll_in_course(
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Enroll the current user in a course.
     """
-    result = enroll_user_in_course(user_id=current_user.id, course_id=course_id)
+    result = await enroll_user_in_course_async(user_id=current_user.id, course_id=course_id)
     
     if not result:
         raise HTTPException(
@@ -34,14 +34,14 @@ def enroll_in_course(
     return {"status": "success", "message": "Successfully enrolled in course"}
 
 @router.post("/{course_id}/unenroll")
-def unenroll_from_course(
+async def unenroll_from_course(
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Unenroll the current user from a course.
     """
-    result = unenroll_user_from_course(user_id=current_user.id, course_id=course_id)
+    result = await unenroll_user_from_course_async(user_id=current_user.id, course_id=course_id)
     
     if not result:
         raise HTTPException(
@@ -52,16 +52,16 @@ def unenroll_from_course(
     return {"status": "success", "message": "Successfully unenrolled from course"}
 
 @router.get("/my-courses", response_model=List[Course])
-def get_my_courses(
+async def get_my_courses(
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get all courses that the current user is enrolled in.
     """
-    return get_enrolled_courses(user_id=current_user.id)
+    return await get_enrolled_courses_async(user_id=current_user.id)
 
 @router.get("/{course_id}/students")
-def get_enrolled_students(
+async def get_enrolled_students(
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
@@ -75,17 +75,17 @@ def get_enrolled_students(
             detail="Not enough permissions"
         )
     
-    return get_course_enrollments(course_id=course_id)
+    return await get_course_enrollments_async(course_id=course_id)
 
 @router.post("/{course_id}/complete")
-def complete_course(
+async def complete_course(
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Mark a course as completed for the current user.
     """
-    result = mark_course_completed(user_id=current_user.id, course_id=course_id)
+    result = await mark_course_completed_async(user_id=current_user.id, course_id=course_id)
     
     if not result:
         raise HTTPException(
@@ -0,0 +1,29 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.schemas.job import Job
+from app.schemas.user import User
+from app.services.auth.auth_service import get_current_user
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the status of a background job, and its result once it has succeeded.
+    Users can only see their own jobs; admins can see all jobs.
+    """
+    job = await job_queue.get(job_id)
+    
+    if job is None or (job["user_id"] != str(current_user.id) and current_user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
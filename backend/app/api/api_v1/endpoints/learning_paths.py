@@ -1,22 +1,30 @@
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
+from app.core.disconnect import run_until_disconnected
+from app.schemas.job import Job
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
+from app.services.ai import background_jobs  # noqa: F401 - registers the job handlers
 from app.services.ai.learning_path_service import generate_learning_path
+from app.services.job_queue import job_queue
 
 router = APIRouter()
 
 @router.get("/{course_id}")
-def get_learning_path(
+async def get_learning_path(
+    request: Request,
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
     """
     Generate a personalized learning path for the current user in a specific course.
     """
-    learning_path = generate_learning_path(user_id=current_user.id, course_id=course_id)
+    learning_path = await run_until_disconnected(
+        request,
+        generate_learning_path(user_id=current_user.id, course_id=course_id)
+    )
     
     if "error" in learning_path:
         raise HTTPException(
@@ -25,3 +33,18 @@ def get_learning_path(
         )
     
     return learning_path
+
+@router.post("/{course_id}/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def start_learning_path_job(
+    course_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Start generating the current user's learning path for a course in the background.
+    Poll /jobs/{job_id} for the result.
+    """
+    return await job_queue.enqueue(
+        "learning_path",
+        {"user_id": str(current_user.id), "course_id": course_id},
+        user_id=current_user.id
+    )
@@ -5,22 +5,27 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.module import Module, ModuleCreate, ModuleUpdate
 from app.schemas.user import User
 from app.services.auth.auth_service import get_current_user
-from app.services.content.module_service import create_module, get_module, get_modules_by_course, update_module
+from app.services.content.module_service import (
+    create_module_async,
+    get_module_async,
+    get_modules_by_course_async,
+    update_module_async
+)
 
 router = APIRouter()
 
 @router.get("/course/{course_id}", response_model=List[Module])
-def read_modules_by_course(
+async def read_modules_by_course(
     course_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Retrieve all modules for a specific course.
     """
-    return get_modules_by_course(course_id=course_id)
+    return await get_modules_by_course_async(course_id=course_id)
 
 @router.post("/", response_model=Module)
-def create_new_module(
+async def create_new_module(
     module_in: ModuleCreate,
     current_user: User = Depends(get_current_user)
 ) -> Any:
@@ -32,17 +37,17 @@ def create_new_module(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return create_module(module_in=module_in)
+    return await create_module_async(module_in=module_in)
 
 @router.get("/{module_id}", response_model=Module)
-def read_module(
+async def read_module(
     module_id: str,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Get module by ID.
     """
-    module = get_module(module_id=module_id)
+    module = await get_module_async(module_id=module_id)
     if not module:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,7 +56,7 @@ def read_module(
     return module
 
 @router.put("/{module_id}", response_model=Module)
-def update_module_endpoint(
+async def update_module_endpoint(
     module_id: str,
     module_in: ModuleUpdate,
     current_user: User = Depends(get_current_user)
@@ -65,11 +70,11 @@ def update_module_endpoint(
             detail="Not enough permissions"
         )
     
-    module = get_module(module_id=module_id)
+    module = await get_module_async(module_id=module_id)
     if not module:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Module not found"
         )
     
-    return update_module(module_id=module_id, module_in=module_in)
+    return await update_module_async(module_id=module_id, module_in=module_in)
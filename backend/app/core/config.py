@@ -21,15 +21,49 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-development")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    AUTH_PRINCIPAL_CACHE_TTL: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))  # seconds an authenticated user is cached
+
+    # Rate limiting
+    RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))  # per client IP
+    RATE_LIMIT_USER_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "300"))  # per authenticated user
+    # Extra per-client limits, "[METHOD ]path-prefix=requests/seconds,..."
+    RATE_LIMIT_ROUTES: str = os.getenv(
+        "RATE_LIMIT_ROUTES",
+        "POST /api/v1/auth/login=10/60,POST /api/v1/auth/register=5/60,/api/v1/ai=30/60,/api/v1/content-generation=10/60"
+    )
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "10000"))  # buckets kept without Redis
+    RATE_LIMIT_REDIS_RETRY_INTERVAL: float = float(os.getenv("RATE_LIMIT_REDIS_RETRY_INTERVAL", "5"))  # seconds limited locally after a Redis error
 
     # Supabase
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_POOL_SIZE: int = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    SUPABASE_CONNECT_TIMEOUT: float = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    SUPABASE_HEALTH_CHECK_INTERVAL: int = int(os.getenv("SUPABASE_HEALTH_CHECK_INTERVAL", "30"))
 
     # AI Model
     AI_MODEL_NAME: str = os.getenv("AI_MODEL_NAME", "google/flan-t5-base")
     AI_MODEL_TEMPERATURE: float = float(os.getenv("AI_MODEL_TEMPERATURE", "0.7"))
     AI_MAX_TOKENS: int = int(os.getenv("AI_MAX_TOKENS", "1000"))
+    AI_BACKEND: str = os.getenv("AI_BACKEND", "huggingface")  # "huggingface" or "offline"
+    AI_OFFLINE_RESPONSE: str = os.getenv("AI_OFFLINE_RESPONSE", "{}")  # reply of the offline backend
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "4"))  # concurrent calls per model
+    AI_TOTAL_CONCURRENCY: int = int(os.getenv("AI_TOTAL_CONCURRENCY", "8"))  # concurrent calls across all models
+    AI_REQUEST_TIMEOUT: float = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))  # seconds per call, including the wait for a slot
+    AI_MODEL_CONCURRENCY: str = os.getenv("AI_MODEL_CONCURRENCY", "")  # "model=calls,..." overrides
+    GENERATION_CACHE_TTL: int = int(os.getenv("GENERATION_CACHE_TTL", "604800"))  # seconds a generated completion is reused
+    GENERATION_CACHE_DIR: str = os.getenv("GENERATION_CACHE_DIR", "")  # disk tier directory, empty disables it
+    GENERATION_CACHE_DISK_MAX_BYTES: int = int(os.getenv("GENERATION_CACHE_DISK_MAX_BYTES", "268435456"))  # 256 MiB
+
+    # Background jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # worker tasks per API process, 0 leaves jobs to app.worker
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # runs of a failing job before it is marked failed
+    JOB_RETRY_DELAY: float = float(os.getenv("JOB_RETRY_DELAY", "5"))  # seconds before the first retry, doubled after each
+    JOB_RESULT_TTL: int = int(os.getenv("JOB_RESULT_TTL", "86400"))  # seconds job statuses and results are kept
+    JOB_LEASE_TIMEOUT: float = float(os.getenv("JOB_LEASE_TIMEOUT", "60"))  # seconds without a heartbeat before a running job is requeued
 
     # Database
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
@@ -43,6 +77,11 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # Monitoring
+    METRICS_MAX_ROUTE_LABELS: int = int(os.getenv("METRICS_MAX_ROUTE_LABELS", "500"))  # distinct route templates in metrics
+    # Report each request's database query count in an X-DB-Query-Count response header
+    DB_QUERY_COUNT_HEADER: bool = os.getenv("DB_QUERY_COUNT_HEADER", "false").lower() == "true"
+
     # Email
     SMTP_HOST: Optional[str] = os.getenv("SMTP_HOST")
     SMTP_PORT: Optional[int] = int(os.getenv("SMTP_PORT", "587")) if os.getenv("SMTP_PORT") else None
@@ -52,15 +91,33 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))  # async connection pool size
+    CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000"))
+    # In-process cache TTLs in seconds per key namespace, e.g. "course=60,module=60"
+    CACHE_NAMESPACE_TTLS: str = os.getenv("CACHE_NAMESPACE_TTLS", "course=60,module=60,content=60,version=60,principal=30,search=30,popular_content=30")
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "json")  # "json" or "msgpack"
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "zstd")  # "zstd", "lz4", "zlib" or "none"
+    CACHE_COMPRESSION_THRESHOLD: int = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024"))  # bytes
+    # Seconds one worker may spend recomputing a missing @cached value while others wait for it
+    CACHE_LOCK_TIMEOUT: float = float(os.getenv("CACHE_LOCK_TIMEOUT", "5"))
+    CATALOG_CACHE_TTL: int = int(os.getenv("CATALOG_CACHE_TTL", "300"))  # seconds course, module and content reads stay fresh
+    CATALOG_STALE_TTL: int = int(os.getenv("CATALOG_STALE_TTL", "3600"))  # seconds they may then be served while refreshing
 
     # Storage
     STORAGE_BUCKET: Optional[str] = os.getenv("STORAGE_BUCKET")
 
+    # Search
+    SEARCH_ENGINE: str = os.getenv("SEARCH_ENGINE", "postgres")  # "postgres" or "memory"
+    SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+    SEARCH_RESULT_LIMIT: int = int(os.getenv("SEARCH_RESULT_LIMIT", "500"))  # ranked IDs kept per query
+
     # Frontend URL
     FRONTEND_URL: str = os.getenv("NEXT_PUBLIC_API_URL", "http://localhost:3000").replace("/api/v1", "")
 
     # Analytics
     ANALYTICS_ENABLED: bool = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+    ENGAGEMENT_ROLLUP_INTERVAL: int = int(os.getenv("ENGAGEMENT_ROLLUP_INTERVAL", "900"))  # seconds, 0 disables
+    POPULAR_CONTENT_CACHE_TTL: int = int(os.getenv("POPULAR_CONTENT_CACHE_TTL", "60"))
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,48 @@
+"""
+Cancellation of request work when the client goes away.
+"""
+
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import HTTPException, Request
+
+from app.core.logging import logger
+
+# Seconds between checks of whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Status recorded for requests abandoned by the client (nginx's "Client Closed Request")
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await a result, cancelling it if the client disconnects first.
+
+    Meant for slow handlers such as LLM calls, whose results are worthless
+    once nobody is waiting for them. The handler must not read the request
+    body afterwards, as disconnect checks consume its messages.
+
+    Args:
+        request: Request being handled
+        awaitable: Work producing the response
+
+    Returns:
+        Result of the work
+
+    Raises:
+        HTTPException: 499 if the client disconnected
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {request.method} {request.url.path}")
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        task.cancel()
@@ -2,90 +2,130 @@
 Middleware for the application.
 """
 
-import time
-from typing import Callable, Dict
+import math
+from typing import List, Optional, Tuple
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from jose import JWTError, jwt
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.services.rate_limiter import RateLimitRule, parse_route_limits, rate_limiter
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
-    Middleware for rate limiting requests.
+    ASGI middleware for rate limiting requests.
+    
+    Authenticated requests are limited per user and anonymous requests per
+    client IP. Route limits add a separate bucket per client for matching
+    paths. Every response reports the most constraining limit in
+    X-RateLimit-* headers.
+    
+    The middleware works on the raw ASGI messages, so responses are passed
+    through without wrapping them in extra tasks or copying their bodies.
     """
     
     def __init__(
         self,
-        app: FastAPI,
+        app: ASGIApp,
         rate_limit_per_minute: int = 60,
+        user_rate_limit_per_minute: Optional[int] = None,
+        route_limits: Optional[List[Tuple[Optional[str], str, int, int]]] = None,
         exclude_paths: list = None
     ):
         """
         Initialize the rate limit middleware.
         
         Args:
-            app: FastAPI application
-            rate_limit_per_minute: Maximum number of requests per minute
+            app: ASGI application
+            rate_limit_per_minute: Maximum number of requests per minute per client IP
+            user_rate_limit_per_minute: Maximum number of requests per minute per user (default: same as per IP)
+            route_limits: (method or None, path prefix, limit, period in seconds) tuples
             exclude_paths: List of paths to exclude from rate limiting
         """
-        super().__init__(app)
+        self.app = app
         self.rate_limit_per_minute = rate_limit_per_minute
-        self.exclude_paths = exclude_paths or []
-        self.requests: Dict[str, Dict[str, float]] = {}
-        self.window_size = 60  # 1 minute in seconds
+        self.user_rate_limit_per_minute = user_rate_limit_per_minute or rate_limit_per_minute
+        self.route_limits = route_limits or []
+        self.exclude_paths = tuple(exclude_paths or [])
+    
+    def _client(self, scope: Scope) -> Tuple[str, int]:
+        """
+        Identify the client of a request and its per-minute limit.
+        """
+        authorization = ""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                subject = payload.get("uid") or payload.get("sub")
+                if subject:
+                    return f"user:{subject}", self.user_rate_limit_per_minute
+            except JWTError:
+                pass
+        
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        return f"ip:{client_ip}", self.rate_limit_per_minute
+    
+    def _rules(self, scope: Scope) -> List[RateLimitRule]:
+        """
+        Get the rate limit rules a request is subject to.
+        """
+        client, limit = self._client(scope)
+        rules = [RateLimitRule(client, limit, 60)]
+        
+        path = scope["path"]
+        for method, prefix, route_limit, period in self.route_limits:
+            if path.startswith(prefix) and method in (None, scope["method"]):
+                rules.append(RateLimitRule(f"{method or '*'}:{prefix}:{client}", route_limit, period))
+        return rules
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process the request and apply rate limiting.
         
         Args:
-            request: The incoming request
-            call_next: The next middleware or route handler
-            
-        Returns:
-            The response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
-        # Skip rate limiting for excluded paths
-        for path in self.exclude_paths:
-            if request.url.path.startswith(path):
-                return await call_next(request)
+        # Skip rate limiting for other protocols and excluded paths
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
         
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
+        rules = self._rules(scope)
+        result = await rate_limiter.hit(rules)
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode())
+        ]
         
-        # Check if client has exceeded rate limit
-        current_time = time.time()
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {rules[0].key}")
+            response = PlainTextResponse("Rate limit exceeded. Please try again later.", status_code=429)
+            response.raw_headers.extend(headers)
+            response.raw_headers.append((b"retry-after", str(math.ceil(result.retry_after)).encode()))
+            await response(scope, receive, send)
+            return
         
-        if client_ip in self.requests:
-            # Clean up old requests
-            self.requests[client_ip] = {
-                timestamp: count
-                for timestamp, count in self.requests[client_ip].items()
-                if current_time - float(timestamp) < self.window_size
-            }
-            
-            # Count requests in the current window
-            request_count = sum(self.requests[client_ip].values())
-            
-            if request_count >= self.rate_limit_per_minute:
-                logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-                return Response(
-                    content="Rate limit exceeded. Please try again later.",
-                    status_code=429,
-                    media_type="text/plain"
-                )
-        else:
-            self.requests[client_ip] = {}
-        
-        # Update request count
-        timestamp = str(current_time)
-        self.requests[client_ip][timestamp] = self.requests[client_ip].get(timestamp, 0) + 1
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
         
         # Process the request
-        return await call_next(request)
+        await self.app(scope, receive, send_with_headers)
 
 def setup_middleware(app: FastAPI) -> None:
     """
@@ -94,6 +134,17 @@ def setup_middleware(app: FastAPI) -> None:
     Args:
         app: FastAPI application
     """
+    # Add rate limiting middleware first, so that CORS wraps it: preflight
+    # requests are answered without using up the limit, and 429 responses
+    # carry CORS headers browsers can read
+    app.add_middleware(
+        RateLimitMiddleware,
+        rate_limit_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+        user_rate_limit_per_minute=settings.RATE_LIMIT_USER_PER_MINUTE,
+        route_limits=parse_route_limits(settings.RATE_LIMIT_ROUTES),
+        exclude_paths=["/docs", "/redoc", "/openapi.json"]
+    )
+    
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -103,11 +154,4 @@ def setup_middleware(app: FastAPI) -> None:
         allow_headers=["*"],
     )
     
-    # Add rate limiting middleware
-    app.add_middleware(
-        RateLimitMiddleware,
-        rate_limit_per_minute=100,
-        exclude_paths=["/docs", "/redoc", "/openapi.json"]
-    )
-    
     logger.info("Middleware setup complete")
@@ -2,38 +2,254 @@
 Monitoring configuration for the application.
 """
 
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set
+
 from fastapi import FastAPI
 from prometheus_client import Counter, Histogram, Info
+from prometheus_client.metrics import MetricWrapperBase
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 from app.core.logging import logger
 
-# Define custom metrics
+# Label values used instead of the route template when bounding cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+OTHER_ROUTE = "<other>"
+OTHER_METHOD = "OTHER"
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+# Define custom metrics, labeled by route template rather than raw path
 REQUESTS_TOTAL = Counter(
     "app_requests_total",
-    "Total number of requests by path and method",
+    "Total number of requests by route template and method",
     ["path", "method"]
 )
 
 RESPONSES_TOTAL = Counter(
     "app_responses_total",
-    "Total number of responses by path, method, and status code",
+    "Total number of responses by route template, method, and status code",
     ["path", "method", "status_code"]
 )
 
 REQUEST_DURATION = Histogram(
     "app_request_duration_seconds",
-    "Request duration in seconds by path and method",
+    "Request duration in seconds by route template and method",
     ["path", "method"],
     buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, float("inf"))
 )
 
+SEARCH_CACHE_REQUESTS = Counter(
+    "app_search_cache_requests_total",
+    "Search result cache lookups by search kind and result (hit or miss)",
+    ["kind", "result"]
+)
+
+GENERATION_CACHE_REQUESTS = Counter(
+    "app_generation_cache_requests_total",
+    "Generated content cache lookups by prompt type and result (redis, disk, miss or refresh)",
+    ["prompt_type", "result"]
+)
+
+# Outbound dependency metrics. Counters carry an "outcome" label ("ok" or "error").
+DEPENDENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+DB_QUERY_DURATION = Histogram(
+    "app_db_query_duration_seconds",
+    "Supabase query duration in seconds by table and operation",
+    ["table", "operation"],
+    buckets=DEPENDENCY_BUCKETS
+)
+
+DB_QUERIES_TOTAL = Counter(
+    "app_db_queries_total",
+    "Supabase queries by table, operation and outcome",
+    ["table", "operation", "outcome"]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "app_db_queries_per_request",
+    "Number of Supabase queries made while handling a request, by route template",
+    ["path"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float("inf"))
+)
+
+CACHE_OPERATION_DURATION = Histogram(
+    "app_cache_operation_duration_seconds",
+    "Redis command duration in seconds by command",
+    ["operation"],
+    buckets=DEPENDENCY_BUCKETS
+)
+
+CACHE_OPERATIONS_TOTAL = Counter(
+    "app_cache_operations_total",
+    "Redis commands by command and outcome",
+    ["operation", "outcome"]
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "app_llm_request_duration_seconds",
+    "Language model call duration in seconds by prompt type",
+    ["prompt_type"],
+    buckets=DEPENDENCY_BUCKETS
+)
+
+LLM_REQUESTS_TOTAL = Counter(
+    "app_llm_requests_total",
+    "Language model calls by prompt type and outcome",
+    ["prompt_type", "outcome"]
+)
+
+EMAIL_SEND_DURATION = Histogram(
+    "app_email_send_duration_seconds",
+    "SMTP send duration in seconds",
+    buckets=DEPENDENCY_BUCKETS
+)
+
+EMAILS_SENT_TOTAL = Counter(
+    "app_emails_sent_total",
+    "Emails sent by outcome",
+    ["outcome"]
+)
+
 APP_INFO = Info(
     "app_info",
     "Application information"
 )
 
+# Supabase queries made while handling the current request, shared with worker threads
+_request_db_queries: ContextVar[Optional[List[int]]] = ContextVar("request_db_queries", default=None)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and responses and timing requests.
+    
+    Requests are labeled with the template of the route that handled them,
+    e.g. "/api/v1/courses/{course_id}", so the number of time series does
+    not grow with the number of distinct URLs. Requests matching no route
+    share one label, unknown methods are grouped together, and at most
+    max_route_labels templates are tracked before further ones are grouped.
+    
+    The number of Supabase queries made while handling each request is
+    recorded too, and optionally reported in a debug response header.
+    
+    Only the response start message is inspected for its status code, so
+    streamed responses pass through untouched.
+    """
+    
+    def __init__(self, app: ASGIApp, max_route_labels: int = 500, query_count_header: bool = False):
+        """
+        Initialize the metrics middleware.
+        
+        Args:
+            app: ASGI application
+            max_route_labels: Maximum number of distinct route templates used as labels
+            query_count_header: Whether to report the request's database query count in X-DB-Query-Count
+        """
+        self.app = app
+        self.max_route_labels = max_route_labels
+        self.query_count_header = query_count_header
+        self._route_labels: Set[str] = set()
+    
+    def _route_label(self, scope: Scope) -> str:
+        """
+        Get the bounded route label of a handled request.
+        """
+        route = scope.get("route")
+        template = getattr(route, "path_format", None) or getattr(route, "path", None)
+        if template is None:
+            return UNMATCHED_ROUTE
+        
+        if template not in self._route_labels:
+            if len(self._route_labels) >= self.max_route_labels:
+                return OTHER_ROUTE
+            self._route_labels.add(template)
+        return template
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Record metrics for an HTTP request.
+        
+        Args:
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"] if scope["method"] in HTTP_METHODS else OTHER_METHOD
+        status_code = 500
+        db_queries = [0]
+        token = _request_db_queries.set(db_queries)
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.query_count_header:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-query-count", str(db_queries[0]).encode())
+                    ]
+            await send(message)
+        
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_db_queries.reset(token)
+            
+            # The route is only known once routing ran, so record everything afterwards
+            path = self._route_label(scope)
+            REQUESTS_TOTAL.labels(path=path, method=method).inc()
+            REQUEST_DURATION.labels(path=path, method=method).observe(time.perf_counter() - started)
+            RESPONSES_TOTAL.labels(
+                path=path,
+                method=method,
+                status_code=status_code
+            ).inc()
+            DB_QUERIES_PER_REQUEST.labels(path=path).observe(db_queries[0])
+
+@contextmanager
+def observe_dependency(duration: MetricWrapperBase, total: MetricWrapperBase, **labels: str) -> Iterator[Dict[str, str]]:
+    """
+    Time a call to an outbound dependency and count it by outcome.
+    
+    The outcome is "error" if the block raises. Callers can also set it for
+    failures that do not raise through the yielded dict.
+    
+    Args:
+        duration: Histogram observing the call duration
+        total: Counter of calls with an "outcome" label
+        labels: Labels shared by both metrics
+        
+    Yields:
+        Dict whose "outcome" key may be set to "error"
+    """
+    result = {"outcome": "ok"}
+    started = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        (duration.labels(**labels) if labels else duration).observe(elapsed)
+        total.labels(outcome=result["outcome"], **labels).inc()
+
+def count_db_query() -> None:
+    """
+    Count a Supabase query against the request being handled, if any.
+    """
+    queries = _request_db_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
 def setup_monitoring(app: FastAPI) -> None:
     """
     Set up monitoring for the application.
@@ -48,39 +264,23 @@ def setup_monitoring(app: FastAPI) -> None:
         "environment": settings.ENVIRONMENT
     })
     
-    # Set up Prometheus instrumentation
-    instrumentator = Instrumentator()
-    
-    # Add default metrics
-    instrumentator.add(metrics.latency())
-    instrumentator.add(metrics.requests())
-    instrumentator.add(metrics.requests_size())
-    instrumentator.add(metrics.responses_size())
-    instrumentator.add(metrics.combined_size())
+    # Set up Prometheus instrumentation for payload sizes. Request counts and
+    # latency come from MetricsMiddleware, so the instrumentator's own
+    # latency and request metrics are not added.
+    instrumentator = Instrumentator(
+        should_group_status_codes=True,
+        should_ignore_untemplated=True,
+        excluded_handlers=["/metrics"]
+    )
+    instrumentator.add(metrics.request_size())
+    instrumentator.add(metrics.response_size())
     
-    # Add custom metrics handler
-    @instrumentator.instrument_app(app)
-    def custom_metrics_handler(app: FastAPI):
-        @app.middleware("http")
-        async def monitor_requests(request, call_next):
-            path = request.url.path
-            method = request.method
-            
-            # Increment request counter
-            REQUESTS_TOTAL.labels(path=path, method=method).inc()
-            
-            # Measure request duration
-            with REQUEST_DURATION.labels(path=path, method=method).time():
-                response = await call_next(request)
-            
-            # Increment response counter
-            RESPONSES_TOTAL.labels(
-                path=path,
-                method=method,
-                status_code=response.status_code
-            ).inc()
-            
-            return response
+    # Add custom metrics middleware
+    app.add_middleware(
+        MetricsMiddleware,
+        max_route_labels=settings.METRICS_MAX_ROUTE_LABELS,
+        query_count_header=settings.DB_QUERY_COUNT_HEADER
+    )
     
     # Expose metrics endpoint
     instrumentator.instrument(app).expose(app, include_in_schema=False, should_gzip=True)
@@ -0,0 +1,34 @@
+"""
+Streaming of incremental results as newline-delimited JSON.
+"""
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def ndjson_response(events: AsyncIterator[Any]) -> StreamingResponse:
+    """
+    Stream events as newline-delimited JSON, one event per line.
+
+    Each line is sent as soon as its event is produced, and proxies are told
+    not to buffer the response. If the client disconnects, the event source
+    is cancelled along with the work producing it.
+
+    Args:
+        events: JSON-serializable events
+
+    Returns:
+        Streaming response
+    """
+    async def lines() -> AsyncIterator[str]:
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
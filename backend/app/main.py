@@ -2,6 +2,8 @@
 Main application module.
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,6 +12,11 @@ from app.core.config import settings
 from app.core.logging import logger
 from app.core.middleware import setup_middleware
 from app.core.monitoring import setup_monitoring
+from app.services.analytics.engagement_service import run_engagement_rollup_job
+from app.services.cache_service import async_cache, cache
+from app.services.db import supabase_manager
+from app.services.job_queue import job_queue
+from app.services.search_service import search_service
 
 def create_application() -> FastAPI:
     """
@@ -52,6 +59,48 @@ def create_application() -> FastAPI:
         """
         return {"status": "ok"}
 
+    @app.get("/health/db")
+    async def database_health_check():
+        """
+        Database health check endpoint, covering both the sync and the async client.
+        """
+        healthy = await asyncio.to_thread(supabase_manager.check_health)
+        async_healthy = await supabase_manager.check_async_health()
+        return {"status": "ok" if healthy and async_healthy else "unavailable"}
+
+    background_tasks = []
+
+    @app.on_event("startup")
+    async def start_background_jobs():
+        """
+        Start cache invalidation, build in-memory search indexes, start periodic background jobs and job queue workers.
+        """
+        cache.start_invalidation_listener()
+
+        if settings.SEARCH_ENGINE == "memory":
+            await asyncio.to_thread(search_service.build_indexes)
+
+        if settings.ANALYTICS_ENABLED and settings.ENGAGEMENT_ROLLUP_INTERVAL > 0:
+            background_tasks.append(
+                asyncio.create_task(run_engagement_rollup_job(settings.ENGAGEMENT_ROLLUP_INTERVAL))
+            )
+
+        job_queue.start()
+
+    @app.on_event("shutdown")
+    async def close_database_client():
+        """
+        Stop background jobs and cache invalidation and release pooled database and Redis connections on shutdown.
+        """
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await job_queue.stop()
+        cache.stop_invalidation_listener()
+        await async_cache.close()
+        supabase_manager.close()
+        await supabase_manager.close_async()
+
     logger.info("Application startup complete")
 
     return app
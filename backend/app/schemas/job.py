@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel
+
+class Job(BaseModel):
+    id: str
+    type: str
+    status: str
+    attempts: int = 0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
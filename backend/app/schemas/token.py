@@ -7,3 +7,4 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    uid: Optional[str] = None
@@ -2,18 +2,18 @@
 Service for adaptive assessments that adjust difficulty based on user performance.
 """
 
+import asyncio
 from typing import Dict, List, Optional, Tuple
 import json
 from datetime import datetime, timedelta
 from uuid import UUID, uuid4
 
 from langchain.chains import LLMChain
-from langchain_community.llms import HuggingFaceHub
 from langchain.prompts import PromptTemplate
 
-from app.core.config import settings
 from app.services.db import get_supabase_client
 from app.services.ai.content_generation_service import generate_quiz_questions
+from app.services.ai.llm_registry import llm_registry
 
 class AdaptiveAssessmentEngine:
     """
@@ -31,10 +31,6 @@ class AdaptiveAssessmentEngine:
         self.user_id = user_id
         self.course_id = course_id
         self.supabase = get_supabase_client()
-        self.llm = HuggingFaceHub(
-            repo_id=settings.AI_MODEL_NAME,
-            model_kwargs={"temperature": 0.5, "max_length": 1000}
-        )
 
     def get_user_knowledge_state(self) -> Dict:
         """
@@ -124,7 +120,7 @@ class AdaptiveAssessmentEngine:
 
         return knowledge_state
 
-    def generate_adaptive_assessment(self, num_questions: int = 10) -> Dict:
+    async def generate_adaptive_assessment(self, num_questions: int = 10) -> Dict:
         """
         Generate an adaptive assessment based on the user's knowledge state.
 
@@ -134,19 +130,20 @@ class AdaptiveAssessmentEngine:
         Returns:
             An assessment object with questions
         """
-        knowledge_state = self.get_user_knowledge_state()
+        # The Supabase reads and writes are synchronous, so run them off the event loop
+        knowledge_state = await asyncio.to_thread(self.get_user_knowledge_state)
 
         # Determine question distribution based on knowledge state
         question_distribution = self._calculate_question_distribution(knowledge_state, num_questions)
 
-        # Generate questions for each topic and difficulty
-        questions = []
-
-        for topic, difficulties in question_distribution.items():
-            for difficulty, count in difficulties.items():
-                if count > 0:
-                    topic_questions = generate_quiz_questions(topic, difficulty, count)
-                    questions.extend(topic_questions)
+        # Generate questions for each topic and difficulty concurrently, keeping their order
+        batches = await asyncio.gather(*(
+            generate_quiz_questions(topic, difficulty, count)
+            for topic, difficulties in question_distribution.items()
+            for difficulty, count in difficulties.items()
+            if count > 0
+        ))
+        questions = [question for batch in batches for question in batch]
 
         # Create assessment
         assessment_id = str(uuid4())
@@ -163,7 +160,7 @@ class AdaptiveAssessmentEngine:
         }
 
         # Save assessment to database
-        self.supabase.table("adaptive_assessments").insert(assessment).execute()
+        await asyncio.to_thread(self.supabase.table("adaptive_assessments").insert(assessment).execute)
 
         # Return assessment without answers for frontend
         frontend_assessment = {
@@ -250,7 +247,7 @@ class AdaptiveAssessmentEngine:
 
         return distribution
 
-    def evaluate_assessment(self, assessment_id: str, answers: List[Dict]) -> Dict:
+    async def evaluate_assessment(self, assessment_id: str, answers: List[Dict]) -> Dict:
         """
         Evaluate an assessment submission.
 
@@ -261,6 +258,26 @@ class AdaptiveAssessmentEngine:
         Returns:
             Assessment results
         """
+        # The Supabase reads and writes are synchronous, so run them off the event loop
+        results = await asyncio.to_thread(self._score_assessment, assessment_id, answers)
+        if "error" in results:
+            return results
+
+        questions = results.pop("questions")
+        results["feedback"] = await self._generate_feedback(results["score"], results["question_results"], questions)
+        return results
+
+    def _score_assessment(self, assessment_id: str, answers: List[Dict]) -> Dict:
+        """
+        Score an assessment submission and save the results.
+
+        Args:
+            assessment_id: The ID of the assessment
+            answers: The user's answers
+
+        Returns:
+            Results without feedback, with the assessment questions
+        """
         # Get assessment
         assessment_response = self.supabase.table("adaptive_assessments").select("*").eq("assessment_id", assessment_id).execute()
 
@@ -326,18 +343,14 @@ class AdaptiveAssessmentEngine:
         # Update assessment status
         self.supabase.table("adaptive_assessments").update({"status": "completed"}).eq("assessment_id", assessment_id).execute()
 
-        # Generate feedback
-        feedback = self._generate_feedback(score, question_results, questions)
-
-        # Return results
         return {
             "result_id": result_id,
             "score": score,
             "question_results": question_results,
-            "feedback": feedback
+            "questions": questions
         }
 
-    def _generate_feedback(self, score: float, question_results: List[Dict], questions: List[Dict]) -> Dict:
+    async def _generate_feedback(self, score: float, question_results: List[Dict], questions: List[Dict]) -> Dict:
         """
         Generate personalized feedback based on assessment results.
 
@@ -405,12 +418,15 @@ class AdaptiveAssessmentEngine:
         )
 
         try:
-            result = self.llm.invoke(
+            result = await llm_registry.ainvoke(
                 prompt.format(
                     score=round(score),
                     strengths=", ".join(strengths) if strengths else "None identified",
                     weaknesses=", ".join(weaknesses) if weaknesses else "None identified"
-                )
+                ),
+                "assessment_feedback",
+                temperature=0.5,
+                max_length=1000
             )
 
             # Parse the result
@@ -432,7 +448,7 @@ class AdaptiveAssessmentEngine:
                 "next_steps": ["Continue to the next section."]
             }
 
-def create_adaptive_assessment(user_id: UUID, course_id: str, num_questions: int = 10) -> Dict:
+async def create_adaptive_assessment(user_id: UUID, course_id: str, num_questions: int = 10) -> Dict:
     """
     Create an adaptive assessment for a user.
 
@@ -445,9 +461,9 @@ def create_adaptive_assessment(user_id: UUID, course_id: str, num_questions: int
         An assessment object
     """
     engine = AdaptiveAssessmentEngine(user_id, course_id)
-    return engine.generate_adaptive_assessment(num_questions)
+    return await engine.generate_adaptive_assessment(num_questions)
 
-def evaluate_adaptive_assessment(user_id: UUID, assessment_id: str, answers: List[Dict]) -> Dict:
+async def evaluate_adaptive_assessment(user_id: UUID, assessment_id: str, answers: List[Dict]) -> Dict:
     """
     Evaluate an adaptive assessment submission.
 
@@ -461,7 +477,9 @@ def evaluate_adaptive_assessment(user_id: UUID, assessment_id: str, answers: Lis
     """
     # Get course ID from assessment
     supabase = get_supabase_client()
-    assessment_response = supabase.table("adaptive_assessments").select("course_id").eq("assessment_id", assessment_id).execute()
+    assessment_response = await asyncio.to_thread(
+        supabase.table("adaptive_assessments").select("course_id").eq("assessment_id", assessment_id).execute
+    )
 
     if not assessment_response.data:
         return {"error": "Assessment not found"}
@@ -469,4 +487,4 @@ def evaluate_adaptive_assessment(user_id: UUID, assessment_id: str, answers: Lis
     course_id = assessment_response.data[0]["course_id"]
 
     engine = AdaptiveAssessmentEngine(user_id, course_id)
-    return engine.evaluate_assessment(assessment_id, answers)
+    return await engine.evaluate_assessment(assessment_id, answers)
@@ -0,0 +1,63 @@
+"""
+Background job handlers for the AI services.
+
+Importing this module registers the handlers with the job queue, so it must
+be imported by every process running workers.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from app.services.ai.content_generation_service import generate_quiz_questions
+from app.services.ai.langgraph_workflow import run_recommendation_workflow
+from app.services.ai.learning_path_service import generate_learning_path
+from app.services.ai.learning_style_service import analyze_learning_style
+from app.services.job_queue import JobFailed, job_queue
+
+async def learning_style_job(user_id: str) -> Dict:
+    """
+    Analyze a user's learning style and store it in their profile.
+    """
+    return await analyze_learning_style(user_id)
+
+async def learning_path_job(user_id: str, course_id: str) -> Dict:
+    """
+    Generate a user's learning path for a course.
+    """
+    learning_path = await generate_learning_path(user_id, course_id)
+    if "error" in learning_path:
+        raise JobFailed(learning_path["error"])
+    return learning_path
+
+async def recommendations_job(user_id: str) -> List[Dict]:
+    """
+    Run the recommendation workflow for a user, saving new recommendations.
+    """
+    return await run_recommendation_workflow(user_id)
+
+async def quiz_questions_job(topics: List[Dict], force_refresh: bool = False) -> List[Dict]:
+    """
+    Generate quiz questions for several topics concurrently.
+
+    Args:
+        topics: Items with "topic", "difficulty" and optionally "num_questions"
+        force_refresh: Whether to call the model even if cached results exist
+
+    Returns:
+        The items with their generated "questions"
+    """
+    questions = await asyncio.gather(*(
+        generate_quiz_questions(
+            item["topic"],
+            item["difficulty"],
+            item.get("num_questions", 5),
+            force_refresh=force_refresh
+        )
+        for item in topics
+    ))
+    return [{**item, "questions": generated} for item, generated in zip(topics, questions)]
+
+job_queue.register("learning_style", learning_style_job)
+job_queue.register("learning_path", learning_path_job)
+job_queue.register("recommendations", recommendations_job)
+job_queue.register("quiz_questions", quiz_questions_job)
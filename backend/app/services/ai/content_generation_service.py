@@ -1,20 +1,269 @@
 """
 Service for generating educational content using AI.
+
+Each generator has a streaming variant yielding events as the model
+produces tokens, for clients that render the content while it is written.
 """
 
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 import json
 from uuid import UUID
 
 from langchain.chains import LLMChain
-from langchain_community.llms import HuggingFaceHub
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.utils.json import parse_partial_json
 
-from app.core.config import settings
+from app.core.logging import logger
 from app.services.db import get_supabase_client
+from app.services.ai.generation_cache import generation_cache
+
+QUIZ_QUESTIONS_PROMPT = PromptTemplate(
+    input_variables=["topic", "difficulty", "num_questions"],
+    template="""
+    Generate {num_questions} multiple-choice quiz questions about {topic} at a {difficulty} difficulty level.
+    
+    Return the questions in the following JSON format:
+    [
+      {{
+        "text": "Question text",
+        "type": "multiple-choice",
+        "options": [
+          {{ "id": "a", "text": "Option A" }},
+          {{ "id": "b", "text": "Option B" }},
+          {{ "id": "c", "text": "Option C" }},
+          {{ "id": "d", "text": "Option D" }}
+        ],
+        "correct_answer": {{ "id": "correct_option_id" }},
+        "explanation": "Explanation of the correct answer"
+      }}
+    ]
+    
+    Make sure:
+    1. Questions are clear and concise
+    2. All options are plausible
+    3. There is only one correct answer
+    4. The difficulty level is appropriate
+    5. Questions cover different aspects of the topic
+    
+    Respond with ONLY the JSON array, no additional text.
+    """
+)
+
+CONTENT_SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["content", "max_length"],
+    template="""
+    Summarize the following educational content in a clear and concise way.
+    Keep the summary under {max_length} characters.
+    
+    Content:
+    {content}
+    
+    Summary:
+    """
+)
+
+LEARNING_OBJECTIVES_PROMPT = PromptTemplate(
+    input_variables=["topic", "difficulty", "num_objectives"],
+    template="""
+    Generate {num_objectives} learning objectives for a {difficulty} level course on {topic}.
+    
+    Each learning objective should:
+    1. Start with an action verb (e.g., "Explain", "Analyze", "Create")
+    2. Be specific and measurable
+    3. Focus on what the learner will be able to do
+    4. Be appropriate for the {difficulty} level
+    
+    Format the response as a JSON array of strings:
+    ["Objective 1", "Objective 2", ...]
+    
+    Respond with ONLY the JSON array, no additional text.
+    """
+)
+
+CONTENT_OUTLINE_PROMPT = PromptTemplate(
+    input_variables=["topic", "num_sections"],
+    template="""
+    Create a detailed outline for educational content about {topic} with {num_sections} main sections.
+    
+    Return the outline in the following JSON format:
+    {{
+      "title": "Main title for the content",
+      "description": "Brief description of the content",
+      "sections": [
+        {{
+          "title": "Section 1 Title",
+          "subsections": [
+            "Subsection 1.1",
+            "Subsection 1.2",
+            "Subsection 1.3"
+          ]
+        }},
+        {{
+          "title": "Section 2 Title",
+          "subsections": [
+            "Subsection 2.1",
+            "Subsection 2.2"
+          ]
+        }}
+      ]
+    }}
+    
+    Make sure:
+    1. The content follows a logical progression
+    2. Each section builds on previous sections
+    3. The outline covers the topic comprehensively
+    4. Subsections provide more detailed breakdown of each section
+    
+    Respond with ONLY the JSON object, no additional text.
+    """
+)
+
+def _parse_quiz_questions(result: str, topic: str) -> List[Dict]:
+    """
+    Parse generated quiz questions, falling back to a placeholder question.
+    """
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        # If parsing fails, return a simple question
+        return [
+            {
+                "text": f"What is {topic}?",
+                "type": "multiple-choice",
+                "options": [
+                    {"id": "a", "text": "Option A"},
+                    {"id": "b", "text": "Option B"},
+                    {"id": "c", "text": "Option C"},
+                    {"id": "d", "text": "Option D"}
+                ],
+                "correct_answer": {"id": "a"},
+                "explanation": "This is a fallback question."
+            }
+        ]
+
+def _parse_learning_objectives(result: str, num_objectives: int) -> List[str]:
+    """
+    Parse generated learning objectives, extracting them line by line from malformed JSON.
+    """
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        # If parsing fails, extract objectives line by line
+        lines = result.strip().split('\n')
+        cleaned_lines = [line.strip().strip('"').strip("'") for line in lines if line.strip()]
+        
+        # Remove any JSON syntax artifacts
+        cleaned_lines = [line.strip('[').strip(']').strip(',').strip('"').strip("'") for line in cleaned_lines]
+        
+        # Filter out empty lines and non-objective lines
+        objectives = [line for line in cleaned_lines if len(line) > 10 and not line.startswith('[') and not line.startswith(']')]
+        
+        return objectives[:num_objectives]
 
-def generate_quiz_questions(topic: str, difficulty: str, num_questions: int = 5) -> List[Dict]:
+def _parse_content_outline(result: str, topic: str) -> Dict:
+    """
+    Parse a generated outline, falling back to a generic one.
+    """
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        # If parsing fails, return a simple outline
+        return {
+            "title": f"Introduction to {topic}",
+            "description": f"A comprehensive guide to understanding {topic}",
+            "sections": [
+                {
+                    "title": f"What is {topic}?",
+                    "subsections": [
+                        "Definition and basic concepts",
+                        "Historical context",
+                        "Importance and applications"
+                    ]
+                },
+                {
+                    "title": "Key Principles",
+                    "subsections": [
+                        "Fundamental principles",
+                        "Core components",
+                        "Best practices"
+                    ]
+                }
+            ]
+        }
+
+def _failed_outline(topic: str) -> Dict:
+    """
+    Build the outline returned when generation fails.
+    """
+    return {
+        "title": f"Introduction to {topic}",
+        "description": "Content generation failed",
+        "sections": []
+    }
+
+async def _stream_generation(
+    prompt_type: str,
+    prompt: PromptTemplate,
+    inputs: Dict[str, Any],
+    parse: Callable[[str], Any],
+    fallback: Any,
+    force_refresh: bool = False,
+    json_output: bool = True,
+    **params: Any
+) -> AsyncIterator[Dict]:
+    """
+    Stream a generation as events.
+    
+    Yields {"event": "token", "text": ...} for each chunk of the completion.
+    For JSON output, {"event": "partial", "data": ...} follows with the
+    value parsed so far whenever an object or array in it is closed, so
+    clients can render complete questions or sections before the rest is
+    written. The last event is {"event": "done", "data": ...} with the same
+    result the non-streaming generator returns.
+    
+    Args:
+        prompt_type: Prompt type used in metrics and the cache
+        prompt: Prompt template
+        inputs: Template inputs
+        parse: Function turning the completion into the result
+        fallback: Result if generation fails
+        force_refresh: Whether to call the model even if a cached result exists
+        json_output: Whether the completion is JSON
+        **params: Generation parameters, e.g. temperature and max_length
+        
+    Yields:
+        Events
+    """
+    chunks = []
+    partial = None
+    try:
+        async for chunk in generation_cache.stream(
+            prompt_type,
+            prompt,
+            inputs,
+            force_refresh=force_refresh,
+            validate=json.loads if json_output else None,
+            **params
+        ):
+            chunks.append(chunk)
+            yield {"event": "token", "text": chunk}
+            
+            # Reparse only at closing brackets, where a new value is complete
+            if json_output and ("}" in chunk or "]" in chunk):
+                parsed = parse_partial_json("".join(chunks).strip())
+                if parsed is not None and parsed != partial:
+                    partial = parsed
+                    yield {"event": "partial", "data": parsed}
+        
+        result = parse("".join(chunks))
+    except Exception as e:
+        logger.error(f"Error streaming {prompt_type}: {str(e)}")
+        result = fallback
+    
+    yield {"event": "done", "data": result}
+
+async def generate_quiz_questions(topic: str, difficulty: str, num_questions: int = 5, force_refresh: bool = False) -> List[Dict]:
     """
     Generate quiz questions for a given topic.
     
@@ -22,117 +271,72 @@ def generate_quiz_questions(topic: str, difficulty: str, num_questions: int = 5)
         topic: The topic to generate questions for
         difficulty: The difficulty level (easy, medium, hard)
         num_questions: Number of questions to generate
+        force_refresh: Whether to call the model even if a cached result exists
         
     Returns:
         A list of question objects
     """
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.7, "max_length": 2000}
-    )
-    
-    parser = JsonOutputParser()
-    
-    prompt = PromptTemplate(
-        input_variables=["topic", "difficulty", "num_questions"],
-        template="""
-        Generate {num_questions} multiple-choice quiz questions about {topic} at a {difficulty} difficulty level.
-        
-        Return the questions in the following JSON format:
-        [
-          {{
-            "text": "Question text",
-            "type": "multiple-choice",
-            "options": [
-              {{ "id": "a", "text": "Option A" }},
-              {{ "id": "b", "text": "Option B" }},
-              {{ "id": "c", "text": "Option C" }},
-              {{ "id": "d", "text": "Option D" }}
-            ],
-            "correct_answer": {{ "id": "correct_option_id" }},
-            "explanation": "Explanation of the correct answer"
-          }}
-        ]
-        
-        Make sure:
-        1. Questions are clear and concise
-        2. All options are plausible
-        3. There is only one correct answer
-        4. The difficulty level is appropriate
-        5. Questions cover different aspects of the topic
-        
-        Respond with ONLY the JSON array, no additional text.
-        """
-    )
-    
     try:
-        result = llm.invoke(
-            prompt.format(
-                topic=topic,
-                difficulty=difficulty,
-                num_questions=num_questions
-            )
+        result = await generation_cache.complete(
+            "quiz_questions",
+            QUIZ_QUESTIONS_PROMPT,
+            {"topic": topic, "difficulty": difficulty, "num_questions": num_questions},
+            force_refresh=force_refresh,
+            validate=json.loads,
+            temperature=0.7,
+            max_length=2000
         )
         
         # Parse the result
-        try:
-            questions = json.loads(result)
-            return questions
-        except json.JSONDecodeError:
-            # If parsing fails, return a simple question
-            return [
-                {
-                    "text": f"What is {topic}?",
-                    "type": "multiple-choice",
-                    "options": [
-                        {"id": "a", "text": "Option A"},
-                        {"id": "b", "text": "Option B"},
-                        {"id": "c", "text": "Option C"},
-                        {"id": "d", "text": "Option D"}
-                    ],
-                    "correct_answer": {"id": "a"},
-                    "explanation": "This is a fallback question."
-                }
-            ]
+        return _parse_quiz_questions(result, topic)
     except Exception as e:
         print(f"Error generating quiz questions: {str(e)}")
         return []
 
-def generate_content_summary(content_text: str, max_length: int = 500) -> str:
+def stream_quiz_questions(topic: str, difficulty: str, num_questions: int = 5, force_refresh: bool = False) -> AsyncIterator[Dict]:
+    """
+    Generate quiz questions for a given topic, streaming events as they are written.
+    
+    Args:
+        topic: The topic to generate questions for
+        difficulty: The difficulty level (easy, medium, hard)
+        num_questions: Number of questions to generate
+        force_refresh: Whether to call the model even if a cached result exists
+        
+    Returns:
+        Events, the last one holding the list of question objects
+    """
+    return _stream_generation(
+        "quiz_questions",
+        QUIZ_QUESTIONS_PROMPT,
+        {"topic": topic, "difficulty": difficulty, "num_questions": num_questions},
+        parse=lambda result: _parse_quiz_questions(result, topic),
+        fallback=[],
+        force_refresh=force_refresh,
+        temperature=0.7,
+        max_length=2000
+    )
+
+async def generate_content_summary(content_text: str, max_length: int = 500, force_refresh: bool = False) -> str:
     """
     Generate a summary of educational content.
     
     Args:
         content_text: The content to summarize
         max_length: Maximum length of the summary in characters
+        force_refresh: Whether to call the model even if a cached result exists
         
     Returns:
         A summary of the content
     """
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.3, "max_length": max_length}
-    )
-    
-    prompt = PromptTemplate(
-        input_variables=["content", "max_length"],
-        template="""
-        Summarize the following educational content in a clear and concise way.
-        Keep the summary under {max_length} characters.
-        
-        Content:
-        {content}
-        
-        Summary:
-        """
-    )
-    
     try:
-        result = llm.invoke(
-            prompt.format(
-                content=content_text,
-                max_length=max_length
-            )
+        result = await generation_cache.complete(
+            "content_summary",
+            CONTENT_SUMMARY_PROMPT,
+            {"content": content_text, "max_length": max_length},
+            force_refresh=force_refresh,
+            temperature=0.3,
+            max_length=max_length
         )
         
         return result.strip()
@@ -140,7 +344,31 @@ def generate_content_summary(content_text: str, max_length: int = 500) -> str:
         print(f"Error generating content summary: {str(e)}")
         return "Summary generation failed."
 
-def generate_learning_objectives(topic: str, difficulty: str, num_objectives: int = 5) -> List[str]:
+def stream_content_summary(content_text: str, max_length: int = 500, force_refresh: bool = False) -> AsyncIterator[Dict]:
+    """
+    Generate a summary of educational content, streaming events as it is written.
+    
+    Args:
+        content_text: The content to summarize
+        max_length: Maximum length of the summary in characters
+        force_refresh: Whether to call the model even if a cached result exists
+        
+    Returns:
+        Events, the last one holding the summary
+    """
+    return _stream_generation(
+        "content_summary",
+        CONTENT_SUMMARY_PROMPT,
+        {"content": content_text, "max_length": max_length},
+        parse=str.strip,
+        fallback="Summary generation failed.",
+        force_refresh=force_refresh,
+        json_output=False,
+        temperature=0.3,
+        max_length=max_length
+    )
+
+async def generate_learning_objectives(topic: str, difficulty: str, num_objectives: int = 5, force_refresh: bool = False) -> List[str]:
     """
     Generate learning objectives for a given topic.
     
@@ -148,156 +376,100 @@ def generate_learning_objectives(topic: str, difficulty: str, num_objectives: in
         topic: The topic to generate objectives for
         difficulty: The difficulty level (beginner, intermediate, advanced)
         num_objectives: Number of objectives to generate
+        force_refresh: Whether to call the model even if a cached result exists
         
     Returns:
         A list of learning objectives
     """
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.5, "max_length": 1000}
-    )
-    
-    prompt = PromptTemplate(
-        input_variables=["topic", "difficulty", "num_objectives"],
-        template="""
-        Generate {num_objectives} learning objectives for a {difficulty} level course on {topic}.
-        
-        Each learning objective should:
-        1. Start with an action verb (e.g., "Explain", "Analyze", "Create")
-        2. Be specific and measurable
-        3. Focus on what the learner will be able to do
-        4. Be appropriate for the {difficulty} level
-        
-        Format the response as a JSON array of strings:
-        ["Objective 1", "Objective 2", ...]
-        
-        Respond with ONLY the JSON array, no additional text.
-        """
-    )
-    
     try:
-        result = llm.invoke(
-            prompt.format(
-                topic=topic,
-                difficulty=difficulty,
-                num_objectives=num_objectives
-            )
+        result = await generation_cache.complete(
+            "learning_objectives",
+            LEARNING_OBJECTIVES_PROMPT,
+            {"topic": topic, "difficulty": difficulty, "num_objectives": num_objectives},
+            force_refresh=force_refresh,
+            validate=json.loads,
+            temperature=0.5,
+            max_length=1000
         )
         
         # Parse the result
-        try:
-            objectives = json.loads(result)
-            return objectives
-        except json.JSONDecodeError:
-            # If parsing fails, extract objectives line by line
-            lines = result.strip().split('\n')
-            cleaned_lines = [line.strip().strip('"').strip("'") for line in lines if line.strip()]
-            
-            # Remove any JSON syntax artifacts
-            cleaned_lines = [line.strip('[').strip(']').strip(',').strip('"').strip("'") for line in cleaned_lines]
-            
-            # Filter out empty lines and non-objective lines
-            objectives = [line for line in cleaned_lines if len(line) > 10 and not line.startswith('[') and not line.startswith(']')]
-            
-            return objectives[:num_objectives]
+        return _parse_learning_objectives(result, num_objectives)
     except Exception as e:
         print(f"Error generating learning objectives: {str(e)}")
         return [f"Understand the basics of {topic}"]
 
-def generate_content_outline(topic: str, num_sections: int = 5) -> Dict:
+def stream_learning_objectives(topic: str, difficulty: str, num_objectives: int = 5, force_refresh: bool = False) -> AsyncIterator[Dict]:
+    """
+    Generate learning objectives for a given topic, streaming events as they are written.
+    
+    Args:
+        topic: The topic to generate objectives for
+        difficulty: The difficulty level (beginner, intermediate, advanced)
+        num_objectives: Number of objectives to generate
+        force_refresh: Whether to call the model even if a cached result exists
+        
+    Returns:
+        Events, the last one holding the list of learning objectives
+    """
+    return _stream_generation(
+        "learning_objectives",
+        LEARNING_OBJECTIVES_PROMPT,
+        {"topic": topic, "difficulty": difficulty, "num_objectives": num_objectives},
+        parse=lambda result: _parse_learning_objectives(result, num_objectives),
+        fallback=[f"Understand the basics of {topic}"],
+        force_refresh=force_refresh,
+        temperature=0.5,
+        max_length=1000
+    )
+
+async def generate_content_outline(topic: str, num_sections: int = 5, force_refresh: bool = False) -> Dict:
     """
     Generate an outline for educational content.
     
     Args:
         topic: The topic to generate an outline for
         num_sections: Number of main sections to include
+        force_refresh: Whether to call the model even if a cached result exists
         
     Returns:
         A content outline with sections and subsections
     """
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.6, "max_length": 2000}
-    )
-    
-    prompt = PromptTemplate(
-        input_variables=["topic", "num_sections"],
-        template="""
-        Create a detailed outline for educational content about {topic} with {num_sections} main sections.
-        
-        Return the outline in the following JSON format:
-        {{
-          "title": "Main title for the content",
-          "description": "Brief description of the content",
-          "sections": [
-            {{
-              "title": "Section 1 Title",
-              "subsections": [
-                "Subsection 1.1",
-                "Subsection 1.2",
-                "Subsection 1.3"
-              ]
-            }},
-            {{
-              "title": "Section 2 Title",
-              "subsections": [
-                "Subsection 2.1",
-                "Subsection 2.2"
-              ]
-            }}
-          ]
-        }}
-        
-        Make sure:
-        1. The content follows a logical progression
-        2. Each section builds on previous sections
-        3. The outline covers the topic comprehensively
-        4. Subsections provide more detailed breakdown of each section
-        
-        Respond with ONLY the JSON object, no additional text.
-        """
-    )
-    
     try:
-        result = llm.invoke(
-            prompt.format(
-                topic=topic,
-                num_sections=num_sections
-            )
+        result = await generation_cache.complete(
+            "content_outline",
+            CONTENT_OUTLINE_PROMPT,
+            {"topic": topic, "num_sections": num_sections},
+            force_refresh=force_refresh,
+            validate=json.loads,
+            temperature=0.6,
+            max_length=2000
         )
         
         # Parse the result
-        try:
-            outline = json.loads(result)
-            return outline
-        except json.JSONDecodeError:
-            # If parsing fails, return a simple outline
-            return {
-                "title": f"Introduction to {topic}",
-                "description": f"A comprehensive guide to understanding {topic}",
-                "sections": [
-                    {
-                        "title": f"What is {topic}?",
-                        "subsections": [
-                            "Definition and basic concepts",
-                            "Historical context",
-                            "Importance and applications"
-                        ]
-                    },
-                    {
-                        "title": "Key Principles",
-                        "subsections": [
-                            "Fundamental principles",
-                            "Core components",
-                            "Best practices"
-                        ]
-                    }
-                ]
-            }
+        return _parse_content_outline(result, topic)
     except Exception as e:
         print(f"Error generating content outline: {str(e)}")
-        return {
-            "title": f"Introduction to {topic}",
-            "description": "Content generation failed",
-            "sections": []
-        }
+        return _failed_outline(topic)
+
+def stream_content_outline(topic: str, num_sections: int = 5, force_refresh: bool = False) -> AsyncIterator[Dict]:
+    """
+    Generate an outline for educational content, streaming events as it is written.
+    
+    Args:
+        topic: The topic to generate an outline for
+        num_sections: Number of main sections to include
+        force_refresh: Whether to call the model even if a cached result exists
+        
+    Returns:
+        Events, the last one holding the content outline
+    """
+    return _stream_generation(
+        "content_outline",
+        CONTENT_OUTLINE_PROMPT,
+        {"topic": topic, "num_sections": num_sections},
+        parse=lambda result: _parse_content_outline(result, topic),
+        fallback=_failed_outline(topic),
+        force_refresh=force_refresh,
+        temperature=0.6,
+        max_length=2000
+    )
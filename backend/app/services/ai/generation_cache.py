@@ -0,0 +1,326 @@
+"""
+Content-addressed cache of language model completions.
+
+A completion is identified by the backend, model, a hash of the prompt
+template, the rendered prompt and the generation parameters, so identical
+requests reuse the same completion and any change to the prompt or the
+model yields a new key. Completions live in Redis and, when
+GENERATION_CACHE_DIR is set, in a size-bounded directory that survives
+Redis evictions and restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from langchain.prompts import PromptTemplate
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import GENERATION_CACHE_REQUESTS
+from app.services.ai.llm_registry import llm_registry
+from app.services.cache_service import async_cache
+
+# Prefix of the Redis keys holding completions
+KEY_PREFIX = "generation:"
+
+class DiskCache:
+    """
+    Directory of cached completions bounded in total size.
+
+    Files are named by key. Reads refresh a file's modification time, and
+    the least recently used files are removed once the directory grows past
+    max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the disk cache.
+
+        Args:
+            directory: Directory holding the entries
+            max_bytes: Maximum total size of the entries
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str, ttl: int) -> Optional[str]:
+        """
+        Get a cached completion.
+
+        Args:
+            key: Entry key
+            ttl: Maximum age of the entry in seconds
+
+        Returns:
+            Completion, or None if missing or expired
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created"] > ttl:
+                return None
+            os.utime(path)
+            return entry["text"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading generation cache file {path}: {str(e)}")
+            return None
+
+    def set(self, key: str, text: str) -> bool:
+        """
+        Store a completion, evicting old entries if the cache is full.
+
+        Args:
+            key: Entry key
+            text: Completion
+
+        Returns:
+            True if successful, False otherwise
+        """
+        path = self._path(key)
+        data = json.dumps({"created": time.time(), "text": text}).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing generation cache file {path}: {str(e)}")
+            return False
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._prune()
+        return True
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        """
+        List the entries, least recently used first, with their total size.
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries, sum(size for _, size, _ in entries)
+
+    def _prune(self) -> None:
+        """
+        Remove the least recently used entries until the cache is at 90% of its size limit.
+        """
+        # Rescan, as other processes may share the directory
+        entries, size = self._scan()
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except FileNotFoundError:
+                continue
+        self._size = size
+
+def generation_key(prompt: PromptTemplate, rendered: str, model: str, params: Dict[str, Any]) -> str:
+    """
+    Build the content address of a completion.
+
+    Args:
+        prompt: Prompt template
+        rendered: Rendered prompt
+        model: Model name
+        params: Generation parameters
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    template_hash = hashlib.sha256(prompt.template.encode("utf-8")).hexdigest()
+    identity = json.dumps(
+        [llm_registry.backend, model, template_hash, rendered, sorted(params.items())],
+        default=str
+    )
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+class GenerationCache:
+    """
+    Two-tier cache of language model completions.
+    """
+
+    def __init__(self, ttl: int = 604800, directory: str = "", max_disk_bytes: int = 268435456):
+        """
+        Initialize the generation cache.
+
+        Args:
+            ttl: Seconds a completion is reused (default: 1 week)
+            directory: Disk tier directory (default: no disk tier)
+            max_disk_bytes: Maximum total size of the disk tier
+        """
+        self.ttl = ttl
+        self.disk = DiskCache(directory, max_disk_bytes) if directory else None
+
+    async def get(self, key: str) -> Tuple[Optional[str], str]:
+        """
+        Get a completion from Redis, falling back to the disk tier.
+
+        Args:
+            key: Content address
+
+        Returns:
+            (completion or None, tier it was found in: "redis", "disk" or "miss")
+        """
+        text = await async_cache.get(KEY_PREFIX + key)
+        if isinstance(text, str):
+            return text, "redis"
+
+        if self.disk is not None:
+            text = await asyncio.to_thread(self.disk.get, key, self.ttl)
+            if text is not None:
+                await async_cache.set(KEY_PREFIX + key, text, expire=self.ttl)
+                return text, "disk"
+        return None, "miss"
+
+    async def set(self, key: str, text: str) -> None:
+        """
+        Store a completion in both tiers.
+
+        Args:
+            key: Content address
+            text: Completion
+        """
+        await async_cache.set(KEY_PREFIX + key, text, expire=self.ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, text)
+
+    async def _lookup(self, prompt_type: str, key: str, force_refresh: bool) -> Optional[str]:
+        """
+        Get a cached completion unless a refresh is forced, counting the outcome.
+        """
+        if force_refresh:
+            GENERATION_CACHE_REQUESTS.labels(prompt_type=prompt_type, result="refresh").inc()
+            return None
+        text, tier = await self.get(key)
+        GENERATION_CACHE_REQUESTS.labels(prompt_type=prompt_type, result=tier).inc()
+        return text
+
+    async def _store(self, key: str, text: str, validate: Optional[Callable[[str], Any]]) -> None:
+        """
+        Cache a fresh completion if it passes validation.
+        """
+        if validate is not None:
+            try:
+                validate(text)
+            except Exception:
+                # Unusable completions go to the caller's fallback handling but are never reused
+                return
+        await self.set(key, text)
+
+    async def complete(
+        self,
+        prompt_type: str,
+        prompt: PromptTemplate,
+        inputs: Dict[str, Any],
+        force_refresh: bool = False,
+        validate: Optional[Callable[[str], Any]] = None,
+        model: Optional[str] = None,
+        **params: Any
+    ) -> str:
+        """
+        Get the completion of a prompt, calling the model only if it is not cached.
+
+        Args:
+            prompt_type: Prompt type used in metrics
+            prompt: Prompt template
+            inputs: Template inputs
+            force_refresh: Whether to call the model even if a completion is cached
+            validate: Function that raises for completions that must not be cached (optional)
+            model: Model name (default: AI_MODEL_NAME)
+            **params: Generation parameters, e.g. temperature and max_length
+
+        Returns:
+            Completion
+        """
+        model = model or settings.AI_MODEL_NAME
+        rendered = prompt.format(**inputs)
+        key = generation_key(prompt, rendered, model, params)
+
+        text = await self._lookup(prompt_type, key, force_refresh)
+        if text is not None:
+            return text
+
+        text = await llm_registry.ainvoke(rendered, prompt_type, model, **params)
+        await self._store(key, text, validate)
+        return text
+
+    async def stream(
+        self,
+        prompt_type: str,
+        prompt: PromptTemplate,
+        inputs: Dict[str, Any],
+        force_refresh: bool = False,
+        validate: Optional[Callable[[str], Any]] = None,
+        model: Optional[str] = None,
+        **params: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream the completion of a prompt, calling the model only if it is not cached.
+
+        Cached completions are yielded as a single chunk. A streamed completion
+        is cached once the model has finished, so streams closed early are not.
+
+        Args:
+            prompt_type: Prompt type used in metrics
+            prompt: Prompt template
+            inputs: Template inputs
+            force_refresh: Whether to call the model even if a completion is cached
+            validate: Function that raises for completions that must not be cached (optional)
+            model: Model name (default: AI_MODEL_NAME)
+            **params: Generation parameters, e.g. temperature and max_length
+
+        Yields:
+            Completion chunks
+        """
+        model = model or settings.AI_MODEL_NAME
+        rendered = prompt.format(**inputs)
+        key = generation_key(prompt, rendered, model, params)
+
+        text = await self._lookup(prompt_type, key, force_refresh)
+        if text is not None:
+            yield text
+            return
+
+        chunks = []
+        async for chunk in llm_registry.astream(rendered, prompt_type, model, **params):
+            chunks.append(chunk)
+            yield chunk
+        await self._store(key, "".join(chunks), validate)
+
+# Create generation cache instance
+generation_cache = GenerationCache(
+    ttl=settings.GENERATION_CACHE_TTL,
+    directory=settings.GENERATION_CACHE_DIR,
+    max_disk_bytes=settings.GENERATION_CACHE_DISK_MAX_BYTES
+)
@@ -8,13 +8,12 @@ from datetime import datetime
 from uuid import UUID, uuid4
 
 from langchain.prompts import PromptTemplate
-from langchain_community.llms import HuggingFaceHub
 from langchain.schema import Document
 from langchain_core.output_parsers import JsonOutputParser
 from langgraph.graph import StateGraph, END
 
-from app.core.config import settings
 from app.services.db import get_supabase_client
+from app.services.ai.llm_registry import llm_registry
 
 # Define state types
 class UserData(TypedDict):
@@ -117,7 +116,7 @@ def fetch_content_data(state: RecommendationState) -> RecommendationState:
         state["errors"].append(f"Error fetching content data: {str(e)}")
         return state
 
-def analyze_learning_patterns(state: RecommendationState) -> RecommendationState:
+async def analyze_learning_patterns(state: RecommendationState) -> RecommendationState:
     """
     Analyze user's learning patterns using LLM.
     """
@@ -127,11 +126,6 @@ def analyze_learning_patterns(state: RecommendationState) -> RecommendationState
             return state
 
         # Use LLM to analyze learning patterns
-        llm = HuggingFaceHub(
-            repo_id=settings.AI_MODEL_NAME,
-            model_kwargs={"temperature": 0.7, "max_length": 500}
-        )
-
         prompt = PromptTemplate(
             input_variables=["learning_preferences", "quiz_results", "content_interactions"],
             template="""
@@ -157,12 +151,15 @@ def analyze_learning_patterns(state: RecommendationState) -> RecommendationState
             """
         )
 
-        result = llm.invoke(
+        result = await llm_registry.ainvoke(
             prompt.format(
                 learning_preferences=json.dumps(state["user_data"]["learning_preferences"]),
                 quiz_results=json.dumps(state["user_data"]["quiz_results"][:5] if state["user_data"]["quiz_results"] else []),
                 content_interactions=json.dumps(state["user_data"]["content_interactions"][:5] if state["user_data"]["content_interactions"] else [])
-            )
+            ),
+            "learning_patterns",
+            temperature=0.7,
+            max_length=500
         )
 
         # Parse the result
@@ -189,7 +186,7 @@ def analyze_learning_patterns(state: RecommendationState) -> RecommendationState
         state["errors"].append(f"Error analyzing learning patterns: {str(e)}")
         return state
 
-def generate_recommendations(state: RecommendationState) -> RecommendationState:
+async def generate_recommendations(state: RecommendationState) -> RecommendationState:
     """
     Generate personalized content recommendations.
     """
@@ -212,11 +209,6 @@ def generate_recommendations(state: RecommendationState) -> RecommendationState:
             return state
 
         # Use LLM to generate recommendations
-        llm = HuggingFaceHub(
-            repo_id=settings.AI_MODEL_NAME,
-            model_kwargs={"temperature": 0.7, "max_length": 1000}
-        )
-
         parser = JsonOutputParser()
 
         prompt = PromptTemplate(
@@ -246,12 +238,15 @@ def generate_recommendations(state: RecommendationState) -> RecommendationState:
             """
         )
 
-        result = llm.invoke(
+        result = await llm_registry.ainvoke(
             prompt.format(
                 analysis=json.dumps(state["analysis"]),
                 available_content=json.dumps(available_content[:10]),  # Limit to 10 items for context length
                 course_structure=json.dumps(state["content_data"]["course_structure"])
-            )
+            ),
+            "recommendations",
+            temperature=0.7,
+            max_length=1000
         )
 
         # Parse the result
@@ -369,9 +364,12 @@ def create_recommendation_workflow():
     return workflow.compile()
 
 # Function to run the workflow
-def run_recommendation_workflow(user_id: str) -> List[Dict]:
+async def run_recommendation_workflow(user_id: str) -> List[Dict]:
     """
     Run the recommendation workflow for a specific user.
+
+    The LLM nodes are awaited on the event loop, while LangGraph runs the
+    synchronous Supabase nodes in its executor.
     """
     # Initialize state
     initial_state: RecommendationState = {
@@ -384,7 +382,7 @@ def run_recommendation_workflow(user_id: str) -> List[Dict]:
 
     # Create and run the workflow
     workflow = create_recommendation_workflow()
-    final_state = workflow.invoke(initial_state)
+    final_state = await workflow.ainvoke(initial_state)
 
     # Return recommendations or empty list if there were errors
     if final_state["errors"]:
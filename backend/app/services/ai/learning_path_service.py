@@ -1,20 +1,20 @@
-from typing import Dict, List
+import asyncio
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from langchain.chains import LLMChain
-from langchain_community.llms import HuggingFaceHub
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 import json
 
-from app.core.config import settings
 from app.services.db import get_supabase_client
 from app.services.content.course_service import get_course
 from app.services.content.module_service import get_modules_by_course
+from app.services.ai.llm_registry import llm_registry
 
-def generate_learning_path(user_id: UUID, course_id: str) -> Dict:
+def _load_learning_path_data(user_id: UUID, course_id: str) -> Optional[Dict]:
     """
-    Generate a personalized learning path for a user in a specific course.
+    Load everything the learning path prompt is built from, or None if the course does not exist.
     """
     supabase = get_supabase_client()
     
@@ -28,7 +28,7 @@ def generate_learning_path(user_id: UUID, course_id: str) -> Dict:
     # Get course details
     course = get_course(course_id=course_id)
     if not course:
-        return {"error": "Course not found"}
+        return None
     
     # Get modules for this course
     modules = get_modules_by_course(course_id=course_id)
@@ -43,12 +43,27 @@ def generate_learning_path(user_id: UUID, course_id: str) -> Dict:
     # Get quiz results for this user
     quiz_results = supabase.table("quiz_submissions").select("*").eq("user_id", str(user_id)).execute()
     
-    # Use LLM to generate a personalized learning path
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.7, "max_length": 1000}
-    )
+    return {
+        "learning_preferences": learning_preferences,
+        "progress_data": progress_data.data,
+        "course": course,
+        "modules": modules,
+        "module_content": module_content,
+        "quiz_results": quiz_results.data
+    }
+
+async def generate_learning_path(user_id: UUID, course_id: str) -> Dict:
+    """
+    Generate a personalized learning path for a user in a specific course.
+    """
+    # The Supabase reads are synchronous, so run them off the event loop
+    data = await asyncio.to_thread(_load_learning_path_data, user_id, course_id)
+    if data is None:
+        return {"error": "Course not found"}
+    modules = data["modules"]
+    module_content = data["module_content"]
     
+    # Use LLM to generate a personalized learning path
     parser = JsonOutputParser()
     
     prompt = PromptTemplate(
@@ -100,15 +115,18 @@ def generate_learning_path(user_id: UUID, course_id: str) -> Dict:
     )
     
     try:
-        result = llm.invoke(
+        result = await llm_registry.ainvoke(
             prompt.format(
-                learning_preferences=json.dumps(learning_preferences),
-                progress_data=json.dumps(progress_data.data[:10] if progress_data.data else []),
-                course=json.dumps(course.dict()),
+                learning_preferences=json.dumps(data["learning_preferences"]),
+                progress_data=json.dumps(data["progress_data"][:10] if data["progress_data"] else []),
+                course=json.dumps(data["course"].dict()),
                 modules=json.dumps([m.dict() for m in modules]),
                 module_content=json.dumps({k: v[:5] for k, v in module_content.items()}),  # Limit content items for context length
-                quiz_results=json.dumps(quiz_results.data[:10] if quiz_results.data else [])
-            )
+                quiz_results=json.dumps(data["quiz_results"][:10] if data["quiz_results"] else [])
+            ),
+            "learning_path",
+            temperature=0.7,
+            max_length=1000
         )
         
         # Parse the result
@@ -1,17 +1,16 @@
-from typing import Dict
+import asyncio
+from typing import Dict, List, Tuple
 from uuid import UUID
 
-from langchain.chains import LLMChain
-from langchain_community.llms import HuggingFaceHub
 from langchain.prompts import PromptTemplate
 
-from app.core.config import settings
+from app.services.auth.auth_service import invalidate_principal
 from app.services.db import get_supabase_client
+from app.services.ai.llm_registry import llm_registry
 
-def analyze_learning_style(user_id: UUID) -> Dict:
+def _load_activity(user_id: UUID) -> Tuple[List[Dict], List[Dict], List[Dict]]:
     """
-    Analyze a user's learning style based on their activity.
-    This uses LangChain to generate a learning style profile.
+    Load the quiz submissions, progress and content items the analysis is based on.
     """
     supabase = get_supabase_client()
     
@@ -29,12 +28,25 @@ def analyze_learning_style(user_id: UUID) -> Dict:
         if content.data:
             content_items.append(content.data[0])
     
-    # Use LangChain to analyze learning style
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.7, "max_length": 500}
-    )
+    return quiz_submissions.data, progress_data.data, content_items
+
+def _save_learning_style(user_id: UUID, learning_style: Dict) -> None:
+    """
+    Store a learning style profile in the user's learning preferences.
+    """
+    supabase = get_supabase_client()
+    supabase.table("users").update({"learning_preferences": learning_style}).eq("user_id", str(user_id)).execute()
+    invalidate_principal(user_id)
+
+async def analyze_learning_style(user_id: UUID) -> Dict:
+    """
+    Analyze a user's learning style based on their activity.
+    This uses LangChain to generate a learning style profile.
+    """
+    # The Supabase reads and writes are synchronous, so run them off the event loop
+    quiz_submissions, progress_data, content_items = await asyncio.to_thread(_load_activity, user_id)
     
+    # Use LangChain to analyze learning style
     prompt = PromptTemplate(
         input_variables=["quiz_submissions", "progress_data", "content_items"],
         template="""
@@ -66,13 +78,16 @@ def analyze_learning_style(user_id: UUID) -> Dict:
         """
     )
     
-    chain = LLMChain(llm=llm, prompt=prompt)
-    
     # This is a simplified example - in a real application, you would process the data more thoroughly
-    result = chain.run(
-        quiz_submissions=quiz_submissions.data[:5] if quiz_submissions.data else [],
-        progress_data=progress_data.data[:5] if progress_data.data else [],
-        content_items=content_items[:5] if content_items else []
+    result = await llm_registry.ainvoke(
+        prompt.format(
+            quiz_submissions=quiz_submissions[:5] if quiz_submissions else [],
+            progress_data=progress_data[:5] if progress_data else [],
+            content_items=content_items[:5] if content_items else []
+        ),
+        "learning_style",
+        temperature=0.7,
+        max_length=500
     )
     
     # Parse the result and update the user's learning preferences
@@ -93,6 +108,6 @@ def analyze_learning_style(user_id: UUID) -> Dict:
     }
     
     # Update the user's learning preferences in the database
-    supabase.table("users").update({"learning_preferences": learning_style}).eq("user_id", str(user_id)).execute()
+    await asyncio.to_thread(_save_learning_style, user_id, learning_style)
     
     return learning_style
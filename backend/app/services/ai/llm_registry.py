@@ -0,0 +1,317 @@
+"""
+Shared language model clients.
+
+Building a HuggingFaceHub client validates credentials and opens a new
+inference session, so services get their clients from one process-wide
+registry keyed by backend, model and generation parameters instead of
+constructing one per call. Calls go through ainvoke() or astream(), which
+bound the calls in flight per model and in total and give each call a
+deadline, so a slow model cannot tie up the event loop or every worker. Clients
+without an async implementation run on the registry's own threads and keep
+their slots until the thread returns, so calls that timed out cannot pile up
+in the default executor. The registry can also serve an offline stand-in
+backend for tests and air-gapped deployments.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from langchain_community.llms import HuggingFaceHub
+from langchain_core.language_models.fake import FakeStreamingListLLM
+from langchain_core.language_models.llms import LLM
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import LLM_REQUEST_DURATION, LLM_REQUESTS_TOTAL, observe_dependency
+
+# Builds a client from a model name and generation parameters
+BackendFactory = Callable[[str, Dict[str, Any]], Any]
+
+def _huggingface(model: str, params: Dict[str, Any]) -> Any:
+    return HuggingFaceHub(repo_id=model, model_kwargs=params)
+
+def _offline(model: str, params: Dict[str, Any]) -> Any:
+    return FakeStreamingListLLM(responses=[settings.AI_OFFLINE_RESPONSE])
+
+def _runs_in_thread(llm: Any) -> bool:
+    """
+    Whether a client only implements blocking calls, which LangChain's
+    ainvoke() and astream() would run in the default executor.
+    """
+    return isinstance(llm, LLM) and all(
+        getattr(type(llm), method) is getattr(LLM, method)
+        for method in ("_acall", "_stream", "_astream", "astream")
+    )
+
+def parse_model_limits(spec: str) -> Dict[str, int]:
+    """
+    Parse a "model=calls,..." specification.
+
+    Args:
+        spec: Comma-separated concurrency limits, e.g. "google/flan-t5-base=2"
+
+    Returns:
+        Mapping of model name to maximum concurrent calls
+    """
+    limits = {}
+    for item in spec.split(","):
+        model, _, calls = item.rpartition("=")
+        if model.strip() and calls.strip():
+            limits[model.strip()] = int(calls)
+    return limits
+
+class LLMRegistry:
+    """
+    Process-wide cache of language model clients with concurrency limits.
+    """
+
+    def __init__(
+        self,
+        backend: str = "huggingface",
+        max_concurrency: int = 4,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        total_concurrency: int = 8,
+        timeout: float = 30,
+        max_clients: int = 32
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            backend: Name of the backend building clients
+            max_concurrency: Default maximum concurrent calls per model
+            model_concurrency: Maximum concurrent calls of specific models (optional)
+            total_concurrency: Maximum concurrent calls across all models
+            timeout: Default seconds a call may take, including the wait for a slot
+            max_clients: Maximum number of clients kept, least recently used evicted first
+        """
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency or {}
+        self.total_concurrency = total_concurrency
+        self.timeout = timeout
+        self.max_clients = max_clients
+        self._backends: Dict[str, BackendFactory] = {"huggingface": _huggingface, "offline": _offline}
+        self._clients: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._semaphores: Dict[Tuple[int, Optional[str]], asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, total_concurrency), thread_name_prefix="llm")
+
+    def register_backend(self, name: str, factory: BackendFactory) -> None:
+        """
+        Register a backend.
+
+        Args:
+            name: Backend name, as used in AI_BACKEND
+            factory: Function building a client from a model name and generation parameters
+        """
+        with self._lock:
+            self._backends[name] = factory
+            self._clients.clear()
+
+    def use_backend(self, name: str) -> None:
+        """
+        Switch every later get() to another registered backend.
+
+        Args:
+            name: Backend name
+        """
+        if name not in self._backends:
+            raise ValueError(f"Unknown LLM backend: {name}")
+        with self._lock:
+            self.backend = name
+            self._clients.clear()
+
+    def get(self, model: Optional[str] = None, **params: Any) -> Any:
+        """
+        Get the shared client for a model and generation parameters.
+
+        Args:
+            model: Model name (default: AI_MODEL_NAME)
+            **params: Generation parameters, e.g. temperature and max_length
+
+        Returns:
+            LangChain LLM
+        """
+        model = model or settings.AI_MODEL_NAME
+        key = (self.backend, model, tuple(sorted(params.items())))
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+
+            factory = self._backends.get(self.backend)
+            if factory is None:
+                raise ValueError(f"Unknown LLM backend: {self.backend}")
+            client = factory(model, dict(params))
+            logger.info(f"Created {self.backend} LLM client for {model} with {params}")
+
+            self._clients[key] = client
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return client
+
+    def semaphore(self, model: Optional[str] = None) -> asyncio.Semaphore:
+        """
+        Get the semaphore bounding concurrent calls to a model on the running event loop.
+
+        Args:
+            model: Model name, or None for the limit across all models
+
+        Returns:
+            Semaphore shared by every caller on the loop
+        """
+        key = (id(asyncio.get_running_loop()), model)
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                limit = self.total_concurrency if model is None else self.model_concurrency.get(model, self.max_concurrency)
+                semaphore = self._semaphores[key] = asyncio.Semaphore(max(1, limit))
+            return semaphore
+
+    async def ainvoke(
+        self,
+        prompt: str,
+        prompt_type: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> str:
+        """
+        Call a model without blocking the event loop.
+
+        The call waits for a free slot of the model and of the process, and
+        is cancelled with asyncio.TimeoutError if it has not completed within
+        the timeout, waiting included. Blocking clients cannot be cancelled:
+        the caller gets the timeout, but the slots stay taken until the
+        thread running the call returns.
+
+        Args:
+            prompt: Rendered prompt
+            prompt_type: Prompt type used in metrics
+            model: Model name (default: AI_MODEL_NAME)
+            timeout: Seconds the call may take (default: the registry timeout)
+            **params: Generation parameters, e.g. temperature and max_length
+
+        Returns:
+            Completion
+        """
+        model = model or settings.AI_MODEL_NAME
+        llm = self.get(model, **params)
+
+        async def call() -> str:
+            async with self.semaphore(), self.semaphore(model):
+                with observe_dependency(LLM_REQUEST_DURATION, LLM_REQUESTS_TOTAL, prompt_type=prompt_type):
+                    return await llm.ainvoke(prompt)
+
+        try:
+            if _runs_in_thread(llm):
+                return await self._invoke_in_thread(llm, prompt, prompt_type, model, timeout or self.timeout)
+            return await asyncio.wait_for(call(), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LLM call {prompt_type} to {model} timed out")
+            raise
+
+    async def _invoke_in_thread(self, llm: Any, prompt: str, prompt_type: str, model: str, timeout: float) -> str:
+        """
+        Call a blocking client on the registry's threads, keeping its slots until the thread returns.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        held = []
+
+        def release(future: Optional[asyncio.Future] = None) -> None:
+            # Retrieve the result of calls nobody waits for anymore
+            if future is not None and not future.cancelled():
+                future.exception()
+            for semaphore in held:
+                semaphore.release()
+
+        try:
+            for semaphore in (self.semaphore(), self.semaphore(model)):
+                await asyncio.wait_for(semaphore.acquire(), deadline - loop.time())
+                held.append(semaphore)
+        except BaseException:
+            release()
+            raise
+
+        future = loop.run_in_executor(self._executor, llm.invoke, prompt)
+        future.add_done_callback(release)
+        with observe_dependency(LLM_REQUEST_DURATION, LLM_REQUESTS_TOTAL, prompt_type=prompt_type):
+            return await asyncio.wait_for(asyncio.shield(future), deadline - loop.time())
+
+    async def astream(
+        self,
+        prompt: str,
+        prompt_type: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> AsyncIterator[str]:
+        """
+        Call a model, yielding its completion in chunks as they are produced.
+
+        The stream holds the same slots as ainvoke() until it is exhausted or
+        closed. The timeout bounds the wait for each slot and for each chunk.
+        Clients that cannot stream yield the completion as a single chunk.
+
+        Args:
+            prompt: Rendered prompt
+            prompt_type: Prompt type used in metrics
+            model: Model name (default: AI_MODEL_NAME)
+            timeout: Seconds to wait for a slot or the next chunk (default: the registry timeout)
+            **params: Generation parameters, e.g. temperature and max_length
+
+        Yields:
+            Completion chunks
+        """
+        model = model or settings.AI_MODEL_NAME
+        timeout = timeout or self.timeout
+        llm = self.get(model, **params)
+
+        if _runs_in_thread(llm):
+            yield await self.ainvoke(prompt, prompt_type, model, timeout, **params)
+            return
+
+        async with AsyncExitStack() as stack:
+            try:
+                for semaphore in (self.semaphore(), self.semaphore(model)):
+                    await asyncio.wait_for(semaphore.acquire(), timeout)
+                    stack.callback(semaphore.release)
+                stack.enter_context(
+                    observe_dependency(LLM_REQUEST_DURATION, LLM_REQUESTS_TOTAL, prompt_type=prompt_type)
+                )
+
+                chunks = llm.astream(prompt)
+                stack.push_async_callback(chunks.aclose)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    yield chunk
+            except asyncio.TimeoutError:
+                logger.error(f"LLM stream {prompt_type} from {model} timed out")
+                raise
+
+    def clear(self) -> None:
+        """
+        Drop every cached client.
+        """
+        with self._lock:
+            self._clients.clear()
+
+# Create LLM registry instance
+llm_registry = LLMRegistry(
+    backend=settings.AI_BACKEND,
+    max_concurrency=settings.AI_MAX_CONCURRENCY,
+    model_concurrency=parse_model_limits(settings.AI_MODEL_CONCURRENCY),
+    total_concurrency=settings.AI_TOTAL_CONCURRENCY,
+    timeout=settings.AI_REQUEST_TIMEOUT
+)
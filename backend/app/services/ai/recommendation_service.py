@@ -1,23 +1,20 @@
+import asyncio
 from typing import List, Dict
 from uuid import UUID
 
 from langchain.chains import LLMChain
-from langchain_community.llms import HuggingFaceHub
 from langchain.prompts import PromptTemplate
 
-from app.core.config import settings
 from app.schemas.recommendation import Recommendation
 from app.services.db import get_supabase_client
 from app.services.ai.langgraph_workflow import run_recommendation_workflow
+from app.services.ai.llm_registry import llm_registry
 
-def get_recommendations_for_user(user_id: UUID) -> List[Recommendation]:
+def _load_recommendations(user_id: UUID) -> List[Recommendation]:
     """
-    Get personalized content recommendations for a user.
-    This uses LangChain and LangGraph to generate recommendations based on user's learning history.
+    Load the stored recommendations of a user.
     """
     supabase = get_supabase_client()
-
-    # First, check if we have cached recommendations
     response = supabase.table("ai_recommendations").select("*").eq("user_id", str(user_id)).execute()
 
     recommendations = []
@@ -33,6 +30,16 @@ def get_recommendations_for_user(user_id: UUID) -> List[Recommendation]:
                 status=rec_data["status"]
             )
         )
+    return recommendations
+
+async def get_recommendations_for_user(user_id: UUID) -> List[Recommendation]:
+    """
+    Get personalized content recommendations for a user.
+    This uses LangChain and LangGraph to generate recommendations based on user's learning history.
+    """
+    # First, check if we have cached recommendations.
+    # The Supabase reads are synchronous, so run them off the event loop.
+    recommendations = await asyncio.to_thread(_load_recommendations, user_id)
 
     # If we have recommendations, return them
     if recommendations:
@@ -41,33 +48,24 @@ def get_recommendations_for_user(user_id: UUID) -> List[Recommendation]:
     # Otherwise, we need to generate new recommendations using LangGraph workflow
     try:
         # Run the LangGraph recommendation workflow
-        workflow_results = run_recommendation_workflow(str(user_id))
+        workflow_results = await run_recommendation_workflow(str(user_id))
 
         # If we have results from the workflow, they've already been saved to the database
         # So we can just fetch them again
         if workflow_results:
-            response = supabase.table("ai_recommendations").select("*").eq("user_id", str(user_id)).execute()
-
-            recommendations = []
-            for rec_data in response.data:
-                recommendations.append(
-                    Recommendation(
-                        id=rec_data["recommendation_id"],
-                        user_id=rec_data["user_id"],
-                        content_id=rec_data["content_id"],
-                        recommendation_type=rec_data["recommendation_type"],
-                        reasoning=rec_data["reasoning"],
-                        created_at=rec_data["created_at"],
-                        status=rec_data["status"]
-                    )
-                )
-
-            return recommendations
+            return await asyncio.to_thread(_load_recommendations, user_id)
     except Exception as e:
         print(f"Error running recommendation workflow: {str(e)}")
         # Fall back to simple recommendations if the workflow fails
 
-    # Fallback approach using simple LangChain if LangGraph workflow fails
+    return await asyncio.to_thread(_fallback_recommendations, user_id)
+
+def _fallback_recommendations(user_id: UUID) -> List[Recommendation]:
+    """
+    Fallback approach using simple LangChain if LangGraph workflow fails.
+    """
+    supabase = get_supabase_client()
+
     # Get user's learning history
     user_progress = supabase.table("user_progress").select("*").eq("user_id", str(user_id)).execute()
 
@@ -79,10 +77,7 @@ def get_recommendations_for_user(user_id: UUID) -> List[Recommendation]:
     content = supabase.table("content_items").select("*").execute()
 
     # Use LangChain to generate recommendations
-    llm = HuggingFaceHub(
-        repo_id=settings.AI_MODEL_NAME,
-        model_kwargs={"temperature": 0.7, "max_length": 100}
-    )
+    llm = llm_registry.get(temperature=0.7, max_length=100)
 
     prompt = PromptTemplate(
         input_variables=["user_progress", "learning_preferences", "available_content"],
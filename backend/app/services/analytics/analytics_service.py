@@ -1,51 +1,82 @@
 from typing import Dict, List
 from uuid import UUID
 
-from app.services.db import get_supabase_client
+from app.services.analytics.course_analytics_engine import IN_FILTER_CHUNK_SIZE, CourseAnalyticsEngine
+from app.services.db import chunked, fetch_all, get_supabase_client
 
 def get_user_progress(user_id: UUID) -> Dict:
     """
     Get a user's progress across all courses.
+
+    Uses a constant number of bulk queries (enrollments, courses, modules,
+    content items and the user's progress rows) and aggregates in memory,
+    regardless of how many courses, modules or content items are involved.
+    Content items and progress rows are paged in a stable order, so the
+    PostgREST max-rows limit cannot truncate them.
     """
     supabase = get_supabase_client()
     
     # Get user's enrollments
-    enrollments = supabase.table("enrollments").select("*").eq("user_id", str(user_id)).execute()
+    enrollments = supabase.table("enrollments").select("course_id").eq("user_id", str(user_id)).execute()
+    course_ids = list(dict.fromkeys(enrollment["course_id"] for enrollment in enrollments.data))
+    
+    if not course_ids:
+        return {
+            "user_id": str(user_id),
+            "overall_progress": {}
+        }
+    
+    # Get course details, modules and content items in bulk
+    courses = supabase.table("courses").select("course_id, title").in_("course_id", course_ids).execute()
+    modules = supabase.table("modules").select("module_id, course_id, title").in_("course_id", course_ids).execute()
+    
+    module_ids = [module["module_id"] for module in modules.data]
+    content_items: List[Dict] = []
+    for module_chunk in chunked(module_ids, IN_FILTER_CHUNK_SIZE):
+        content_items.extend(fetch_all(
+            lambda: supabase.table("content_items").select("content_id, module_id").in_("module_id", module_chunk),
+            order=("content_id",)
+        ))
+    
+    # Get all of the user's progress records
+    user_progress = fetch_all(
+        lambda: supabase.table("user_progress").select("content_id, status, completion_percentage, last_accessed").eq("user_id", str(user_id)),
+        order=("content_id",)
+    )
+    
+    progress_by_content = {progress["content_id"]: progress for progress in user_progress}
+    
+    content_by_module: Dict[str, List[str]] = {}
+    for content in content_items:
+        content_by_module.setdefault(content["module_id"], []).append(content["content_id"])
+    
+    modules_by_course: Dict[str, List[Dict]] = {}
+    for module in modules.data:
+        modules_by_course.setdefault(module["course_id"], []).append(module)
+    
+    course_titles = {course["course_id"]: course["title"] for course in courses.data}
     
     # Get user's progress for each course
     progress_data = {}
-    for enrollment in enrollments.data:
-        course_id = enrollment["course_id"]
-        
-        # Get course details
-        course = supabase.table("courses").select("*").eq("course_id", course_id).execute()
-        if not course.data:
+    for course_id in course_ids:
+        if course_id not in course_titles:
             continue
         
-        # Get modules for the course
-        modules = supabase.table("modules").select("*").eq("course_id", course_id).execute()
-        
         # Get user's progress for each module
         module_progress = {}
-        for module in modules.data:
+        for module in modules_by_course.get(course_id, []):
             module_id = module["module_id"]
             
-            # Get content items for the module
-            content_items = supabase.table("content_items").select("*").eq("module_id", module_id).execute()
-            
             # Get user's progress for each content item
             content_progress = {}
-            for content in content_items.data:
-                content_id = content["content_id"]
+            for content_id in content_by_module.get(module_id, []):
+                progress = progress_by_content.get(content_id)
                 
-                # Get user's progress for this content item
-                user_progress = supabase.table("user_progress").select("*").eq("user_id", str(user_id)).eq("content_id", content_id).execute()
-                
-                if user_progress.data:
+                if progress:
                     content_progress[content_id] = {
-                        "status": user_progress.data[0]["status"],
-                        "completion_percentage": user_progress.data[0]["completion_percentage"],
-                        "last_accessed": user_progress.data[0]["last_accessed"]
+                        "status": progress["status"],
+                        "completion_percentage": progress["completion_percentage"],
+                        "last_accessed": progress["last_accessed"]
                     }
                 else:
                     content_progress[content_id] = {
@@ -70,7 +101,7 @@ def get_user_progress(user_id: UUID) -> Dict:
         course_completion = sum(module_completion_values) / len(module_completion_values) if module_completion_values else 0
         
         progress_data[course_id] = {
-            "title": course.data[0]["title"],
+            "title": course_titles[course_id],
             "completion_percentage": course_completion,
             "module_progress": module_progress
         }
@@ -84,38 +115,30 @@ def get_course_analytics(course_id: str) -> Dict:
     """
     Get analytics for a specific course.
     """
-    supabase = get_supabase_client()
+    engine = CourseAnalyticsEngine()
     
-    # Get course details
-    course = supabase.table("courses").select("*").eq("course_id", course_id).execute()
-    if not course.data:
+    # Get course details, modules and content items
+    structure = engine.get_course_structure(course_id)
+    if not structure:
         return {"error": "Course not found"}
     
     # Get all enrollments for the course
-    enrollments = supabase.table("enrollments").select("*").eq("course_id", course_id).execute()
-    
-    # Get all modules for the course
-    modules = supabase.table("modules").select("*").eq("course_id", course_id).execute()
+    enrollments = engine.get_enrollments(course_id)
     
     # Collect analytics data
-    total_students = len(enrollments.data)
+    total_students = len(enrollments)
     
     # Calculate completion rates
+    content_completion_counts = engine.get_content_completion(course_id, structure)
+    
     completion_data = {}
-    for module in modules.data:
+    for module in structure["modules"]:
         module_id = module["module_id"]
         
-        # Get content items for the module
-        content_items = supabase.table("content_items").select("*").eq("module_id", module_id).execute()
-        
         content_completion = {}
-        for content in content_items.data:
+        for content in structure["content_by_module"][module_id]:
             content_id = content["content_id"]
-            
-            # Get all progress records for this content item
-            progress_records = supabase.table("user_progress").select("*").eq("content_id", content_id).execute()
-            
-            completed_count = sum(1 for p in progress_records.data if p["status"] == "completed")
+            completed_count = content_completion_counts.get(content_id, {}).get("completed_count", 0)
             completion_rate = (completed_count / total_students * 100) if total_students > 0 else 0
             
             content_completion[content_id] = {
@@ -131,31 +154,35 @@ def get_course_analytics(course_id: str) -> Dict:
             "content_completion": content_completion
         }
     
-    # Identify struggling students
-    struggling_students = []
-    for enrollment in enrollments.data:
+    # Identify struggling students (overall completion below 30%)
+    user_module_completion = engine.get_user_module_completion(course_id, structure)
+    
+    struggling = {}
+    for enrollment in enrollments:
         user_id = enrollment["user_id"]
-        
-        # Get user's progress for this course
-        user_progress = get_user_progress(user_id)
-        
-        # If overall completion is less than 30%, consider the student struggling
-        if user_id in user_progress and course_id in user_progress[user_id]["overall_progress"]:
-            course_progress = user_progress[user_id]["overall_progress"][course_id]
-            if course_progress["completion_percentage"] < 30:
-                # Get user details
-                user = supabase.table("users").select("username, email").eq("user_id", user_id).execute()
-                if user.data:
-                    struggling_students.append({
-                        "user_id": user_id,
-                        "username": user.data[0]["username"],
-                        "email": user.data[0]["email"],
-                        "completion_percentage": course_progress["completion_percentage"]
-                    })
+        completion_percentage = engine.course_completion_percentage(
+            structure,
+            user_module_completion.get(user_id, {})
+        )
+        if completion_percentage < 30:
+            struggling[user_id] = completion_percentage
+    
+    users = engine.get_users(list(struggling))
+    
+    struggling_students = [
+        {
+            "user_id": user_id,
+            "username": users[user_id]["username"],
+            "email": users[user_id]["email"],
+            "completion_percentage": completion_percentage
+        }
+        for user_id, completion_percentage in struggling.items()
+        if user_id in users
+    ]
     
     return {
         "course_id": course_id,
-        "title": course.data[0]["title"],
+        "title": structure["course"]["title"],
         "total_students": total_students,
         "module_completion": completion_data,
         "struggling_students": struggling_students
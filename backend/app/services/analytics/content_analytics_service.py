@@ -2,12 +2,14 @@
 Service for analyzing content performance and engagement.
 """
 
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from uuid import UUID
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.services.analytics.course_analytics_engine import CourseAnalyticsEngine
 from app.services.db import get_supabase_client
 
 class ContentAnalyticsService:
@@ -124,53 +126,41 @@ class ContentAnalyticsService:
             return {"error": "Analytics is disabled"}
         
         try:
-            # Get course details
-            course_response = self.supabase.table("courses").select("*").eq("course_id", course_id).execute()
+            engine = CourseAnalyticsEngine(self.supabase)
             
-            if not course_response.data:
-                return {"error": "Course not found"}
-            
-            course = course_response.data[0]
+            # Get course details, modules and content items
+            structure = engine.get_course_structure(course_id)
             
-            # Get enrollment count
-            enrollments_response = self.supabase.table("enrollments").select("count").eq("course_id", course_id).execute()
-            enrollment_count = len(enrollments_response.data)
+            if not structure:
+                return {"error": "Course not found"}
             
-            # Get active enrollments
-            active_enrollments_response = self.supabase.table("enrollments").select("count").eq("course_id", course_id).eq("status", "active").execute()
-            active_enrollment_count = len(active_enrollments_response.data)
+            course = structure["course"]
             
-            # Get completed enrollments
-            completed_enrollments_response = self.supabase.table("enrollments").select("count").eq("course_id", course_id).eq("status", "completed").execute()
-            completed_enrollment_count = len(completed_enrollments_response.data)
+            # Get enrollment counts by status
+            enrollments = engine.get_enrollments(course_id)
+            status_counts = Counter(enrollment["status"] for enrollment in enrollments)
+            enrollment_count = len(enrollments)
+            active_enrollment_count = status_counts["active"]
+            completed_enrollment_count = status_counts["completed"]
             
             # Calculate completion rate
             completion_rate = (completed_enrollment_count / enrollment_count * 100) if enrollment_count > 0 else 0
             
-            # Get modules
-            modules_response = self.supabase.table("modules").select("*").eq("course_id", course_id).order("sequence_number").execute()
-            modules = modules_response.data
+            # Get progress totals for every content item in the course
+            content_completion_counts = engine.get_content_completion(course_id, structure)
             
-            # Get content for each module
             module_engagement = []
-            for module in modules:
+            for module in structure["modules"]:
                 module_id = module["module_id"]
                 
-                # Get content items
-                content_response = self.supabase.table("content_items").select("*").eq("module_id", module_id).execute()
-                content_items = content_response.data
-                
                 # Calculate module completion rate
                 module_progress = []
-                for content in content_items:
+                for content in structure["content_by_module"][module_id]:
                     content_id = content["content_id"]
-                    
-                    # Get progress for this content
-                    progress_response = self.supabase.table("user_progress").select("*").eq("content_id", content_id).execute()
-                    progress_items = progress_response.data
-                    
-                    completed_count = sum(1 for p in progress_items if p["status"] == "completed")
-                    content_completion_rate = (completed_count / len(progress_items) * 100) if progress_items else 0
+                    counts = content_completion_counts.get(content_id, {})
+                    progress_count = counts.get("progress_count", 0)
+                    completed_count = counts.get("completed_count", 0)
+                    content_completion_rate = (completed_count / progress_count * 100) if progress_count else 0
                     
                     module_progress.append({
                         "content_id": content_id,
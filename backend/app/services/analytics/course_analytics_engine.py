@@ -0,0 +1,224 @@
+"""
+Set-based analytics engine for course-level dashboards.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.logging import logger
+from app.services.db import chunked, fetch_all, get_supabase_client, is_missing_function
+
+# Maximum number of IDs sent in a single IN filter
+IN_FILTER_CHUNK_SIZE = 200
+
+class CourseAnalyticsEngine:
+    """
+    Loads a course's structure, enrollments and progress in bulk and
+    aggregates them in memory.
+
+    Progress totals are computed by the ``course_content_completion`` and
+    ``course_user_module_completion`` database functions when available, so
+    only aggregated rows cross the network. If the functions are missing the
+    engine falls back to paged bulk reads of ``user_progress``.
+    """
+
+    def __init__(self, supabase=None):
+        """
+        Initialize the course analytics engine.
+
+        Args:
+            supabase: Supabase client (defaults to the shared client)
+        """
+        self.supabase = supabase or get_supabase_client()
+
+    def get_course_structure(self, course_id: str) -> Optional[Dict]:
+        """
+        Get a course with its modules and content items.
+
+        Args:
+            course_id: Course ID
+
+        Returns:
+            The course row, its modules ordered by sequence number, the
+            content items of each module and a content-to-module map, or
+            None if the course does not exist
+        """
+        course_response = self.supabase.table("courses").select("*").eq("course_id", course_id).execute()
+        if not course_response.data:
+            return None
+
+        modules = fetch_all(
+            lambda: self.supabase.table("modules").select("*").eq("course_id", course_id),
+            order=("sequence_number", "module_id")
+        )
+
+        content_by_module: Dict[str, List[Dict]] = {module["module_id"]: [] for module in modules}
+        module_ids = list(content_by_module)
+        for module_chunk in chunked(module_ids, IN_FILTER_CHUNK_SIZE):
+            content_items = fetch_all(
+                lambda: self.supabase.table("content_items").select("content_id, module_id, title, type").in_("module_id", module_chunk),
+                order=("content_id",)
+            )
+            for content in content_items:
+                content_by_module[content["module_id"]].append(content)
+
+        content_module = {
+            content["content_id"]: module_id
+            for module_id, items in content_by_module.items()
+            for content in items
+        }
+
+        return {
+            "course": course_response.data[0],
+            "modules": modules,
+            "content_by_module": content_by_module,
+            "content_module": content_module
+        }
+
+    def get_enrollments(self, course_id: str) -> List[Dict]:
+        """
+        Get every enrollment for a course.
+
+        Args:
+            course_id: Course ID
+
+        Returns:
+            Enrollment rows
+        """
+        return fetch_all(
+            lambda: self.supabase.table("enrollments").select("user_id, status").eq("course_id", course_id),
+            order=("user_id",)
+        )
+
+    def get_users(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get user details for many users.
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            Mapping of user ID to user row
+        """
+        users = {}
+        for user_chunk in chunked(user_ids, IN_FILTER_CHUNK_SIZE):
+            response = self.supabase.table("users").select("user_id, username, email").in_("user_id", user_chunk).execute()
+            for user in response.data:
+                users[user["user_id"]] = user
+        return users
+
+    def _get_progress_rows(self, content_ids: List[str]) -> List[Dict]:
+        """
+        Get raw progress rows for the given content items.
+
+        Args:
+            content_ids: Content IDs
+
+        Returns:
+            Progress rows with user ID, content ID and status
+        """
+        rows: List[Dict] = []
+        for content_chunk in chunked(content_ids, IN_FILTER_CHUNK_SIZE):
+            rows.extend(fetch_all(
+                lambda: self.supabase.table("user_progress").select("user_id, content_id, status").in_("content_id", content_chunk),
+                order=("user_id", "content_id")
+            ))
+        return rows
+
+    def get_content_completion(self, course_id: str, structure: Dict) -> Dict[str, Dict[str, int]]:
+        """
+        Count progress records and completions for every content item.
+
+        Args:
+            course_id: Course ID
+            structure: Result of get_course_structure
+
+        Returns:
+            Mapping of content ID to progress and completed counts
+        """
+        try:
+            rows = fetch_all(
+                lambda: self.supabase.rpc("course_content_completion", {"p_course_id": course_id}),
+                order=("content_id",)
+            )
+            return {
+                row["content_id"]: {
+                    "progress_count": row["progress_count"],
+                    "completed_count": row["completed_count"]
+                }
+                for row in rows
+            }
+        except Exception as e:
+            if not is_missing_function(e):
+                logger.error(f"Error calling course_content_completion for course {course_id}: {str(e)}")
+                raise
+            logger.debug(f"course_content_completion unavailable, aggregating in memory: {str(e)}")
+
+        progress_counts = Counter()
+        completed_counts = Counter()
+        for row in self._get_progress_rows(list(structure["content_module"])):
+            progress_counts[row["content_id"]] += 1
+            if row["status"] == "completed":
+                completed_counts[row["content_id"]] += 1
+
+        return {
+            content_id: {
+                "progress_count": progress_counts[content_id],
+                "completed_count": completed_counts[content_id]
+            }
+            for content_id in progress_counts
+        }
+
+    def get_user_module_completion(self, course_id: str, structure: Dict) -> Dict[str, Counter]:
+        """
+        Count completed content items per user and module.
+
+        Args:
+            course_id: Course ID
+            structure: Result of get_course_structure
+
+        Returns:
+            Mapping of user ID to a counter of completed items per module
+        """
+        completion: Dict[str, Counter] = {}
+        try:
+            rows = fetch_all(
+                lambda: self.supabase.rpc("course_user_module_completion", {"p_course_id": course_id}),
+                order=("user_id", "module_id")
+            )
+            for row in rows:
+                completion.setdefault(row["user_id"], Counter())[row["module_id"]] = row["completed_count"]
+            return completion
+        except Exception as e:
+            if not is_missing_function(e):
+                logger.error(f"Error calling course_user_module_completion for course {course_id}: {str(e)}")
+                raise
+            logger.debug(f"course_user_module_completion unavailable, aggregating in memory: {str(e)}")
+
+        content_module = structure["content_module"]
+        for row in self._get_progress_rows(list(content_module)):
+            if row["status"] == "completed":
+                completion.setdefault(row["user_id"], Counter())[content_module[row["content_id"]]] += 1
+        return completion
+
+    @staticmethod
+    def course_completion_percentage(structure: Dict, completed_by_module: Counter) -> float:
+        """
+        Calculate a user's course completion as the mean module completion.
+
+        Args:
+            structure: Result of get_course_structure
+            completed_by_module: Completed item counts per module for the user
+
+        Returns:
+            Course completion percentage
+        """
+        content_by_module = structure["content_by_module"]
+        if not content_by_module:
+            return 0
+
+        total = 0.0
+        for module_id, items in content_by_module.items():
+            if items:
+                total += completed_by_module.get(module_id, 0) / len(items) * 100
+        return total / len(content_by_module)
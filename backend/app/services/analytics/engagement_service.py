@@ -1,62 +1,91 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List
 from uuid import UUID
 
+from app.core.logging import logger
+from app.services.cache_service import async_cache
 from app.services.db import get_supabase_client
 
+# Lease letting one process refresh the rollups per interval
+ROLLUP_LOCK_KEY = "engagement-rollup"
+
+def refresh_engagement_rollups(days: int = 2) -> bool:
+    """
+    Rebuild the daily engagement rollups for the last few days.
+    
+    Activity for a day keeps arriving until it is over, so the job
+    recomputes a short trailing window on each run.
+    """
+    supabase = get_supabase_client()
+    
+    since = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+    
+    try:
+        supabase.rpc("refresh_daily_engagement", {"p_since": since}).execute()
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing engagement rollups: {str(e)}")
+        return False
+
+async def run_engagement_rollup_job(interval: int) -> None:
+    """
+    Refresh the engagement rollups every ``interval`` seconds.
+    
+    Every API worker runs this loop. With Redis, the refresh takes a lease
+    that expires after the interval, so only one process refreshes per
+    interval. Without Redis, or while it fails, every process refreshes
+    rather than none.
+    """
+    while True:
+        # acquire_lock returns a token, LOCK_UNAVAILABLE included, unless another process holds the lease
+        if await async_cache.acquire_lock(ROLLUP_LOCK_KEY, interval):
+            await asyncio.to_thread(refresh_engagement_rollups)
+        await asyncio.sleep(interval)
+
 def get_course_engagement_metrics(course_id: str, days: int = 7) -> Dict:
     """
     Get engagement metrics for a course over the specified number of days.
+    
+    Reads the course_daily_engagement rollup, so the cost is a fixed number
+    of queries regardless of the window length.
     """
     supabase = get_supabase_client()
     
     # Calculate date range
-    end_date = datetime.utcnow()
+    end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
     
     # Get all enrollments for the course
-    enrollments = supabase.table("enrollments").select("*").eq("course_id", course_id).eq("status", "active").execute()
+    enrollments = supabase.table("enrollments").select("user_id").eq("course_id", course_id).eq("status", "active").execute()
     total_students = len(enrollments.data)
     
-    # Get daily active students
+    # Get daily rollups for the whole window
+    rollups = supabase.table("course_daily_engagement").select("*").eq("course_id", course_id).gte("day", start_date.isoformat()).lte("day", end_date.isoformat()).execute()
+    rollups_by_day = {rollup["day"]: rollup for rollup in rollups.data}
+    
+    # Get daily active students, filling in days without activity
     daily_metrics = []
     current_date = start_date
     
     while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        next_date = current_date + timedelta(days=1)
-        
-        # Get user progress updates for this day
-        progress_updates = supabase.table("user_progress").select("user_id").eq("course_id", course_id).gte("last_accessed", current_date.isoformat()).lt("last_accessed", next_date.isoformat()).execute()
-        
-        # Get content views for this day
-        content_views = supabase.table("content_views").select("*").eq("course_id", course_id).gte("viewed_at", current_date.isoformat()).lt("viewed_at", next_date.isoformat()).execute()
-        
-        # Get quiz submissions for this day
-        quiz_submissions = supabase.table("quiz_submissions").select("*").eq("course_id", course_id).gte("submitted_at", current_date.isoformat()).lt("submitted_at", next_date.isoformat()).execute()
-        
-        # Count unique active students
-        active_user_ids = set()
-        for progress in progress_updates.data:
-            active_user_ids.add(progress["user_id"])
-        
-        for view in content_views.data:
-            active_user_ids.add(view["user_id"])
-        
-        for submission in quiz_submissions.data:
-            active_user_ids.add(submission["user_id"])
+        date_str = current_date.isoformat()
+        rollup = rollups_by_day.get(date_str, {})
         
         daily_metrics.append({
             "date": date_str,
-            "active_students": len(active_user_ids),
-            "content_views": len(content_views.data),
-            "quiz_submissions": len(quiz_submissions.data)
+            "active_students": rollup.get("active_users", 0),
+            "content_views": rollup.get("content_views", 0),
+            "quiz_submissions": rollup.get("quiz_submissions", 0)
         })
         
-        current_date = next_date
+        current_date += timedelta(days=1)
+    
+    # Count distinct students active at any point in the window
+    active_count = supabase.rpc("course_active_user_count", {"p_course_id": course_id, "p_since": start_date.isoformat()}).execute()
+    total_active_students = active_count.data or 0
     
     # Calculate overall metrics
-    total_active_students = len(set().union(*[set(day["active_students"]) for day in daily_metrics])) if daily_metrics else 0
     total_content_views = sum(day["content_views"] for day in daily_metrics)
     total_quiz_submissions = sum(day["quiz_submissions"] for day in daily_metrics)
     
@@ -74,69 +103,71 @@ def get_course_engagement_metrics(course_id: str, days: int = 7) -> Dict:
 def get_student_engagement_metrics(user_id: UUID, days: int = 30) -> Dict:
     """
     Get engagement metrics for a student over the specified number of days.
+    
+    Reads the user_daily_engagement rollup and aggregates it per course in
+    a single pass.
     """
     supabase = get_supabase_client()
     
     # Calculate date range
-    end_date = datetime.utcnow()
+    end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
     
     # Get all enrollments for the student
-    enrollments = supabase.table("enrollments").select("*").eq("user_id", str(user_id)).eq("status", "active").execute()
+    enrollments = supabase.table("enrollments").select("course_id").eq("user_id", str(user_id)).eq("status", "active").execute()
     enrolled_courses = [enrollment["course_id"] for enrollment in enrollments.data]
     
-    # Get progress updates in the date range
-    progress_updates = supabase.table("user_progress").select("*").eq("user_id", str(user_id)).gte("last_accessed", start_date.isoformat()).lt("last_accessed", end_date.isoformat()).execute()
+    # Get the student's daily rollups in the date range
+    rollups = supabase.table("user_daily_engagement").select("*").eq("user_id", str(user_id)).gte("day", start_date.isoformat()).lte("day", end_date.isoformat()).execute()
     
-    # Get content views in the date range
-    content_views = supabase.table("content_views").select("*").eq("user_id", str(user_id)).gte("viewed_at", start_date.isoformat()).lt("viewed_at", end_date.isoformat()).execute()
+    # Get course titles for all enrollments in one query
+    course_titles = {}
+    if enrolled_courses:
+        courses = supabase.table("courses").select("course_id, title").in_("course_id", enrolled_courses).execute()
+        course_titles = {course["course_id"]: course["title"] for course in courses.data}
     
-    # Get quiz submissions in the date range
-    quiz_submissions = supabase.table("quiz_submissions").select("*").eq("user_id", str(user_id)).gte("submitted_at", start_date.isoformat()).lt("submitted_at", end_date.isoformat()).execute()
+    course_metrics = {
+        course_id: {
+            "course_id": course_id,
+            "title": course_titles.get(course_id, "Unknown Course"),
+            "progress_updates": 0,
+            "content_views": 0,
+            "quiz_submissions": 0,
+            "last_active": None
+        }
+        for course_id in enrolled_courses
+    }
     
-    # Calculate active days
+    # Aggregate totals, active days and per-course metrics in one pass
     active_days = set()
-    
-    for progress in progress_updates.data:
-        date = datetime.fromisoformat(progress["last_accessed"]).strftime("%Y-%m-%d")
-        active_days.add(date)
-    
-    for view in content_views.data:
-        date = datetime.fromisoformat(view["viewed_at"]).strftime("%Y-%m-%d")
-        active_days.add(date)
-    
-    for submission in quiz_submissions.data:
-        date = datetime.fromisoformat(submission["submitted_at"]).strftime("%Y-%m-%d")
-        active_days.add(date)
-    
-    # Calculate metrics by course
-    course_metrics = {}
-    for course_id in enrolled_courses:
-        course_progress = [p for p in progress_updates.data if p["course_id"] == course_id]
-        course_views = [v for v in content_views.data if v["course_id"] == course_id]
-        course_submissions = [s for s in quiz_submissions.data if s["course_id"] == course_id]
+    total_progress_updates = 0
+    total_content_views = 0
+    total_quiz_submissions = 0
+    
+    for rollup in rollups.data:
+        active_days.add(rollup["day"])
+        total_progress_updates += rollup["progress_updates"]
+        total_content_views += rollup["content_views"]
+        total_quiz_submissions += rollup["quiz_submissions"]
         
-        # Get course details
-        course = supabase.table("courses").select("title").eq("course_id", course_id).execute()
-        course_title = course.data[0]["title"] if course.data else "Unknown Course"
+        metrics = course_metrics.get(rollup["course_id"])
+        if metrics is None:
+            continue
         
-        course_metrics[course_id] = {
-            "course_id": course_id,
-            "title": course_title,
-            "progress_updates": len(course_progress),
-            "content_views": len(course_views),
-            "quiz_submissions": len(course_submissions),
-            "last_active": max([p["last_accessed"] for p in course_progress] + [v["viewed_at"] for v in course_views] + [s["submitted_at"] for s in course_submissions], default=None)
-        }
+        metrics["progress_updates"] += rollup["progress_updates"]
+        metrics["content_views"] += rollup["content_views"]
+        metrics["quiz_submissions"] += rollup["quiz_submissions"]
+        if metrics["last_active"] is None or (rollup["last_active"] and rollup["last_active"] > metrics["last_active"]):
+            metrics["last_active"] = rollup["last_active"]
     
     return {
         "user_id": str(user_id),
         "enrolled_courses": len(enrolled_courses),
         "active_days": len(active_days),
         "activity_rate": len(active_days) / days * 100,
-        "total_progress_updates": len(progress_updates.data),
-        "total_content_views": len(content_views.data),
-        "total_quiz_submissions": len(quiz_submissions.data),
+        "total_progress_updates": total_progress_updates,
+        "total_content_views": total_content_views,
+        "total_quiz_submissions": total_quiz_submissions,
         "course_metrics": list(course_metrics.values())
     }
 
@@ -0,0 +1,194 @@
+"""
+Retention calculations over per-user activity bitsets.
+
+Each user's activity is packed into a Python integer where bit ``i`` is set
+when the user was active in period ``i`` (a day or a week) of the window.
+Building the bitsets is a single pass over the activity rows and every
+retention figure is then derived by walking the set bits, so the cost grows
+with the number of active user-periods rather than with days x users x days.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+def _parse_day(value: str) -> date:
+    """
+    Parse the date part of an ISO date or timestamp string.
+    """
+    return date.fromisoformat(value[:10])
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """
+    Yield the indexes of the set bits of an integer in ascending order.
+
+    Args:
+        bits: Bitset
+
+    Yields:
+        Index of each set bit
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+def activity_bitsets(
+    activity: Iterable[Tuple[str, str]],
+    start_date: date,
+    periods: int,
+    period_days: int = 1
+) -> Dict[str, int]:
+    """
+    Bucket activity into one bitset per user.
+
+    Args:
+        activity: (user ID, ISO date or timestamp) pairs
+        start_date: First day of the window
+        periods: Number of periods in the window
+        period_days: Length of a period in days (1 for days, 7 for weeks)
+
+    Returns:
+        Mapping of user ID to activity bitset
+    """
+    bitsets: Dict[str, int] = {}
+    period_bits: Dict[str, int] = {}
+
+    for user_id, day in activity:
+        # Parse each distinct day string once
+        bit = period_bits.get(day[:10])
+        if bit is None:
+            index = (_parse_day(day) - start_date).days // period_days
+            bit = 1 << index if 0 <= index < periods else 0
+            period_bits[day[:10]] = bit
+
+        if bit:
+            bitsets[user_id] = bitsets.get(user_id, 0) | bit
+
+    return bitsets
+
+def daily_retention(bitsets: Dict[str, int], start_date: date, days: int) -> List[Dict]:
+    """
+    Count, for each day, the active users and those who came back on any later day.
+
+    Args:
+        bitsets: Daily activity bitsets
+        start_date: First day of the window
+        days: Number of days in the window
+
+    Returns:
+        Daily users, retained users and retention rate
+    """
+    users = [0] * days
+    retained = [0] * days
+
+    for bits in bitsets.values():
+        last_day = bits.bit_length() - 1
+        for day in iter_bits(bits):
+            users[day] += 1
+            if day < last_day:
+                retained[day] += 1
+
+    return [
+        {
+            "date": (start_date + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "users": users[i],
+            "retained_users": retained[i],
+            "retention_rate": (retained[i] / users[i] * 100) if users[i] > 0 else 0
+        }
+        for i in range(days)
+    ]
+
+def day_n_retention(bitsets: Dict[str, int], days: int) -> List[Dict]:
+    """
+    Calculate day-N and rolling retention relative to each user's first active day.
+
+    A user counts towards day N when their first active day plus N is still
+    inside the window. Day-N retention counts users active exactly N days
+    after their first day, rolling retention those active on that day or later.
+
+    Args:
+        bitsets: Daily activity bitsets
+        days: Number of days in the window
+
+    Returns:
+        Eligible users, day-N and rolling retention for every N
+    """
+    active = [0] * days
+    # Difference arrays for the ranges of N each user is eligible and rolling-retained for
+    eligible_delta = [0] * (days + 1)
+    rolling_delta = [0] * (days + 1)
+
+    for bits in bitsets.values():
+        first_day = (bits & -bits).bit_length() - 1
+        last_day = bits.bit_length() - 1
+
+        eligible_delta[0] += 1
+        eligible_delta[days - first_day] -= 1
+        rolling_delta[0] += 1
+        rolling_delta[last_day - first_day + 1] -= 1
+
+        for day in iter_bits(bits):
+            active[day - first_day] += 1
+
+    result = []
+    eligible = 0
+    rolling = 0
+    for n in range(days):
+        eligible += eligible_delta[n]
+        rolling += rolling_delta[n]
+        result.append({
+            "day": n,
+            "eligible_users": eligible,
+            "day_n_users": active[n],
+            "day_n_rate": (active[n] / eligible * 100) if eligible > 0 else 0,
+            "rolling_users": rolling,
+            "rolling_rate": (rolling / eligible * 100) if eligible > 0 else 0
+        })
+
+    return result
+
+def cohort_retention(
+    signups: Iterable[Tuple[str, str]],
+    bitsets: Dict[str, int],
+    start_date: date,
+    weeks: int
+) -> List[Dict]:
+    """
+    Calculate week-N retention for weekly signup cohorts.
+
+    Args:
+        signups: (user ID, ISO signup date or timestamp) pairs
+        bitsets: Weekly activity bitsets over the same window
+        start_date: First day of the first cohort week
+        weeks: Number of weeks in the window
+
+    Returns:
+        One entry per cohort with its size and the active users in each later week
+    """
+    cohort_sizes = [0] * weeks
+    cohort_active = [[0] * (weeks - cohort) for cohort in range(weeks)]
+
+    signup_weeks = activity_bitsets(signups, start_date, weeks, period_days=7)
+    for user_id, signup_bit in signup_weeks.items():
+        cohort = signup_bit.bit_length() - 1
+        cohort_sizes[cohort] += 1
+
+        counts = cohort_active[cohort]
+        for week in iter_bits(bitsets.get(user_id, 0) >> cohort):
+            counts[week] += 1
+
+    return [
+        {
+            "cohort": (start_date + timedelta(weeks=cohort)).strftime("%Y-%m-%d"),
+            "users": cohort_sizes[cohort],
+            "retention": [
+                {
+                    "week": week,
+                    "active_users": active_users,
+                    "retention_rate": (active_users / cohort_sizes[cohort] * 100) if cohort_sizes[cohort] > 0 else 0
+                }
+                for week, active_users in enumerate(cohort_active[cohort])
+            ]
+        }
+        for cohort in range(weeks)
+    ]
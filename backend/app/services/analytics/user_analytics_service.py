@@ -2,14 +2,20 @@
 Service for tracking and analyzing user behavior.
 """
 
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.services.analytics.retention import activity_bitsets, cohort_retention, daily_retention, day_n_retention
+from app.services.cache_decorators import cached
 from app.services.cache_service import cache
-from app.services.db import get_supabase_client
+from app.services.db import fetch_all, get_supabase_client, is_missing_function
+
+# Cached popular content rankings are served stale for this many TTLs while being refreshed
+POPULAR_CONTENT_STALE_FACTOR = 5
 
 class UserAnalyticsService:
     """
@@ -77,30 +83,26 @@ class UserAnalyticsService:
             event_data: Event data
         """
         try:
-            # Update user's recent events
-            user_events_key = f"user_events:{user_id}"
-            recent_events = cache.get(user_events_key) or []
-            
-            if isinstance(recent_events, list):
-                recent_events.append({
-                    "event_type": event_type,
-                    "event_data": event_data,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
+            # Record the recent event and bump the global counter in one round trip
+            with cache.pipeline() as pipe:
+                if pipe is None:
+                    return
                 
-                # Keep only the 20 most recent events
-                if len(recent_events) > 20:
-                    recent_events = recent_events[-20:]
+                # Keep only the 20 most recent events for 24 hours
+                cache.push_capped(
+                    f"user_events:{user_id}",
+                    {
+                        "event_type": event_type,
+                        "event_data": event_data,
+                        "timestamp": datetime.utcnow().isoformat()
+                    },
+                    max_length=20,
+                    expire=86400,
+                    pipeline=pipe
+                )
                 
-                cache.set(user_events_key, recent_events, expire=86400)  # 24 hours
-            
-            # Update global event counters
-            event_counter_key = f"event_counter:{event_type}"
-            cache.increment(event_counter_key)
-            
-            # Set expiration if it's a new key
-            if cache.get(event_counter_key) == 1:
-                cache.expire(event_counter_key, 86400)  # 24 hours
+                # Global event counters expire 24 hours after they are created
+                cache.increment_with_ttl(f"event_counter:{event_type}", expire=86400, pipeline=pipe)
         except Exception as e:
             logger.error(f"Error updating event cache: {str(e)}")
     
@@ -169,10 +171,78 @@ class UserAnalyticsService:
             logger.error(f"Error getting user activity: {str(e)}")
             return {"error": str(e)}
     
+    def _compute_popular_content(self, days: int, limit: int) -> List[Dict]:
+        """
+        Rank content by views in the window and load the metadata of the top items.
+        
+        Args:
+            days: Number of days to look back
+            limit: Maximum number of items to return
+            
+        Returns:
+            List of popular content items
+        """
+        start_date = datetime.utcnow() - timedelta(days=days)
+        
+        # Count views per content item in the database and keep the top K
+        try:
+            response = self.supabase.rpc("popular_content", {"p_since": start_date.isoformat(), "p_limit": limit}).execute()
+            ranked = [(row["content_id"], row["view_count"]) for row in response.data]
+        except Exception as e:
+            if not is_missing_function(e):
+                logger.error(f"Error calling popular_content: {str(e)}")
+                raise
+            logger.debug(f"popular_content unavailable, counting view events: {str(e)}")
+            events = fetch_all(
+                lambda: self.supabase.table("user_events").select("event_data").eq("event_type", "content_view").gte("timestamp", start_date.isoformat()),
+                order=("event_id",)
+            )
+            content_views = Counter(
+                event["event_data"].get("content_id")
+                for event in events
+                if event.get("event_data") and event["event_data"].get("content_id")
+            )
+            ranked = content_views.most_common(limit)
+        
+        if not ranked:
+            return []
+        
+        # Load content details for all ranked items in one query
+        content_ids = [content_id for content_id, _ in ranked]
+        content_response = self.supabase.table("content_items").select("content_id, title, type").in_("content_id", content_ids).execute()
+        content_by_id = {content["content_id"]: content for content in content_response.data}
+        
+        return [
+            {
+                "content_id": content_id,
+                "title": content_by_id[content_id]["title"],
+                "type": content_by_id[content_id]["type"],
+                "view_count": view_count
+            }
+            for content_id, view_count in ranked
+            if content_id in content_by_id
+        ]
+    
+    @cached(
+        "popular_content",
+        ttl=settings.POPULAR_CONTENT_CACHE_TTL,
+        key=lambda self, days, limit: f"{days}:{limit}",
+        stale_ttl=settings.POPULAR_CONTENT_CACHE_TTL * POPULAR_CONTENT_STALE_FACTOR
+    )
+    def _cached_popular_content(self, days: int, limit: int) -> List[Dict]:
+        """
+        Get popular content through the cache.
+        """
+        return self._compute_popular_content(days, limit)
+    
     def get_popular_content(self, days: int = 7, limit: int = 10) -> List[Dict]:
         """
         Get the most popular content based on user activity.
         
+        Rankings are cached for POPULAR_CONTENT_CACHE_TTL seconds. Once that
+        has passed, the cached ranking is still served while a single
+        background refresh, across processes, recomputes it.
+        
         Args:
             days: Number of days to look back
             limit: Maximum number of items to return
@@ -184,52 +254,40 @@ class UserAnalyticsService:
             return []
         
         try:
-            # Calculate date range
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
-            
-            # Get content view events
-            response = self.supabase.table("user_events").select("*").eq("event_type", "content_view").gte("timestamp", start_date.isoformat()).lt("timestamp", end_date.isoformat()).execute()
-            
-            events = response.data
-            
-            # Count views by content ID
-            content_views = {}
-            for event in events:
-                content_id = event["event_data"].get("content_id")
-                if not content_id:
-                    continue
-                
-                if content_id not in content_views:
-                    content_views[content_id] = 0
-                content_views[content_id] += 1
-            
-            # Sort content by view count
-            sorted_content = sorted(
-                content_views.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:limit]
-            
-            # Get content details
-            popular_content = []
-            for content_id, view_count in sorted_content:
-                content_response = self.supabase.table("content_items").select("*").eq("content_id", content_id).execute()
-                
-                if content_response.data:
-                    content_data = content_response.data[0]
-                    popular_content.append({
-                        "content_id": content_id,
-                        "title": content_data["title"],
-                        "type": content_data["type"],
-                        "view_count": view_count
-                    })
-            
-            return popular_content
+            return self._cached_popular_content(days, limit)
         except Exception as e:
             logger.error(f"Error getting popular content: {str(e)}")
             return []
     
+    def _get_login_days(self, start_date: datetime, end_date: datetime) -> List[Tuple[str, str]]:
+        """
+        Get the distinct days each user logged in.
+        
+        Args:
+            start_date: Start of the range (inclusive)
+            end_date: End of the range (exclusive)
+            
+        Returns:
+            (user ID, ISO day) pairs
+        """
+        try:
+            rows = fetch_all(
+                lambda: self.supabase.rpc("user_login_days", {"p_start": start_date.isoformat(), "p_end": end_date.isoformat()}),
+                order=("user_id", "day")
+            )
+            return [(row["user_id"], row["day"]) for row in rows]
+        except Exception as e:
+            if not is_missing_function(e):
+                logger.error(f"Error calling user_login_days: {str(e)}")
+                raise
+            logger.debug(f"user_login_days unavailable, reading login events: {str(e)}")
+        
+        rows = fetch_all(
+            lambda: self.supabase.table("user_events").select("user_id, timestamp").eq("event_type", "login").gte("timestamp", start_date.isoformat()).lt("timestamp", end_date.isoformat()),
+            order=("event_id",)
+        )
+        return [(row["user_id"], row["timestamp"]) for row in rows]
+    
     def get_user_retention(self, days: int = 30) -> Dict:
         """
         Calculate user retention over a period of time.
@@ -238,7 +296,7 @@ class UserAnalyticsService:
             days: Number of days to look back
             
         Returns:
-            User retention data
+            User retention data, including day-N and rolling retention
         """
         if not self.enabled:
             return {"error": "Analytics is disabled"}
@@ -248,56 +306,60 @@ class UserAnalyticsService:
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days)
             
-            # Get login events
-            response = self.supabase.table("user_events").select("*").eq("event_type", "login").gte("timestamp", start_date.isoformat()).lt("timestamp", end_date.isoformat()).execute()
+            # Bucket logins into one bitset of active days per user
+            login_days = self._get_login_days(start_date, end_date)
+            bitsets = activity_bitsets(login_days, start_date.date(), days)
             
-            events = response.data
+            return {
+                "total_users": len(bitsets),
+                "retention_data": daily_retention(bitsets, start_date.date(), days),
+                "day_n_retention": day_n_retention(bitsets, days)
+            }
+        except Exception as e:
+            logger.error(f"Error calculating user retention: {str(e)}")
+            return {"error": str(e)}
+    
+    def get_cohort_retention(self, weeks: int = 12) -> Dict:
+        """
+        Calculate week-N retention for users grouped by signup week.
+        
+        Args:
+            weeks: Number of weekly cohorts to include, ending with the current week
             
-            # Group logins by user and day
-            user_logins = {}
-            for event in events:
-                user_id = event["user_id"]
-                timestamp = datetime.fromisoformat(event["timestamp"])
-                day = timestamp.strftime("%Y-%m-%d")
-                
-                if user_id not in user_logins:
-                    user_logins[user_id] = set()
-                user_logins[user_id].add(day)
+        Returns:
+            Cohort retention data
+        """
+        if not self.enabled:
+            return {"error": "Analytics is disabled"}
+        
+        try:
+            # Cohort weeks start on Monday
+            end_date = datetime.utcnow()
+            current_week = end_date.date() - timedelta(days=end_date.weekday())
+            start_date = current_week - timedelta(weeks=weeks - 1)
+            start = datetime.combine(start_date, datetime.min.time())
             
-            # Calculate retention by day
-            retention_data = []
-            for i in range(days):
-                day = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-                
-                # Count users who logged in on this day
-                users_on_day = sum(1 for logins in user_logins.values() if day in logins)
-                
-                # Count users who logged in on this day and also logged in later
-                retained_users = 0
-                for user_id, logins in user_logins.items():
-                    if day in logins:
-                        # Check if user logged in on a later day
-                        for j in range(i + 1, days):
-                            later_day = (start_date + timedelta(days=j)).strftime("%Y-%m-%d")
-                            if later_day in logins:
-                                retained_users += 1
-                                break
-                
-                retention_rate = (retained_users / users_on_day * 100) if users_on_day > 0 else 0
-                
-                retention_data.append({
-                    "date": day,
-                    "users": users_on_day,
-                    "retained_users": retained_users,
-                    "retention_rate": retention_rate
-                })
+            signups = fetch_all(
+                lambda: self.supabase.table("users").select("user_id, created_at").gte("created_at", start.isoformat()),
+                order=("user_id",)
+            )
+            login_days = self._get_login_days(start, end_date)
+            
+            bitsets = activity_bitsets(login_days, start_date, weeks, period_days=7)
+            cohorts = cohort_retention(
+                [(user["user_id"], user["created_at"]) for user in signups if user.get("created_at")],
+                bitsets,
+                start_date,
+                weeks
+            )
             
             return {
-                "total_users": len(user_logins),
-                "retention_data": retention_data
+                "start_date": start_date.isoformat(),
+                "weeks": weeks,
+                "cohorts": cohorts
             }
         except Exception as e:
-            logger.error(f"Error calculating user retention: {str(e)}")
+            logger.error(f"Error calculating cohort retention: {str(e)}")
             return {"error": str(e)}
 
 # Create user analytics service instance
@@ -1,20 +1,34 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from supabase import AsyncClient
 
 from app.core.config import settings
 from app.schemas.token import TokenPayload
 from app.schemas.user import User, UserCreate
-from app.services.db import get_supabase_client
+from app.services.cache_decorators import cached
+from app.services.db import get_async_db, get_async_supabase_client, get_supabase_client
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+def _to_user(user_data: dict) -> User:
+    """
+    Build a User schema from a users row.
+    """
+    return User(
+        id=user_data["user_id"],
+        email=user_data["email"],
+        username=user_data["username"],
+        role=user_data["role"],
+        learning_preferences=user_data.get("learning_preferences")
+    )
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -32,13 +46,7 @@ def authenticate_user(email: str, password: str) -> Optional[User]:
     if not verify_password(password, user_data["password_hash"]):
         return None
     
-    return User(
-        id=user_data["user_id"],
-        email=user_data["email"],
-        username=user_data["username"],
-        role=user_data["role"],
-        learning_preferences=user_data.get("learning_preferences")
-    )
+    return _to_user(user_data)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -75,15 +83,34 @@ def register_user(user_data: UserCreate) -> User:
     
     supabase.table("users").insert(new_user).execute()
     
-    return User(
-        id=user_id,
-        email=user_data.email,
-        username=user_data.username,
-        role=user_data.role,
-        learning_preferences={}
-    )
+    # Cache the new principal so the first authenticated request skips the lookup
+    user = _to_user(new_user)
+    get_principal.store(user, user_id)
+    return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+@cached("principal", ttl=settings.AUTH_PRINCIPAL_CACHE_TTL, key=lambda user_id: user_id)
+async def get_principal(user_id: str) -> Optional[User]:
+    """
+    Get the user a token was issued to, cached for AUTH_PRINCIPAL_CACHE_TTL seconds.
+    """
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("users").select("*").eq("user_id", user_id).execute()
+    
+    if not response.data:
+        return None
+    
+    return _to_user(response.data[0])
+
+def invalidate_principal(user_id: UUID) -> None:
+    """
+    Drop a cached principal after the user's role or preferences changed.
+    """
+    get_principal.invalidate(str(user_id))
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    supabase: AsyncClient = Depends(get_async_db)
+) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -96,22 +123,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenPayload(sub=email)
+        token_data = TokenPayload(sub=email, uid=payload.get("uid"))
     except JWTError:
         raise credentials_exception
     
-    supabase = get_supabase_client()
-    response = supabase.table("users").select("*").eq("email", token_data.sub).execute()
+    if token_data.uid:
+        user = await get_principal(token_data.uid)
+        if user is None or user.email != token_data.sub:
+            raise credentials_exception
+        return user
+    
+    # Tokens issued before user IDs were embedded are looked up by email
+    response = await supabase.table("users").select("*").eq("email", token_data.sub).execute()
     
     if not response.data:
         raise credentials_exception
     
-    user_data = response.data[0]
-    
-    return User(
-        id=user_data["user_id"],
-        email=user_data["email"],
-        username=user_data["username"],
-        role=user_data["role"],
-        learning_preferences=user_data.get("learning_preferences")
-    )
+    return _to_user(response.data[0])
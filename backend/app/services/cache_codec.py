@@ -0,0 +1,225 @@
+"""
+Codecs for values stored in the cache.
+
+Encoded values start with a magic byte and a format byte. The low nibble of
+the format byte names the serializer and the high nibble the compression, so
+decoding never has to guess. Values without the magic byte were written
+before codecs existed and are read as JSON. Values are never pickled or
+unpickled, since unpickling data from Redis would let anyone able to write a
+key run code in the API workers.
+"""
+
+import importlib
+import json
+import zlib
+from typing import Any, Tuple
+
+from pydantic import BaseModel
+
+from app.core.logging import logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+# Never the first byte of JSON, msgpack maps/arrays or pickle protocol 2+
+MAGIC = b"\xc1"
+
+# Serializer code 3 tagged pickled values and is rejected like any unknown code
+SERIALIZERS = {"json": 1, "msgpack": 2}
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+SERIALIZER_NAMES = {code: name for name, code in SERIALIZERS.items()}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSIONS.items()}
+
+# Pydantic models are tagged with their class and only revived from these modules
+MODEL_KEY = "__model__"
+MODEL_MODULE_PREFIX = "app.schemas."
+
+class CodecError(ValueError):
+    """
+    Raised when a cached value cannot be decoded.
+    """
+
+def _model_default(value: Any) -> Any:
+    """
+    Convert values the serializers do not support natively.
+    """
+    if isinstance(value, BaseModel):
+        cls = type(value)
+        return {MODEL_KEY: f"{cls.__module__}:{cls.__qualname__}", "data": value.model_dump(mode="json")}
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+def _load_model(path: str) -> type:
+    """
+    Import an allowed Pydantic model class from its "module:qualname" path.
+    """
+    module_name, _, name = path.partition(":")
+    if not module_name.startswith(MODEL_MODULE_PREFIX):
+        raise CodecError(f"Model {path} is not allowed in the cache")
+
+    cls = getattr(importlib.import_module(module_name), name, None)
+    if not isinstance(cls, type) or not issubclass(cls, BaseModel):
+        raise CodecError(f"{path} is not a Pydantic model")
+    return cls
+
+def _revive(value: Any) -> Any:
+    """
+    Rebuild tagged Pydantic models inside a decoded value.
+    """
+    if isinstance(value, dict):
+        if MODEL_KEY in value and "data" in value and len(value) == 2:
+            return _load_model(value[MODEL_KEY]).model_validate(value["data"])
+        return {key: _revive(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_revive(item) for item in value]
+    return value
+
+class CacheCodec:
+    """
+    Serializes values for the cache and compresses large payloads.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "zstd",
+        compression_threshold: int = 1024
+    ):
+        """
+        Initialize the cache codec.
+
+        Unavailable optional formats fall back to JSON and zlib.
+
+        Args:
+            serializer: "json" or "msgpack"
+            compression: "zstd", "lz4", "zlib" or "none"
+            compression_threshold: Minimum payload size in bytes before compressing
+        """
+        if serializer == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed, caching values as JSON")
+            serializer = "json"
+        if serializer not in ("json", "msgpack"):
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+
+        if (compression == "zstd" and zstandard is None) or (compression == "lz4" and lz4_frame is None):
+            logger.warning(f"{compression} is not installed, compressing cached values with zlib")
+            compression = "zlib"
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.serializer == "msgpack":
+            return msgpack.packb(value, default=_model_default, use_bin_type=True)
+        if orjson is not None:
+            return orjson.dumps(value, default=_model_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=_model_default, separators=(",", ":")).encode()
+
+    def _deserialize(self, payload: bytes, serializer: str) -> Any:
+        if serializer == "msgpack":
+            if msgpack is None:
+                raise CodecError("Cached value is msgpack encoded but msgpack is not installed")
+            value = msgpack.unpackb(payload, raw=False)
+        elif orjson is not None:
+            value = orjson.loads(payload)
+        else:
+            value = json.loads(payload)
+
+        # Only walk the value when it may contain tagged models
+        if MODEL_KEY.encode() in payload:
+            value = _revive(value)
+        return value
+
+    def _compress(self, payload: bytes) -> Tuple[bytes, str]:
+        if self.compression == "none" or len(payload) < self.compression_threshold:
+            return payload, "none"
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(payload), "zstd"
+        if self.compression == "lz4":
+            return lz4_frame.compress(payload), "lz4"
+        return zlib.compress(payload), "zlib"
+
+    def _decompress(self, payload: bytes, compression: str) -> bytes:
+        if compression == "none":
+            return payload
+        if compression == "zlib":
+            return zlib.decompress(payload)
+        if compression == "zstd":
+            if zstandard is None:
+                raise CodecError("Cached value is zstd compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        if lz4_frame is None:
+            raise CodecError("Cached value is lz4 compressed but lz4 is not installed")
+        return lz4_frame.decompress(payload)
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Encode a value.
+
+        Args:
+            value: Value to encode
+
+        Returns:
+            Tagged, possibly compressed payload
+        """
+        payload, compression = self._compress(self._serialize(value))
+        return MAGIC + bytes([COMPRESSIONS[compression] << 4 | SERIALIZERS[self.serializer]]) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Decode a value written by encode, or a legacy untagged JSON value.
+
+        Args:
+            data: Stored payload
+
+        Returns:
+            Decoded value
+
+        Raises:
+            CodecError: If the payload cannot be decoded
+        """
+        if isinstance(data, str):
+            data = data.encode()
+
+        if not data.startswith(MAGIC):
+            try:
+                return json.loads(data)
+            except ValueError as e:
+                raise CodecError(f"Untagged cached value is not JSON: {str(e)}") from e
+
+        if len(data) < 2:
+            raise CodecError("Cached value is missing its format byte")
+
+        format_byte = data[1]
+        serializer = SERIALIZER_NAMES.get(format_byte & 0x0F)
+        compression = COMPRESSION_NAMES.get(format_byte >> 4)
+        if serializer is None or compression is None:
+            raise CodecError(f"Unknown cache format byte: {format_byte:#04x}")
+
+        try:
+            return self._deserialize(self._decompress(data[2:], compression), serializer)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Error decoding cached value: {str(e)}") from e
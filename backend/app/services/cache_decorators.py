@@ -0,0 +1,408 @@
+"""
+Caching decorator for service functions.
+
+``@cached`` stores the result of a sync or async function in Redis under
+``"{namespace}:{key}"``, optionally versioned by a tag so that one counter
+bump invalidates a group of entries. A miss is recomputed once: concurrent
+calls for the same key in a process wait for the first one, and workers in
+other processes wait for a short Redis lease instead of querying the
+database in parallel. Entries may also be served stale for a while after
+they expire, while a single background refresh replaces them.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.cache_service import LOCK_UNAVAILABLE, async_cache, cache
+
+# Seconds between cache reads while another worker holds the lease
+LOCK_POLL_INTERVAL = 0.05
+
+# Prefix of the counters that version the keys of @cached(version=...) entries
+VERSION_PREFIX = "version:"
+
+class _Call:
+    """
+    Result of a sync call shared by every caller waiting for it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Run func, or wait for the call already running for the same key.
+
+        Args:
+            key: Call key
+            func: Function to run
+
+        Returns:
+            Result of the shared call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func, or the call already running for the same key on this event loop.
+
+        Args:
+            key: Call key
+            func: Coroutine function to run
+
+        Returns:
+            Result of the shared call
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._futures.get(loop_key)
+        if future is None:
+            future = self._futures[loop_key] = asyncio.ensure_future(func())
+            future.add_done_callback(lambda _: self._futures.pop(loop_key, None))
+
+        # A cancelled caller must not cancel the call others are waiting for
+        return await asyncio.shield(future)
+
+_flight = SingleFlight()
+
+# Keys being refreshed in the background after serving a stale value
+_refreshing = set()
+_refresh_lock = threading.Lock()
+_refresh_tasks = set()
+
+def _version_key(tag: str) -> str:
+    return f"{VERSION_PREFIX}{tag}"
+
+def bump_version(tag: str) -> Optional[int]:
+    """
+    Invalidate every entry cached under a version tag.
+
+    Args:
+        tag: Version tag, e.g. "course:<id>"
+
+    Returns:
+        New version, or None if failed
+    """
+    return cache.increment(_version_key(tag))
+
+async def bump_version_async(tag: str) -> Optional[int]:
+    """
+    Invalidate every entry cached under a version tag without blocking the event loop.
+
+    Args:
+        tag: Version tag, e.g. "course:<id>"
+
+    Returns:
+        New version, or None if failed
+    """
+    return await async_cache.increment(_version_key(tag))
+
+def _wrap(value: Any, ttl: int, stale_ttl: int) -> Any:
+    """
+    Build the stored entry for a value, recording until when it is fresh if it may be served stale.
+    """
+    if not stale_ttl:
+        return value
+    return {"value": value, "fresh_until": time.time() + ttl}
+
+def _unwrap(entry: Any, stale_ttl: int) -> Tuple[Any, bool]:
+    """
+    Get the value of a stored entry and whether it is still fresh.
+    """
+    if entry is None or not stale_ttl:
+        return entry, True
+    if not isinstance(entry, dict) or "fresh_until" not in entry:
+        return None, False
+    return entry["value"], entry["fresh_until"] > time.time()
+
+def _load(entry_key: str, compute: Callable[[], Any], read: Callable[[str], Any], write: Callable[[str, Any], None]) -> Any:
+    """
+    Recompute a missing value while holding the Redis lease for its key.
+    """
+    token = cache.acquire_lock(entry_key, settings.CACHE_LOCK_TIMEOUT)
+    if token == LOCK_UNAVAILABLE:
+        return compute()
+
+    if token is None:
+        # Another worker is recomputing the value, wait for it to land or for
+        # the lease to be released without one, e.g. for a None result
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        value = None
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            locked = cache.is_locked(entry_key)
+            value = read(entry_key)
+            if value is not None or not locked:
+                break
+        return value if value is not None else compute()
+
+    try:
+        # The value may have been stored just before the lease was taken
+        value = read(entry_key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                write(entry_key, value)
+        return value
+    finally:
+        cache.release_lock(entry_key, token)
+
+async def _load_async(
+    entry_key: str,
+    compute: Callable[[], Awaitable[Any]],
+    read: Callable[[str], Awaitable[Any]],
+    write: Callable[[str, Any], Awaitable[None]]
+) -> Any:
+    """
+    Recompute a missing value while holding the Redis lease for its key, without blocking the event loop.
+    """
+    token = await async_cache.acquire_lock(entry_key, settings.CACHE_LOCK_TIMEOUT)
+    if token == LOCK_UNAVAILABLE:
+        return await compute()
+
+    if token is None:
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        value = None
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            locked = await async_cache.is_locked(entry_key)
+            value = await read(entry_key)
+            if value is not None or not locked:
+                break
+        return value if value is not None else await compute()
+
+    try:
+        value = await read(entry_key)
+        if value is None:
+            value = await compute()
+            if value is not None:
+                await write(entry_key, value)
+        return value
+    finally:
+        await async_cache.release_lock(entry_key, token)
+
+def _claim_refresh(entry_key: str) -> bool:
+    """
+    Mark a key as being refreshed in this process, returning False if it already is.
+    """
+    with _refresh_lock:
+        if entry_key in _refreshing:
+            return False
+        _refreshing.add(entry_key)
+        return True
+
+def _revalidate(entry_key: str, compute: Callable[[], Any], write: Callable[[str, Any], None]) -> None:
+    """
+    Refresh a stale value in a background thread.
+    """
+    if not _claim_refresh(entry_key):
+        return
+
+    def refresh():
+        try:
+            # Skip the refresh when another worker is already doing it
+            token = cache.acquire_lock(entry_key, settings.CACHE_LOCK_TIMEOUT)
+            if token is None:
+                return
+            try:
+                value = compute()
+                if value is not None:
+                    write(entry_key, value)
+            finally:
+                cache.release_lock(entry_key, token)
+        except Exception as e:
+            logger.error(f"Error refreshing cached value {entry_key}: {str(e)}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(entry_key)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+def _revalidate_async(
+    entry_key: str,
+    compute: Callable[[], Awaitable[Any]],
+    write: Callable[[str, Any], Awaitable[None]]
+) -> None:
+    """
+    Refresh a stale value in a background task.
+    """
+    if not _claim_refresh(entry_key):
+        return
+
+    async def refresh():
+        try:
+            token = await async_cache.acquire_lock(entry_key, settings.CACHE_LOCK_TIMEOUT)
+            if token is None:
+                return
+            try:
+                value = await compute()
+                if value is not None:
+                    await write(entry_key, value)
+            finally:
+                await async_cache.release_lock(entry_key, token)
+        except Exception as e:
+            logger.error(f"Error refreshing cached value {entry_key}: {str(e)}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(entry_key)
+
+    # Keep a reference so the task is not garbage collected while running
+    task = asyncio.ensure_future(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+def cached(
+    namespace: str,
+    ttl: int = 300,
+    key: Optional[Callable[..., Any]] = None,
+    version: Optional[Callable[..., str]] = None,
+    stale_ttl: int = 0
+) -> Callable:
+    """
+    Cache the results of a sync or async function.
+
+    None results are not cached. With ``version``, the key also holds the
+    current version of a tag derived from the arguments, so bump_version
+    invalidates every entry under that tag at once. With ``stale_ttl``,
+    values older than ``ttl`` are still served for that many more seconds
+    while they are refreshed in the background.
+
+    The decorated function gains ``cache_key``, ``invalidate``, ``store``
+    and their async variants, which take the same arguments as the
+    function (``store`` takes the value first). Sync and async functions
+    decorated with the same namespace and key share their entries.
+
+    Args:
+        namespace: Key namespace, also selecting the local cache TTL
+        ttl: Seconds a value is fresh (default: 5 minutes)
+        key: Function building the key from the call arguments (default: every argument joined by ":")
+        version: Function building the version tag from the call arguments (optional)
+        stale_ttl: Seconds a value may be served stale after ttl (default: never)
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def cache_key(*args, **kwargs) -> str:
+            """
+            Get the key of an entry, without its version.
+            """
+            if key is not None:
+                return f"{namespace}:{key(*args, **kwargs)}"
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return f"{namespace}:" + ":".join(str(value) for value in bound.arguments.values())
+
+        def entry_key(args: tuple, kwargs: dict) -> str:
+            if version is None:
+                return cache_key(*args, **kwargs)
+            current = cache.get(_version_key(version(*args, **kwargs))) or 0
+            return f"{cache_key(*args, **kwargs)}:v{current}"
+
+        async def entry_key_async(args: tuple, kwargs: dict) -> str:
+            if version is None:
+                return cache_key(*args, **kwargs)
+            current = await async_cache.get(_version_key(version(*args, **kwargs))) or 0
+            return f"{cache_key(*args, **kwargs)}:v{current}"
+
+        def read(full_key: str) -> Any:
+            return _unwrap(cache.get(full_key), stale_ttl)[0]
+
+        def write(full_key: str, value: Any) -> None:
+            cache.set(full_key, _wrap(value, ttl, stale_ttl), expire=ttl + stale_ttl)
+
+        async def read_async(full_key: str) -> Any:
+            return _unwrap(await async_cache.get(full_key), stale_ttl)[0]
+
+        async def write_async(full_key: str, value: Any) -> None:
+            await async_cache.set(full_key, _wrap(value, ttl, stale_ttl), expire=ttl + stale_ttl)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                full_key = await entry_key_async(args, kwargs)
+                compute = lambda: func(*args, **kwargs)
+
+                value, fresh = _unwrap(await async_cache.get(full_key), stale_ttl)
+                if value is not None:
+                    if not fresh:
+                        _revalidate_async(full_key, compute, write_async)
+                    return value
+                return await _flight.do_async(full_key, lambda: _load_async(full_key, compute, read_async, write_async))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                full_key = entry_key(args, kwargs)
+                compute = lambda: func(*args, **kwargs)
+
+                value, fresh = _unwrap(cache.get(full_key), stale_ttl)
+                if value is not None:
+                    if not fresh:
+                        _revalidate(full_key, compute, write)
+                    return value
+                return _flight.do(full_key, lambda: _load(full_key, compute, read, write))
+
+        def invalidate(*args, **kwargs) -> bool:
+            if version is not None:
+                return bump_version(version(*args, **kwargs)) is not None
+            return cache.delete(cache_key(*args, **kwargs))
+
+        async def invalidate_async(*args, **kwargs) -> bool:
+            if version is not None:
+                return await bump_version_async(version(*args, **kwargs)) is not None
+            return await async_cache.delete(cache_key(*args, **kwargs))
+
+        def store(value: Any, *args, **kwargs) -> None:
+            write(entry_key(args, kwargs), value)
+
+        async def store_async(value: Any, *args, **kwargs) -> None:
+            await write_async(await entry_key_async(args, kwargs), value)
+
+        wrapper.cache_key = cache_key
+        wrapper.invalidate = invalidate
+        wrapper.invalidate_async = invalidate_async
+        wrapper.store = store
+        wrapper.store_async = store_async
+        return wrapper
+
+    return decorator
@@ -2,18 +2,186 @@
 Cache service for the application.
 """
 
-import json
-import pickle
-from typing import Any, Optional, Union
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.monitoring import CACHE_OPERATION_DURATION, CACHE_OPERATIONS_TOTAL, observe_dependency
+from app.services.cache_codec import CacheCodec, CodecError
+
+# Pub/sub channel used to evict keys from every process's local cache
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Append to a list, trim it to the newest ARGV[2] items and refresh its expiry
+PUSH_CAPPED_SCRIPT = """
+redis.call("RPUSH", KEYS[1], ARGV[1])
+redis.call("LTRIM", KEYS[1], -tonumber(ARGV[2]), -1)
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return redis.call("LLEN", KEYS[1])
+"""
+
+# Increment a counter and set its expiry only when the increment created it
+INCREMENT_WITH_TTL_SCRIPT = """
+local value = redis.call("INCRBY", KEYS[1], ARGV[1])
+if redis.call("TTL", KEYS[1]) == -1 then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return value
+"""
+
+# Delete a lock only if it is still held by the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Prefix of the keys used to lease the recomputation of a cache key
+LOCK_PREFIX = "lock:"
+
+# Token returned by acquire_lock when Redis could not be asked for the lease
+LOCK_UNAVAILABLE = "unavailable"
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    """
+    Pipeline recording each execution as one "PIPELINE" cache operation.
+    """
+
+    def execute(self, raise_on_error: bool = True) -> List[Any]:
+        with observe_dependency(CACHE_OPERATION_DURATION, CACHE_OPERATIONS_TOTAL, operation="PIPELINE"):
+            return super().execute(raise_on_error)
+
+class InstrumentedRedis(redis.Redis):
+    """
+    Redis client recording the duration and outcome of every command.
+    """
+
+    def execute_command(self, *args, **options) -> Any:
+        with observe_dependency(CACHE_OPERATION_DURATION, CACHE_OPERATIONS_TOTAL, operation=str(args[0]).upper()):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+class AsyncInstrumentedPipeline(redis.asyncio.client.Pipeline):
+    """
+    Async pipeline recording each execution as one "PIPELINE" cache operation.
+    """
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        with observe_dependency(CACHE_OPERATION_DURATION, CACHE_OPERATIONS_TOTAL, operation="PIPELINE"):
+            return await super().execute(raise_on_error)
+
+class AsyncInstrumentedRedis(redis.asyncio.Redis):
+    """
+    Async Redis client recording the duration and outcome of every command.
+    """
+
+    async def execute_command(self, *args, **options) -> Any:
+        with observe_dependency(CACHE_OPERATION_DURATION, CACHE_OPERATIONS_TOTAL, operation=str(args[0]).upper()):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> AsyncInstrumentedPipeline:
+        return AsyncInstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+def parse_namespace_ttls(spec: str) -> Dict[str, int]:
+    """
+    Parse a "namespace=seconds,..." specification.
+    
+    Args:
+        spec: Comma-separated namespace TTLs
+        
+    Returns:
+        Mapping of namespace to TTL in seconds
+    """
+    ttls = {}
+    for item in spec.split(","):
+        namespace, _, seconds = item.partition("=")
+        if namespace.strip() and seconds.strip():
+            ttls[namespace.strip()] = int(seconds)
+    return ttls
+
+class LocalCache:
+    """
+    Size-bounded, thread-safe LRU cache with per-entry expiry.
+    """
+    
+    def __init__(self, max_entries: int):
+        """
+        Initialize the local cache.
+        
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value if it is present and not expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value for ttl seconds.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        """
+        Remove a value.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """
+        Remove every value.
+        """
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
 
 class RedisCache:
     """
-    Redis cache service.
+    Redis cache service with an in-process cache in front of it.
+    
+    Keys whose namespace (the part before the first ":") has a TTL in
+    CACHE_NAMESPACE_TTLS are also kept in a local LRU cache for that many
+    seconds, saving a Redis round trip on hot reads. Every write publishes
+    the key on a Redis channel so other workers evict their local copy.
+    Other in-process state can follow writes made elsewhere by subscribing
+    to keys published on the same channel.
     """
     
     def __init__(self):
@@ -22,14 +190,143 @@ class RedisCache:
         """
         self.redis_url = settings.REDIS_URL
         self.client = None
+        self.local = LocalCache(settings.CACHE_L1_MAX_ENTRIES)
+        self.namespace_ttls = parse_namespace_ttls(settings.CACHE_NAMESPACE_TTLS)
+        self.instance_id = uuid.uuid4().hex
+        self._listener = None
+        self._subscribers: Dict[str, Callable[[str], None]] = {}
+        self._scripts: Dict[str, Any] = {}
+        self.codec = CacheCodec(
+            serializer=settings.CACHE_SERIALIZER,
+            compression=settings.CACHE_COMPRESSION,
+            compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD
+        )
         
         if self.redis_url:
             try:
-                self.client = redis.from_url(self.redis_url)
+                self.client = InstrumentedRedis.from_url(self.redis_url)
                 logger.info("Redis cache initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Redis cache: {str(e)}")
     
+    def _local_ttl(self, key: str) -> Optional[int]:
+        """
+        Get the local cache TTL of a key, or None if its namespace is not cached locally.
+        """
+        return self.namespace_ttls.get(key.split(":", 1)[0])
+    
+    def start_invalidation_listener(self) -> bool:
+        """
+        Subscribe to invalidation messages from other processes.
+        
+        Returns:
+            True if the listener is running, False otherwise
+        """
+        if not self.client or not (self.namespace_ttls or self._subscribers):
+            return False
+        if self._listener is not None:
+            return True
+        
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._handle_invalidation})
+            self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            return True
+        except Exception as e:
+            logger.error(f"Error starting cache invalidation listener: {str(e)}")
+            return False
+    
+    def stop_invalidation_listener(self) -> None:
+        """
+        Stop listening for invalidation messages.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+    
+    def subscribe(self, prefix: str, handler: Callable[[str], None]) -> None:
+        """
+        Call a handler with every key starting with a prefix that another process publishes.
+        
+        Must be called before the invalidation listener starts. Handlers run
+        on the listener thread.
+        
+        Args:
+            prefix: Key prefix
+            handler: Function called with the published key
+        """
+        self._subscribers[prefix] = handler
+    
+    def publish(self, key: str) -> None:
+        """
+        Publish a key to the subscribers of every other process.
+        
+        Args:
+            key: Key to publish
+        """
+        if not self.client:
+            return
+        
+        try:
+            self.client.publish(INVALIDATION_CHANNEL, f"{self.instance_id} {key}")
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+    
+    def _handle_invalidation(self, message: Dict) -> None:
+        """
+        Evict a key published by another process from the local cache and pass it to its subscriber.
+        """
+        data = message.get("data")
+        if isinstance(data, bytes):
+            data = data.decode()
+        sender, _, key = str(data).partition(" ")
+        if sender == self.instance_id:
+            return
+        
+        for prefix, handler in self._subscribers.items():
+            if key.startswith(prefix):
+                try:
+                    handler(key)
+                except Exception as e:
+                    logger.error(f"Error handling published key {key}: {str(e)}")
+        
+        if key == "*":
+            self.local.clear()
+        else:
+            self.local.delete(key)
+    
+    def _invalidate(self, key: str) -> None:
+        """
+        Evict a key from the local cache of this and every other process.
+        
+        Args:
+            key: Cache key, or "*" for every key
+        """
+        if key == "*":
+            self.local.clear()
+        elif self._local_ttl(key) is None:
+            return
+        else:
+            self.local.delete(key)
+        
+        self.publish(key)
+    
+    def _serialize(self, value: Any) -> bytes:
+        """
+        Encode a value with the cache codec.
+        """
+        return self.codec.encode(value)
+    
+    def _deserialize(self, value: bytes) -> Any:
+        """
+        Decode a value with the cache codec, treating undecodable values as missing.
+        """
+        try:
+            return self.codec.decode(value)
+        except CodecError as e:
+            logger.warning(f"Ignoring undecodable cached value: {str(e)}")
+            return None
+    
     def get(self, key: str) -> Optional[Any]:
         """
         Get a value from the cache.
@@ -44,18 +341,17 @@ class RedisCache:
             return None
         
         try:
-            value = self.client.get(key)
+            # Serialized values are kept locally so callers never share mutable objects
+            local_ttl = self._local_ttl(key)
+            value = self.local.get(key) if local_ttl else None
+            
+            if value is None:
+                value = self.client.get(key)
+                if value and local_ttl:
+                    self.local.set(key, value, local_ttl)
+            
             if value:
-                try:
-                    # Try to deserialize as JSON
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    try:
-                        # Try to deserialize as pickle
-                        return pickle.loads(value)
-                    except:
-                        # Return as is
-                        return value
+                return self._deserialize(value)
             return None
         except Exception as e:
             logger.error(f"Error getting value from cache: {str(e)}")
@@ -65,8 +361,7 @@ class RedisCache:
         self,
         key: str,
         value: Any,
-        expire: int = 3600,
-        use_pickle: bool = False
+        expire: int = 3600
     ) -> bool:
         """
         Set a value in the cache.
@@ -75,7 +370,6 @@ class RedisCache:
             key: Cache key
             value: Value to cache
             expire: Expiration time in seconds (default: 1 hour)
-            use_pickle: Whether to use pickle for serialization
             
         Returns:
             True if successful, False otherwise
@@ -84,16 +378,14 @@ class RedisCache:
             return False
         
         try:
-            if use_pickle:
-                serialized = pickle.dumps(value)
-            else:
-                try:
-                    serialized = json.dumps(value)
-                except (TypeError, OverflowError):
-                    serialized = pickle.dumps(value)
-                    use_pickle = True
+            serialized = self._serialize(value)
             
             self.client.set(key, serialized, ex=expire)
+            self._invalidate(key)
+            
+            local_ttl = self._local_ttl(key)
+            if local_ttl:
+                self.local.set(key, serialized, min(local_ttl, expire))
             return True
         except Exception as e:
             logger.error(f"Error setting value in cache: {str(e)}")
@@ -114,6 +406,7 @@ class RedisCache:
         
         try:
             self.client.delete(key)
+            self._invalidate(key)
             return True
         except Exception as e:
             logger.error(f"Error deleting value from cache: {str(e)}")
@@ -131,6 +424,7 @@ class RedisCache:
         
         try:
             self.client.flushdb()
+            self._invalidate("*")
             return True
         except Exception as e:
             logger.error(f"Error flushing cache: {str(e)}")
@@ -170,7 +464,9 @@ class RedisCache:
             return None
         
         try:
-            return self.client.incrby(key, amount)
+            value = self.client.incrby(key, amount)
+            self._invalidate(key)
+            return value
         except Exception as e:
             logger.error(f"Error incrementing value in cache: {str(e)}")
             return None
@@ -190,10 +486,558 @@ class RedisCache:
             return False
         
         try:
-            return bool(self.client.expire(key, seconds))
+            result = bool(self.client.expire(key, seconds))
+            self._invalidate(key)
+            return result
         except Exception as e:
             logger.error(f"Error setting expiration for key in cache: {str(e)}")
             return False
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values in one round trip.
+        
+        Args:
+            keys: Cache keys
+            
+        Returns:
+            Mapping of found keys to their values
+        """
+        if not self.client or not keys:
+            return {}
+        
+        try:
+            raw: Dict[str, Any] = {}
+            missing = []
+            for key in keys:
+                value = self.local.get(key) if self._local_ttl(key) else None
+                if value is None:
+                    missing.append(key)
+                else:
+                    raw[key] = value
+            
+            if missing:
+                for key, value in zip(missing, self.client.mget(missing)):
+                    if not value:
+                        continue
+                    raw[key] = value
+                    local_ttl = self._local_ttl(key)
+                    if local_ttl:
+                        self.local.set(key, value, local_ttl)
+            
+            return {key: self._deserialize(value) for key, value in raw.items() if value}
+        except Exception as e:
+            logger.error(f"Error getting values from cache: {str(e)}")
+            return {}
+    
+    def set_many(self, values: Dict[str, Any], expire: int = 3600) -> bool:
+        """
+        Set several values in one round trip.
+        
+        Args:
+            values: Mapping of cache keys to values
+            expire: Expiration time in seconds (default: 1 hour)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        if not values:
+            return True
+        
+        try:
+            serialized = {key: self._serialize(value) for key, value in values.items()}
+            
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in serialized.items():
+                pipe.set(key, value, ex=expire)
+            pipe.execute()
+            
+            for key, value in serialized.items():
+                self._invalidate(key)
+                local_ttl = self._local_ttl(key)
+                if local_ttl:
+                    self.local.set(key, value, min(local_ttl, expire))
+            return True
+        except Exception as e:
+            logger.error(f"Error setting values in cache: {str(e)}")
+            return False
+    
+    def delete_many(self, keys: List[str]) -> bool:
+        """
+        Delete several values in one round trip.
+        
+        Args:
+            keys: Cache keys
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        if not keys:
+            return True
+        
+        try:
+            self.client.delete(*keys)
+            for key in keys:
+                self._invalidate(key)
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting values from cache: {str(e)}")
+            return False
+    
+    @contextmanager
+    def pipeline(self, invalidate: Iterable[str] = ()) -> Iterator[Optional[Any]]:
+        """
+        Queue commands and run them atomically in one round trip on exit.
+        
+        Commands go straight to Redis, so keys written in a locally cached
+        namespace must be listed in ``invalidate``. Yields None when Redis
+        is not configured. Errors raised by Redis are logged and the commands
+        are discarded.
+        
+        Args:
+            invalidate: Keys to evict from local caches once the commands ran
+            
+        Yields:
+            Redis transaction pipeline, or None
+        """
+        if not self.client:
+            yield None
+            return
+        
+        pipe = self.client.pipeline(transaction=True)
+        try:
+            yield pipe
+            
+            try:
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Error executing cache pipeline: {str(e)}")
+                return
+            
+            for key in invalidate:
+                self._invalidate(key)
+        finally:
+            pipe.reset()
+    
+    def _run_script(self, source: str, key: str, args: List[Any], pipeline: Optional[Any] = None) -> Any:
+        """
+        Run a Lua script on one key, or queue it on a pipeline.
+        
+        Scripts run directly are registered once and called by SHA. Queued
+        scripts are sent with EVAL, because pipelines check that registered
+        scripts exist with an extra round trip on every execute.
+        """
+        if pipeline is not None:
+            return pipeline.eval(source, 1, key, *args)
+        
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.client.register_script(source)
+        return script(keys=[key], args=args)
+    
+    def push_capped(
+        self,
+        key: str,
+        value: Any,
+        max_length: int,
+        expire: int = 3600,
+        pipeline: Optional[Any] = None
+    ) -> bool:
+        """
+        Append a value to a list, keep only its newest max_length items and refresh its expiry.
+        
+        Args:
+            key: Cache key of the list
+            value: Value to append
+            max_length: Maximum number of items kept
+            expire: Expiration time in seconds (default: 1 hour)
+            pipeline: Pipeline to queue the command on instead of running it (optional)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        
+        try:
+            self._run_script(PUSH_CAPPED_SCRIPT, key, [self._serialize(value), max_length, expire], pipeline)
+            return True
+        except Exception as e:
+            logger.error(f"Error pushing value to cache list: {str(e)}")
+            return False
+    
+    def get_list(self, key: str) -> List[Any]:
+        """
+        Get every item of a list written by push_capped.
+        
+        Args:
+            key: Cache key of the list
+            
+        Returns:
+            List items, oldest first
+        """
+        if not self.client:
+            return []
+        
+        try:
+            return [self._deserialize(item) for item in self.client.lrange(key, 0, -1)]
+        except Exception as e:
+            logger.error(f"Error getting list from cache: {str(e)}")
+            return []
+    
+    def increment_with_ttl(
+        self,
+        key: str,
+        amount: int = 1,
+        expire: int = 3600,
+        pipeline: Optional[Any] = None
+    ) -> Optional[int]:
+        """
+        Increment a counter, setting its expiry when the increment creates it.
+        
+        Args:
+            key: Cache key
+            amount: Amount to increment by
+            expire: Expiration time in seconds for a new counter (default: 1 hour)
+            pipeline: Pipeline to queue the command on instead of running it (optional)
+            
+        Returns:
+            New value, or None if failed or queued on a pipeline
+        """
+        if not self.client:
+            return None
+        
+        try:
+            value = self._run_script(INCREMENT_WITH_TTL_SCRIPT, key, [amount, expire], pipeline)
+            if pipeline is not None:
+                return None
+            self._invalidate(key)
+            return value
+        except Exception as e:
+            logger.error(f"Error incrementing value in cache: {str(e)}")
+            return None
+
+    def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """
+        Try to take a short-lived lease on a cache key.
+        
+        Args:
+            key: Cache key to lock
+            timeout: Seconds after which the lease expires on its own
+            
+        Returns:
+            Token to release the lease with, None if it is held elsewhere, or
+            LOCK_UNAVAILABLE if Redis is not configured or failed
+        """
+        if not self.client:
+            return LOCK_UNAVAILABLE
+        
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(LOCK_PREFIX + key, token, nx=True, px=int(timeout * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring cache lock: {str(e)}")
+            return LOCK_UNAVAILABLE
+    
+    def is_locked(self, key: str) -> bool:
+        """
+        Check whether a lease taken with acquire_lock is still held.
+        
+        Args:
+            key: Locked cache key
+            
+        Returns:
+            True if the lease is held, False if it is free or Redis failed
+        """
+        if not self.client:
+            return False
+        
+        try:
+            return bool(self.client.exists(LOCK_PREFIX + key))
+        except Exception as e:
+            logger.error(f"Error checking cache lock: {str(e)}")
+            return False
+    
+    def release_lock(self, key: str, token: str) -> bool:
+        """
+        Release a lease taken with acquire_lock.
+        
+        Args:
+            key: Locked cache key
+            token: Token returned by acquire_lock
+            
+        Returns:
+            True if the lease was released, False otherwise
+        """
+        if not self.client or token == LOCK_UNAVAILABLE:
+            return False
+        
+        try:
+            return bool(self._run_script(RELEASE_LOCK_SCRIPT, LOCK_PREFIX + key, [token]))
+        except Exception as e:
+            logger.error(f"Error releasing cache lock: {str(e)}")
+            return False
+
 # Create cache service instance
 cache = RedisCache()
+
+class AsyncRedisCache:
+    """
+    Async Redis cache for use inside the event loop.
+    
+    Commands go through a redis.asyncio connection pool. The local cache,
+    codec and invalidation channel are shared with a RedisCache, so both
+    clients read and evict the same entries.
+    """
+    
+    def __init__(self, sync_cache: RedisCache):
+        """
+        Initialize the async Redis cache service.
+        
+        Args:
+            sync_cache: Synchronous cache whose local cache and codec are shared
+        """
+        self.sync = sync_cache
+        self.client = None
+        self._scripts: Dict[str, Any] = {}
+        
+        if sync_cache.redis_url:
+            try:
+                pool = redis.asyncio.ConnectionPool.from_url(
+                    sync_cache.redis_url,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS
+                )
+                self.client = AsyncInstrumentedRedis(connection_pool=pool)
+                logger.info("Async Redis cache initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize async Redis cache: {str(e)}")
+    
+    async def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+    
+    async def _invalidate(self, key: str) -> None:
+        """
+        Evict a key from the local cache of this and every other process.
+        """
+        if self.sync._local_ttl(key) is None:
+            return
+        
+        self.sync.local.delete(key)
+        try:
+            await self.client.publish(INVALIDATION_CHANNEL, f"{self.sync.instance_id} {key}")
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+    
+    async def publish(self, key: str) -> None:
+        """
+        Publish a key to the subscribers of every other process.
+        
+        Args:
+            key: Key to publish
+        """
+        if not self.client:
+            return
+        
+        try:
+            await self.client.publish(INVALIDATION_CHANNEL, f"{self.sync.instance_id} {key}")
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the cache.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value or None if not found
+        """
+        if not self.client:
+            return None
+        
+        try:
+            local_ttl = self.sync._local_ttl(key)
+            value = self.sync.local.get(key) if local_ttl else None
+            
+            if value is None:
+                value = await self.client.get(key)
+                if value and local_ttl:
+                    self.sync.local.set(key, value, local_ttl)
+            
+            if value:
+                return self.sync._deserialize(value)
+            return None
+        except Exception as e:
+            logger.error(f"Error getting value from cache: {str(e)}")
+            return None
+    
+    async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """
+        Set a value in the cache.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            expire: Expiration time in seconds (default: 1 hour)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        
+        try:
+            serialized = self.sync._serialize(value)
+            
+            await self.client.set(key, serialized, ex=expire)
+            await self._invalidate(key)
+            
+            local_ttl = self.sync._local_ttl(key)
+            if local_ttl:
+                self.sync.local.set(key, serialized, min(local_ttl, expire))
+            return True
+        except Exception as e:
+            logger.error(f"Error setting value in cache: {str(e)}")
+            return False
+    
+    async def delete(self, key: str) -> bool:
+        """
+        Delete a value from the cache.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        
+        try:
+            await self.client.delete(key)
+            await self._invalidate(key)
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting value from cache: {str(e)}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """
+        Check if a key exists in the cache.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            True if the key exists, False otherwise
+        """
+        if not self.client:
+            return False
+        
+        try:
+            return bool(await self.client.exists(key))
+        except Exception as e:
+            logger.error(f"Error checking if key exists in cache: {str(e)}")
+            return False
+    
+    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
+        """
+        Increment a value in the cache.
+        
+        Args:
+            key: Cache key
+            amount: Amount to increment by
+            
+        Returns:
+            New value or None if failed
+        """
+        if not self.client:
+            return None
+        
+        try:
+            value = await self.client.incrby(key, amount)
+            await self._invalidate(key)
+            return value
+        except Exception as e:
+            logger.error(f"Error incrementing value in cache: {str(e)}")
+            return None
+    
+    async def acquire_lock(self, key: str, timeout: float) -> Optional[str]:
+        """
+        Try to take a short-lived lease on a cache key.
+        
+        Args:
+            key: Cache key to lock
+            timeout: Seconds after which the lease expires on its own
+            
+        Returns:
+            Token to release the lease with, None if it is held elsewhere, or
+            LOCK_UNAVAILABLE if Redis is not configured or failed
+        """
+        if not self.client:
+            return LOCK_UNAVAILABLE
+        
+        token = uuid.uuid4().hex
+        try:
+            if await self.client.set(LOCK_PREFIX + key, token, nx=True, px=int(timeout * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring cache lock: {str(e)}")
+            return LOCK_UNAVAILABLE
+    
+    async def is_locked(self, key: str) -> bool:
+        """
+        Check whether a lease taken with acquire_lock is still held.
+        
+        Args:
+            key: Locked cache key
+            
+        Returns:
+            True if the lease is held, False if it is free or Redis failed
+        """
+        if not self.client:
+            return False
+        
+        try:
+            return bool(await self.client.exists(LOCK_PREFIX + key))
+        except Exception as e:
+            logger.error(f"Error checking cache lock: {str(e)}")
+            return False
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """
+        Release a lease taken with acquire_lock.
+        
+        Args:
+            key: Locked cache key
+            token: Token returned by acquire_lock
+            
+        Returns:
+            True if the lease was released, False otherwise
+        """
+        if not self.client or token == LOCK_UNAVAILABLE:
+            return False
+        
+        try:
+            script = self._scripts.get(RELEASE_LOCK_SCRIPT)
+            if script is None:
+                script = self._scripts[RELEASE_LOCK_SCRIPT] = self.client.register_script(RELEASE_LOCK_SCRIPT)
+            return bool(await script(keys=[LOCK_PREFIX + key], args=[token]))
+        except Exception as e:
+            logger.error(f"Error releasing cache lock: {str(e)}")
+            return False
+
+# Create async cache service instance sharing the local cache of the sync one
+async_cache = AsyncRedisCache(cache)
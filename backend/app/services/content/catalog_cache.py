@@ -0,0 +1,65 @@
+"""
+Read-through cache for the course catalog.
+
+Catalog reads are cached with @cached under versioned keys. Courses and
+their module lists share a per-course version and content lists use a
+per-module version, so a write invalidates everything derived from the
+changed course or module with one counter increment. Expired entries are
+served for CATALOG_STALE_TTL more seconds while they are refreshed in the
+background, so page loads never wait on a refresh.
+"""
+
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.services.cache_decorators import bump_version, bump_version_async, cached
+
+def course_tag(course_id: str) -> str:
+    return f"course:{course_id}"
+
+def module_tag(module_id: str) -> str:
+    return f"module:{module_id}"
+
+def catalog_cached(namespace: str, key: Callable[..., str], version: Optional[Callable[..., str]] = None) -> Callable:
+    """
+    Cache a catalog read with the catalog TTLs.
+
+    Args:
+        namespace: Key namespace
+        key: Function building the key from the call arguments
+        version: Function building the version tag from the call arguments (optional)
+
+    Returns:
+        Decorator
+    """
+    return cached(
+        namespace,
+        ttl=settings.CATALOG_CACHE_TTL,
+        key=key,
+        version=version,
+        stale_ttl=settings.CATALOG_STALE_TTL
+    )
+
+def invalidate_course(course_id: str) -> None:
+    """
+    Invalidate a cached course and its module list.
+    """
+    bump_version(course_tag(course_id))
+
+async def invalidate_course_async(course_id: str) -> None:
+    """
+    Invalidate a cached course and its module list without blocking the event loop.
+    """
+    await bump_version_async(course_tag(course_id))
+
+def invalidate_module(module_id: str) -> None:
+    """
+    Invalidate the cached content list of a module.
+    """
+    bump_version(module_tag(module_id))
+
+async def invalidate_module_async(module_id: str) -> None:
+    """
+    Invalidate the cached content list of a module without blocking the event loop.
+    """
+    await bump_version_async(module_tag(module_id))
@@ -3,44 +3,14 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.schemas.content import Content, ContentCreate, ContentUpdate
-from app.services.db import get_supabase_client
+from app.services.content.catalog_cache import catalog_cached, invalidate_module, invalidate_module_async, module_tag
+from app.services.db import get_async_supabase_client, get_supabase_client
+from app.services.search_service import search_service
 
-def get_content_by_module(module_id: str) -> List[Content]:
-    """
-    Get all content items for a specific module.
-    """
-    supabase = get_supabase_client()
-    response = supabase.table("content_items").select("*").eq("module_id", module_id).execute()
-    
-    content_items = []
-    for content_data in response.data:
-        content_items.append(
-            Content(
-                content_id=content_data["content_id"],
-                module_id=content_data["module_id"],
-                title=content_data["title"],
-                type=content_data["type"],
-                content=content_data["content"],
-                metadata=content_data["metadata"],
-                version=content_data["version"],
-                created_at=content_data["created_at"],
-                updated_at=content_data.get("updated_at")
-            )
-        )
-    
-    return content_items
-
-def get_content(content_id: str) -> Optional[Content]:
+def _to_content(content_data: dict) -> Content:
     """
-    Get a specific content item by ID.
+    Build a Content schema from a content_items row.
     """
-    supabase = get_supabase_client()
-    response = supabase.table("content_items").select("*").eq("content_id", content_id).execute()
-    
-    if not response.data:
-        return None
-    
-    content_data = response.data[0]
     return Content(
         content_id=content_data["content_id"],
         module_id=content_data["module_id"],
@@ -53,51 +23,25 @@ def get_content(content_id: str) -> Optional[Content]:
         updated_at=content_data.get("updated_at")
     )
 
-def create_content(content_in: ContentCreate) -> Content:
+def _new_content_row(content_in: ContentCreate) -> dict:
     """
-    Create a new content item.
+    Build the row inserted for a new content item.
     """
-    supabase = get_supabase_client()
-    
-    content_id = str(uuid4())
-    now = datetime.utcnow().isoformat()
-    
-    new_content = {
-        "content_id": content_id,
+    return {
+        "content_id": str(uuid4()),
         "module_id": str(content_in.module_id),
         "title": content_in.title,
         "type": content_in.type,
         "content": content_in.content,
         "metadata": content_in.metadata,
         "version": content_in.version,
-        "created_at": now
+        "created_at": datetime.utcnow().isoformat()
     }
-    
-    supabase.table("content_items").insert(new_content).execute()
-    
-    return Content(
-        content_id=content_id,
-        module_id=content_in.module_id,
-        title=content_in.title,
-        type=content_in.type,
-        content=content_in.content,
-        metadata=content_in.metadata,
-        version=content_in.version,
-        created_at=now
-    )
 
-def update_content(content_id: str, content_in: ContentUpdate) -> Optional[Content]:
+def _content_update_data(content_in: ContentUpdate) -> dict:
     """
-    Update a content item.
+    Build the column updates for a content item update.
     """
-    supabase = get_supabase_client()
-    
-    # Get current content data
-    current_content = get_content(content_id)
-    if not current_content:
-        return None
-    
-    # Prepare update data
     update_data = {}
     if content_in.title is not None:
         update_data["title"] = content_in.title
@@ -107,11 +51,122 @@ def update_content(content_id: str, content_in: ContentUpdate) -> Optional[Conte
         update_data["metadata"] = content_in.metadata
     if content_in.version is not None:
         update_data["version"] = content_in.version
-    
+
     update_data["updated_at"] = datetime.utcnow().isoformat()
-    
+    return update_data
+
+@catalog_cached("content", key=lambda module_id: f"module:{module_id}", version=module_tag)
+def get_content_by_module(module_id: str) -> List[Content]:
+    """
+    Get all content items for a specific module.
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("content_items").select("*").eq("module_id", module_id).execute()
+
+    return [_to_content(content_data) for content_data in response.data]
+
+@catalog_cached("content", key=lambda content_id: content_id)
+def get_content(content_id: str) -> Optional[Content]:
+    """
+    Get a specific content item by ID.
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("content_items").select("*").eq("content_id", content_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_content(response.data[0])
+
+def create_content(content_in: ContentCreate) -> Content:
+    """
+    Create a new content item.
+    """
+    supabase = get_supabase_client()
+
+    new_content = _new_content_row(content_in)
+    supabase.table("content_items").insert(new_content).execute()
+    search_service.index_content(new_content)
+    invalidate_module(new_content["module_id"])
+
+    content = _to_content(new_content)
+    get_content.store(content, new_content["content_id"])
+    return content
+
+def update_content(content_id: str, content_in: ContentUpdate) -> Optional[Content]:
+    """
+    Update a content item.
+    """
+    supabase = get_supabase_client()
+
+    # Get current content data
+    current_content = get_content(content_id)
+    if not current_content:
+        return None
+
     # Update content
-    supabase.table("content_items").update(update_data).eq("content_id", content_id).execute()
-    
+    response = supabase.table("content_items").update(_content_update_data(content_in)).eq("content_id", content_id).execute()
+    if response.data:
+        search_service.index_content(response.data[0])
+    invalidate_module(str(current_content.module_id))
+    get_content.invalidate(content_id)
+
     # Get updated content
     return get_content(content_id)
+
+@catalog_cached("content", key=lambda module_id: f"module:{module_id}", version=module_tag)
+async def get_content_by_module_async(module_id: str) -> List[Content]:
+    """
+    Get all content items for a specific module without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("content_items").select("*").eq("module_id", module_id).execute()
+
+    return [_to_content(content_data) for content_data in response.data]
+
+@catalog_cached("content", key=lambda content_id: content_id)
+async def get_content_async(content_id: str) -> Optional[Content]:
+    """
+    Get a specific content item by ID without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("content_items").select("*").eq("content_id", content_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_content(response.data[0])
+
+async def create_content_async(content_in: ContentCreate) -> Content:
+    """
+    Create a new content item without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+
+    new_content = _new_content_row(content_in)
+    await supabase.table("content_items").insert(new_content).execute()
+    await search_service.index_content_async(new_content)
+    await invalidate_module_async(new_content["module_id"])
+
+    content = _to_content(new_content)
+    await get_content_async.store_async(content, new_content["content_id"])
+    return content
+
+async def update_content_async(content_id: str, content_in: ContentUpdate) -> Optional[Content]:
+    """
+    Update a content item without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+
+    # Update content and return the updated row in one round trip
+    response = await supabase.table("content_items").update(_content_update_data(content_in)).eq("content_id", content_id).execute()
+
+    if not response.data:
+        return None
+
+    await search_service.index_content_async(response.data[0])
+    await invalidate_module_async(response.data[0]["module_id"])
+
+    content = _to_content(response.data[0])
+    await get_content_async.store_async(content, content_id)
+    return content
@@ -3,36 +3,14 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.schemas.course import Course, CourseCreate, CourseUpdate
-from app.services.db import get_supabase_client
+from app.services.content.catalog_cache import catalog_cached, course_tag, invalidate_course, invalidate_course_async
+from app.services.db import get_async_supabase_client, get_supabase_client
+from app.services.search_service import search_service
 
-def get_courses(skip: int = 0, limit: int = 100) -> List[Course]:
-    supabase = get_supabase_client()
-    response = supabase.table("courses").select("*").range(skip, skip + limit - 1).execute()
-    
-    courses = []
-    for course_data in response.data:
-        courses.append(
-            Course(
-                id=course_data["course_id"],
-                title=course_data["title"],
-                description=course_data.get("description"),
-                status=course_data["status"],
-                instructor_id=course_data["instructor_id"],
-                created_at=course_data["created_at"],
-                updated_at=course_data.get("updated_at")
-            )
-        )
-    
-    return courses
-
-def get_course(course_id: str) -> Optional[Course]:
-    supabase = get_supabase_client()
-    response = supabase.table("courses").select("*").eq("course_id", course_id).execute()
-    
-    if not response.data:
-        return None
-    
-    course_data = response.data[0]
+def _to_course(course_data: dict) -> Course:
+    """
+    Build a Course schema from a courses row.
+    """
     return Course(
         id=course_data["course_id"],
         title=course_data["title"],
@@ -43,41 +21,23 @@ def get_course(course_id: str) -> Optional[Course]:
         updated_at=course_data.get("updated_at")
     )
 
-def create_course(course_in: CourseCreate, instructor_id: UUID) -> Course:
-    supabase = get_supabase_client()
-    
-    course_id = str(uuid4())
-    now = datetime.utcnow().isoformat()
-    
-    new_course = {
-        "course_id": course_id,
+def _new_course_row(course_in: CourseCreate, instructor_id: UUID) -> dict:
+    """
+    Build the row inserted for a new course.
+    """
+    return {
+        "course_id": str(uuid4()),
         "title": course_in.title,
         "description": course_in.description,
         "status": course_in.status,
         "instructor_id": str(instructor_id),
-        "created_at": now
+        "created_at": datetime.utcnow().isoformat()
     }
-    
-    supabase.table("courses").insert(new_course).execute()
-    
-    return Course(
-        id=course_id,
-        title=course_in.title,
-        description=course_in.description,
-        status=course_in.status,
-        instructor_id=instructor_id,
-        created_at=now
-    )
 
-def update_course(course_id: str, course_in: CourseUpdate) -> Optional[Course]:
-    supabase = get_supabase_client()
-    
-    # Get current course data
-    current_course = get_course(course_id)
-    if not current_course:
-        return None
-    
-    # Prepare update data
+def _course_update_data(course_in: CourseUpdate) -> dict:
+    """
+    Build the column updates for a course update.
+    """
     update_data = {}
     if course_in.title is not None:
         update_data["title"] = course_in.title
@@ -85,11 +45,104 @@ def update_course(course_id: str, course_in: CourseUpdate) -> Optional[Course]:
         update_data["description"] = course_in.description
     if course_in.status is not None:
         update_data["status"] = course_in.status
-    
+
     update_data["updated_at"] = datetime.utcnow().isoformat()
-    
+    return update_data
+
+def get_courses(skip: int = 0, limit: int = 100) -> List[Course]:
+    supabase = get_supabase_client()
+    response = supabase.table("courses").select("*").range(skip, skip + limit - 1).execute()
+
+    return [_to_course(course_data) for course_data in response.data]
+
+@catalog_cached("course", key=lambda course_id: course_id, version=course_tag)
+def get_course(course_id: str) -> Optional[Course]:
+    supabase = get_supabase_client()
+    response = supabase.table("courses").select("*").eq("course_id", course_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_course(response.data[0])
+
+def create_course(course_in: CourseCreate, instructor_id: UUID) -> Course:
+    supabase = get_supabase_client()
+
+    new_course = _new_course_row(course_in, instructor_id)
+    supabase.table("courses").insert(new_course).execute()
+    search_service.index_course(new_course)
+
+    course = _to_course(new_course)
+    get_course.store(course, new_course["course_id"])
+    return course
+
+def update_course(course_id: str, course_in: CourseUpdate) -> Optional[Course]:
+    supabase = get_supabase_client()
+
+    # Get current course data
+    current_course = get_course(course_id)
+    if not current_course:
+        return None
+
     # Update course
-    supabase.table("courses").update(update_data).eq("course_id", course_id).execute()
-    
+    response = supabase.table("courses").update(_course_update_data(course_in)).eq("course_id", course_id).execute()
+    if response.data:
+        search_service.index_course(response.data[0])
+    invalidate_course(course_id)
+
     # Get updated course
     return get_course(course_id)
+
+async def get_courses_async(skip: int = 0, limit: int = 100) -> List[Course]:
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("courses").select("*").range(skip, skip + limit - 1).execute()
+
+    return [_to_course(course_data) for course_data in response.data]
+
+@catalog_cached("course", key=lambda course_id: course_id, version=course_tag)
+async def get_course_async(course_id: str) -> Optional[Course]:
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("courses").select("*").eq("course_id", course_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_course(response.data[0])
+
+async def get_courses_by_ids_async(course_ids: List[str]) -> List[Course]:
+    if not course_ids:
+        return []
+
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("courses").select("*").in_("course_id", course_ids).execute()
+
+    # Preserve the order of the requested IDs
+    courses_by_id = {course_data["course_id"]: course_data for course_data in response.data}
+    return [_to_course(courses_by_id[course_id]) for course_id in course_ids if course_id in courses_by_id]
+
+async def create_course_async(course_in: CourseCreate, instructor_id: UUID) -> Course:
+    supabase = await get_async_supabase_client()
+
+    new_course = _new_course_row(course_in, instructor_id)
+    await supabase.table("courses").insert(new_course).execute()
+    await search_service.index_course_async(new_course)
+
+    course = _to_course(new_course)
+    await get_course_async.store_async(course, new_course["course_id"])
+    return course
+
+async def update_course_async(course_id: str, course_in: CourseUpdate) -> Optional[Course]:
+    supabase = await get_async_supabase_client()
+
+    # Update course and return the updated row in one round trip
+    response = await supabase.table("courses").update(_course_update_data(course_in)).eq("course_id", course_id).execute()
+
+    if not response.data:
+        return None
+
+    await search_service.index_course_async(response.data[0])
+    await invalidate_course_async(course_id)
+
+    course = _to_course(response.data[0])
+    await get_course_async.store_async(course, course_id)
+    return course
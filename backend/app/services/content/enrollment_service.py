@@ -3,8 +3,8 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.schemas.course import Course
-from app.services.content.course_service import get_course
-from app.services.db import get_supabase_client
+from app.services.content.course_service import get_course, get_course_async, get_courses_by_ids_async
+from app.services.db import get_async_supabase_client, get_supabase_client
 
 def enroll_user_in_course(user_id: UUID, course_id: str) -> bool:
     """
@@ -135,3 +135,106 @@ def mark_course_completed(user_id: UUID, course_id: str) -> bool:
     supabase.table("enrollments").update({"completed_at": now}).eq("user_id", str(user_id)).eq("course_id", course_id).execute()
     
     return True
+
+async def enroll_user_in_course_async(user_id: UUID, course_id: str) -> bool:
+    """
+    Enroll a user in a course without blocking the event loop.
+    Returns True if enrollment was successful, False otherwise.
+    """
+    supabase = await get_async_supabase_client()
+    
+    # Check if course exists
+    course = await get_course_async(course_id=course_id)
+    if not course:
+        return False
+    
+    # Check if user is already enrolled
+    response = await supabase.table("enrollments").select("enrollment_id").eq("user_id", str(user_id)).eq("course_id", course_id).execute()
+    
+    if response.data:
+        # User is already enrolled
+        return True
+    
+    # Create new enrollment
+    new_enrollment = {
+        "enrollment_id": str(uuid4()),
+        "user_id": str(user_id),
+        "course_id": course_id,
+        "enrolled_at": datetime.utcnow().isoformat(),
+        "status": "active"
+    }
+    
+    await supabase.table("enrollments").insert(new_enrollment).execute()
+    
+    return True
+
+async def unenroll_user_from_course_async(user_id: UUID, course_id: str) -> bool:
+    """
+    Unenroll a user from a course without blocking the event loop.
+    Returns True if unenrollment was successful, False otherwise.
+    """
+    supabase = await get_async_supabase_client()
+    
+    # Update enrollment status to inactive; no returned rows means not enrolled
+    response = await supabase.table("enrollments").update({"status": "inactive"}).eq("user_id", str(user_id)).eq("course_id", course_id).execute()
+    
+    return bool(response.data)
+
+async def get_enrolled_courses_async(user_id: UUID) -> List[Course]:
+    """
+    Get all courses that a user is enrolled in without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    
+    # Get all active enrollments for the user
+    enrollments = await supabase.table("enrollments").select("course_id").eq("user_id", str(user_id)).eq("status", "active").execute()
+    
+    course_ids = [enrollment["course_id"] for enrollment in enrollments.data]
+    
+    # Get course details for all enrollments in one query
+    return await get_courses_by_ids_async(course_ids)
+
+async def get_course_enrollments_async(course_id: str) -> List[dict]:
+    """
+    Get all users enrolled in a course without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    
+    # Get all active enrollments for the course
+    enrollments = await supabase.table("enrollments").select("*").eq("course_id", course_id).eq("status", "active").execute()
+    
+    user_ids = [enrollment["user_id"] for enrollment in enrollments.data]
+    if not user_ids:
+        return []
+    
+    # Get user details for all enrollments in one query
+    users = await supabase.table("users").select("user_id, username, email").in_("user_id", user_ids).execute()
+    users_by_id = {user["user_id"]: user for user in users.data}
+    
+    enrollment_details = []
+    for enrollment in enrollments.data:
+        user = users_by_id.get(enrollment["user_id"])
+        
+        if user:
+            enrollment_details.append({
+                "enrollment_id": enrollment["enrollment_id"],
+                "user_id": enrollment["user_id"],
+                "username": user["username"],
+                "email": user["email"],
+                "enrolled_at": enrollment["enrolled_at"]
+            })
+    
+    return enrollment_details
+
+async def mark_course_completed_async(user_id: UUID, course_id: str) -> bool:
+    """
+    Mark a course as completed for a user without blocking the event loop.
+    Returns True if successful, False otherwise.
+    """
+    supabase = await get_async_supabase_client()
+    
+    # Update enrollment with completion date; no returned rows means not enrolled
+    now = datetime.utcnow().isoformat()
+    response = await supabase.table("enrollments").update({"completed_at": now}).eq("user_id", str(user_id)).eq("course_id", course_id).execute()
+    
+    return bool(response.data)
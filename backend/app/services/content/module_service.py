@@ -3,43 +3,13 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.schemas.module import Module, ModuleCreate, ModuleUpdate
-from app.services.db import get_supabase_client
+from app.services.content.catalog_cache import catalog_cached, course_tag, invalidate_course, invalidate_course_async
+from app.services.db import get_async_supabase_client, get_supabase_client
 
-def get_modules_by_course(course_id: str) -> List[Module]:
-    """
-    Get all modules for a specific course.
-    """
-    supabase = get_supabase_client()
-    response = supabase.table("modules").select("*").eq("course_id", course_id).order("sequence_number").execute()
-    
-    modules = []
-    for module_data in response.data:
-        modules.append(
-            Module(
-                module_id=module_data["module_id"],
-                course_id=module_data["course_id"],
-                title=module_data["title"],
-                description=module_data.get("description"),
-                sequence_number=module_data["sequence_number"],
-                status=module_data["status"],
-                created_at=module_data["created_at"],
-                updated_at=module_data.get("updated_at")
-            )
-        )
-    
-    return modules
-
-def get_module(module_id: str) -> Optional[Module]:
+def _to_module(module_data: dict) -> Module:
     """
-    Get a specific module by ID.
+    Build a Module schema from a modules row.
     """
-    supabase = get_supabase_client()
-    response = supabase.table("modules").select("*").eq("module_id", module_id).execute()
-    
-    if not response.data:
-        return None
-    
-    module_data = response.data[0]
     return Module(
         module_id=module_data["module_id"],
         course_id=module_data["course_id"],
@@ -51,49 +21,24 @@ def get_module(module_id: str) -> Optional[Module]:
         updated_at=module_data.get("updated_at")
     )
 
-def create_module(module_in: ModuleCreate) -> Module:
+def _new_module_row(module_in: ModuleCreate) -> dict:
     """
-    Create a new module.
+    Build the row inserted for a new module.
     """
-    supabase = get_supabase_client()
-    
-    module_id = str(uuid4())
-    now = datetime.utcnow().isoformat()
-    
-    new_module = {
-        "module_id": module_id,
+    return {
+        "module_id": str(uuid4()),
         "course_id": str(module_in.course_id),
         "title": module_in.title,
         "description": module_in.description,
         "sequence_number": module_in.sequence_number,
         "status": module_in.status,
-        "created_at": now
+        "created_at": datetime.utcnow().isoformat()
     }
-    
-    supabase.table("modules").insert(new_module).execute()
-    
-    return Module(
-        module_id=module_id,
-        course_id=module_in.course_id,
-        title=module_in.title,
-        description=module_in.description,
-        sequence_number=module_in.sequence_number,
-        status=module_in.status,
-        created_at=now
-    )
 
-def update_module(module_id: str, module_in: ModuleUpdate) -> Optional[Module]:
+def _module_update_data(module_in: ModuleUpdate) -> dict:
     """
-    Update a module.
+    Build the column updates for a module update.
     """
-    supabase = get_supabase_client()
-    
-    # Get current module data
-    current_module = get_module(module_id)
-    if not current_module:
-        return None
-    
-    # Prepare update data
     update_data = {}
     if module_in.title is not None:
         update_data["title"] = module_in.title
@@ -103,11 +48,107 @@ def update_module(module_id: str, module_in: ModuleUpdate) -> Optional[Module]:
         update_data["sequence_number"] = module_in.sequence_number
     if module_in.status is not None:
         update_data["status"] = module_in.status
-    
+
     update_data["updated_at"] = datetime.utcnow().isoformat()
-    
+    return update_data
+
+@catalog_cached("module", key=lambda course_id: f"course:{course_id}", version=course_tag)
+def get_modules_by_course(course_id: str) -> List[Module]:
+    """
+    Get all modules for a specific course.
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("modules").select("*").eq("course_id", course_id).order("sequence_number").execute()
+
+    return [_to_module(module_data) for module_data in response.data]
+
+def get_module(module_id: str) -> Optional[Module]:
+    """
+    Get a specific module by ID.
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("modules").select("*").eq("module_id", module_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_module(response.data[0])
+
+def create_module(module_in: ModuleCreate) -> Module:
+    """
+    Create a new module.
+    """
+    supabase = get_supabase_client()
+
+    new_module = _new_module_row(module_in)
+    supabase.table("modules").insert(new_module).execute()
+    invalidate_course(new_module["course_id"])
+
+    return _to_module(new_module)
+
+def update_module(module_id: str, module_in: ModuleUpdate) -> Optional[Module]:
+    """
+    Update a module.
+    """
+    supabase = get_supabase_client()
+
+    # Get current module data
+    current_module = get_module(module_id)
+    if not current_module:
+        return None
+
     # Update module
-    supabase.table("modules").update(update_data).eq("module_id", module_id).execute()
-    
+    supabase.table("modules").update(_module_update_data(module_in)).eq("module_id", module_id).execute()
+    invalidate_course(str(current_module.course_id))
+
     # Get updated module
     return get_module(module_id)
+
+@catalog_cached("module", key=lambda course_id: f"course:{course_id}", version=course_tag)
+async def get_modules_by_course_async(course_id: str) -> List[Module]:
+    """
+    Get all modules for a specific course without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("modules").select("*").eq("course_id", course_id).order("sequence_number").execute()
+
+    return [_to_module(module_data) for module_data in response.data]
+
+async def get_module_async(module_id: str) -> Optional[Module]:
+    """
+    Get a specific module by ID without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+    response = await supabase.table("modules").select("*").eq("module_id", module_id).execute()
+
+    if not response.data:
+        return None
+
+    return _to_module(response.data[0])
+
+async def create_module_async(module_in: ModuleCreate) -> Module:
+    """
+    Create a new module without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+
+    new_module = _new_module_row(module_in)
+    await supabase.table("modules").insert(new_module).execute()
+    await invalidate_course_async(new_module["course_id"])
+
+    return _to_module(new_module)
+
+async def update_module_async(module_id: str, module_in: ModuleUpdate) -> Optional[Module]:
+    """
+    Update a module without blocking the event loop.
+    """
+    supabase = await get_async_supabase_client()
+
+    # Update module and return the updated row in one round trip
+    response = await supabase.table("modules").update(_module_update_data(module_in)).eq("module_id", module_id).execute()
+
+    if not response.data:
+        return None
+
+    await invalidate_course_async(response.data[0]["course_id"])
+    return _to_module(response.data[0])
@@ -3,8 +3,10 @@ from typing import Dict, List, Optional
 from uuid import UUID, uuid4
 
 from app.schemas.quiz import Question, Quiz, QuizCreate, QuizSubmission, QuizSubmissionCreate, QuizUpdate
+from app.services.cache_decorators import cached
 from app.services.db import get_supabase_client
 
+@cached("quiz", ttl=300, key=lambda quiz_id: quiz_id)
 def get_quiz(quiz_id: str) -> Optional[Quiz]:
     """
     Get a specific quiz by ID.
@@ -139,6 +141,7 @@ def update_quiz(quiz_id: str, quiz_in: QuizUpdate) -> Optional[Quiz]:
     
     # Update quiz
     supabase.table("quizzes").update(update_data).eq("quiz_id", quiz_id).execute()
+    get_quiz.invalidate(quiz_id)
     
     # Get updated quiz
     return get_quiz(quiz_id=quiz_id)
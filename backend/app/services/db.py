@@ -1,9 +1,438 @@
-from supabase import create_client, Client
+"""
+Shared Supabase client for the application.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+from supabase import (
+    acreate_client,
+    create_client,
+    AsyncClient,
+    AsyncClientOptions,
+    Client,
+    ClientOptions
+)
 
 from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import DB_QUERIES_TOTAL, DB_QUERY_DURATION, count_db_query, observe_dependency
+
+# PostgREST and Postgres error codes of calls to functions that do not exist
+MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+
+# PostgREST operation by HTTP method
+POSTGREST_OPERATIONS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+def query_labels(request: httpx.Request) -> Tuple[str, str]:
+    """
+    Get the table and operation of a Supabase HTTP request for metrics.
+
+    Args:
+        request: Outgoing request
+
+    Returns:
+        (table, operation), e.g. ("courses", "select") or ("user_login_days", "rpc").
+        Auth and storage requests are reported as ("auth", method) and ("storage", method).
+    """
+    path = request.url.path
+    _, found, rest = path.partition("/rest/v1/")
+    if not found:
+        return path.strip("/").split("/")[0] or "unknown", request.method.lower()
+
+    if rest.startswith("rpc/"):
+        return rest[4:].split("/")[0], "rpc"
+
+    operation = POSTGREST_OPERATIONS.get(request.method, request.method.lower())
+    if operation == "insert" and "merge-duplicates" in request.headers.get("prefer", ""):
+        operation = "upsert"
+    return rest.split("/")[0], operation
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """
+    HTTP transport recording the duration and outcome of every Supabase request.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        table, operation = query_labels(request)
+        count_db_query()
+        with observe_dependency(DB_QUERY_DURATION, DB_QUERIES_TOTAL, table=table, operation=operation) as result:
+            response = self._transport.handle_request(request)
+            if response.status_code >= 400:
+                result["outcome"] = "error"
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Async HTTP transport recording the duration and outcome of every Supabase request.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        table, operation = query_labels(request)
+        count_db_query()
+        with observe_dependency(DB_QUERY_DURATION, DB_QUERIES_TOTAL, table=table, operation=operation) as result:
+            response = await self._transport.handle_async_request(request)
+            if response.status_code >= 400:
+                result["outcome"] = "error"
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+class SupabaseClientManager:
+    """
+    Process-wide manager for a pooled Supabase client.
+
+    A single client (and its underlying keep-alive HTTP connection pool) is
+    created lazily and reused by every service, instead of building a new
+    client and TLS session per call. An async client with its own pool is
+    available for code running on the event loop.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        health_check_interval: int = 30
+    ):
+        """
+        Initialize the client manager.
+
+        Args:
+            url: Supabase project URL
+            key: Supabase API key
+            pool_size: Maximum number of concurrent HTTP connections
+            max_keepalive: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Read/write/pool timeout in seconds
+            connect_timeout: Connect timeout in seconds
+            health_check_interval: Minimum seconds between health checks
+        """
+        self.url = url
+        self.key = key
+        self.pool_size = pool_size
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.health_check_interval = health_check_interval
+
+        self._client: Optional[Client] = None
+        self._http_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self._async_client: Optional[AsyncClient] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._last_health_check = 0.0
+        self._healthy = True
+        self._last_async_health_check = 0.0
+        self._async_healthy = True
+
+    def _pool_options(self) -> dict:
+        """
+        Connection pool options shared by the sync and async transports.
+
+        Returns:
+            Keyword arguments for the httpx transport constructors
+        """
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            "http2": True
+        }
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def _create_http_client(self) -> httpx.Client:
+        """
+        Create the pooled, instrumented HTTP client shared by PostgREST, auth and storage.
+
+        Returns:
+            Configured httpx client
+        """
+        transport = InstrumentedTransport(httpx.HTTPTransport(**self._pool_options()))
+        return httpx.Client(transport=transport, timeout=self._timeout())
+
+    def _create_async_http_client(self) -> httpx.AsyncClient:
+        """
+        Create the pooled, instrumented async HTTP client.
+
+        Returns:
+            Configured async httpx client
+        """
+        transport = AsyncInstrumentedTransport(httpx.AsyncHTTPTransport(**self._pool_options()))
+        return httpx.AsyncClient(transport=transport, timeout=self._timeout())
+
+    def _create_client(self) -> Client:
+        """
+        Create a Supabase client bound to the pooled HTTP client.
+
+        Returns:
+            Supabase client
+        """
+        self._http_client = self._create_http_client()
+        options = ClientOptions(
+            postgrest_client_timeout=self.timeout,
+            httpx_client=self._http_client
+        )
+        client = create_client(self.url, self.key, options=options)
+        logger.info(f"Supabase client initialized (pool size: {self.pool_size})")
+        return client
+
+    async def _create_async_client(self) -> AsyncClient:
+        """
+        Create an async Supabase client bound to a pooled async HTTP client.
+
+        Returns:
+            Async Supabase client
+        """
+        self._async_http_client = self._create_async_http_client()
+        options = AsyncClientOptions(
+            postgrest_client_timeout=self.timeout,
+            httpx_client=self._async_http_client
+        )
+        client = await acreate_client(self.url, self.key, options=options)
+        logger.info(f"Async Supabase client initialized (pool size: {self.pool_size})")
+        return client
+
+    def get_client(self) -> Client:
+        """
+        Get the shared Supabase client, creating it on first use and
+        replacing it after a failed health check.
+
+        A replaced client is not closed, since services may still hold it;
+        its connections are released when it is garbage collected.
+
+        Returns:
+            Supabase client
+        """
+        client = self._client
+        if client is not None and self._healthy:
+            return client
+
+        with self._lock:
+            if self._client is None or not self._healthy:
+                self._client = self._create_client()
+                self._healthy = True
+            return self._client
+
+    async def get_async_client(self) -> AsyncClient:
+        """
+        Get the shared async Supabase client, creating it on first use and
+        replacing it after a failed health check.
+
+        As with ``get_client``, a replaced client is left open for its holders.
+
+        Returns:
+            Async Supabase client
+        """
+        client = self._async_client
+        if client is not None and self._async_healthy:
+            return client
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        async with self._async_lock:
+            if self._async_client is None or not self._async_healthy:
+                self._async_client = await self._create_async_client()
+                self._async_healthy = True
+            return self._async_client
+
+    def check_health(self, force: bool = False) -> bool:
+        """
+        Check that the database is reachable through the pooled client.
+
+        The result is cached for ``health_check_interval`` seconds. A failed
+        check marks the client unhealthy so the next ``get_client`` call
+        rebuilds the connection pool.
+
+        Args:
+            force: Ignore the cached result and check now
+
+        Returns:
+            True if the database is reachable, False otherwise
+        """
+        now = time.monotonic()
+        if not force and now - self._last_health_check < self.health_check_interval:
+            return self._healthy
+
+        self._last_health_check = now
+        try:
+            self.get_client().table("courses").select("course_id").limit(1).execute()
+            self._healthy = True
+        except Exception as e:
+            logger.error(f"Supabase health check failed: {str(e)}")
+            self._healthy = False
+
+        return self._healthy
+
+    async def check_async_health(self, force: bool = False) -> bool:
+        """
+        Check that the database is reachable through the pooled async client.
+
+        Works like ``check_health``: a failed check makes the next
+        ``get_async_client`` call build a new async client.
+
+        Args:
+            force: Ignore the cached result and check now
+
+        Returns:
+            True if the database is reachable, False otherwise
+        """
+        now = time.monotonic()
+        if not force and now - self._last_async_health_check < self.health_check_interval:
+            return self._async_healthy
+
+        self._last_async_health_check = now
+        try:
+            client = await self.get_async_client()
+            await client.table("courses").select("course_id").limit(1).execute()
+            self._async_healthy = True
+        except Exception as e:
+            logger.error(f"Async Supabase health check failed: {str(e)}")
+            self._async_healthy = False
+
+        return self._async_healthy
+
+    def _close_locked(self) -> None:
+        """
+        Close the current HTTP pool. The caller must hold the lock.
+        """
+        if self._http_client is not None:
+            try:
+                self._http_client.close()
+            except Exception as e:
+                logger.error(f"Error closing Supabase HTTP client: {str(e)}")
+        self._http_client = None
+        self._client = None
+
+    def close(self) -> None:
+        """
+        Close the shared client and release its pooled connections.
+        """
+        with self._lock:
+            self._close_locked()
+
+    async def close_async(self) -> None:
+        """
+        Close the shared async client and release its pooled connections.
+        """
+        if self._async_http_client is not None:
+            try:
+                await self._async_http_client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing async Supabase HTTP client: {str(e)}")
+        self._async_http_client = None
+        self._async_client = None
+
+# Create client manager instance
+supabase_manager = SupabaseClientManager(
+    url=settings.SUPABASE_URL,
+    key=settings.SUPABASE_KEY,
+    pool_size=settings.SUPABASE_POOL_SIZE,
+    max_keepalive=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+    timeout=settings.SUPABASE_TIMEOUT,
+    connect_timeout=settings.SUPABASE_CONNECT_TIMEOUT,
+    health_check_interval=settings.SUPABASE_HEALTH_CHECK_INTERVAL
+)
 
 def get_supabase_client() -> Client:
     """
-    Create and return a Supabase client.
+    Return the shared, pooled Supabase client.
+    """
+    return supabase_manager.get_client()
+
+def get_db() -> Generator[Client, None, None]:
+    """
+    FastAPI dependency that provides the shared Supabase client.
+    """
+    yield supabase_manager.get_client()
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Return the shared, pooled async Supabase client.
+    """
+    return await supabase_manager.get_async_client()
+
+async def get_async_db() -> AsyncGenerator[AsyncClient, None]:
+    """
+    FastAPI dependency that provides the shared async Supabase client.
+    """
+    yield await supabase_manager.get_async_client()
+
+def is_missing_function(error: Exception) -> bool:
+    """
+    Check whether a PostgREST error means a database function does not exist.
+
+    Args:
+        error: Error raised by an RPC call
+
+    Returns:
+        True if the function is not defined (or not in PostgREST's schema cache)
+    """
+    return getattr(error, "code", None) in MISSING_FUNCTION_CODES
+
+def chunked(values: Sequence, size: int) -> Iterator[Sequence]:
+    """
+    Split values into consecutive chunks, keeping IN filters within URL limits.
+
+    Args:
+        values: Values to split
+        size: Maximum chunk size
+
+    Yields:
+        Consecutive slices of values
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def fetch_all(build_query: Callable[[], Any], order: Sequence[str], page_size: int = 1000) -> List[Dict]:
+    """
+    Fetch every row of a query, paging past the PostgREST max-rows limit.
+
+    Pages are only consistent if rows come back in the same order on every
+    request, so the query is sorted by ``order``, which must identify rows
+    uniquely within the result.
+
+    Args:
+        build_query: Callable returning a fresh, unexecuted query builder (table query or RPC)
+        order: Columns to sort by, together unique within the result
+        page_size: Number of rows requested per round trip
+
+    Returns:
+        All matching rows
     """
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    rows: List[Dict] = []
+    offset = 0
+    while True:
+        query = build_query()
+        for column in order:
+            query = query.order(column)
+        page = query.range(offset, offset + page_size - 1).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
@@ -10,6 +10,7 @@ from typing import List, Optional
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.monitoring import EMAIL_SEND_DURATION, EMAILS_SENT_TOTAL, observe_dependency
 
 class EmailService:
     """
@@ -71,29 +72,31 @@ class EmailService:
 
         msg.attach(MIMEText(html_content, 'html'))
 
-        try:
-            # Connect to SMTP server
-            server = smtplib.SMTP(self.host, self.port)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            server.login(self.username, self.password)
-
-            # Send email
-            recipients = [to_email]
-            if cc:
-                recipients.extend(cc)
-            if bcc:
-                recipients.extend(bcc)
-
-            server.sendmail(self.from_email, recipients, msg.as_string())
-            server.quit()
-
-            logger.info(f"Email sent to {to_email}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            return False
+        with observe_dependency(EMAIL_SEND_DURATION, EMAILS_SENT_TOTAL) as result:
+            try:
+                # Connect to SMTP server
+                server = smtplib.SMTP(self.host, self.port)
+                server.ehlo()
+                server.starttls()
+                server.ehlo()
+                server.login(self.username, self.password)
+
+                # Send email
+                recipients = [to_email]
+                if cc:
+                    recipients.extend(cc)
+                if bcc:
+                    recipients.extend(bcc)
+
+                server.sendmail(self.from_email, recipients, msg.as_string())
+                server.quit()
+
+                logger.info(f"Email sent to {to_email}")
+                return True
+            except Exception as e:
+                result["outcome"] = "error"
+                logger.error(f"Failed to send email: {str(e)}")
+                return False
 
     def send_password_reset_email(self, to_email: str, reset_token: str, username: str) -> bool:
         """
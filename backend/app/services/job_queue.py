@@ -0,0 +1,488 @@
+"""
+Background job queue for long-running tasks such as LLM generation.
+
+Requests enqueue a job and get its ID back at once; worker tasks run the
+job's handler off the request path and store its status and result, which
+clients poll. Job records, the pending queue and the retry schedule live in
+Redis, so any worker of any process (the API processes or standalone
+``python -m app.worker`` processes) can run a job enqueued anywhere, with an
+in-process fallback when Redis is unavailable. Enqueueing a job identical to
+one that is still queued or running returns the existing job instead of
+running the work twice. Failed jobs are retried with exponential backoff.
+
+Workers take jobs with BLMOVE into a processing list and hold a lease on
+each running job, renewed by a heartbeat. If a worker dies without a clean
+shutdown (SIGKILL, OOM), its lease expires and any worker puts the job back
+on the queue, so jobs are never stuck in "running".
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.cache_service import async_cache
+
+# Prefix of the Redis keys holding job records
+KEY_PREFIX = "job:"
+
+# Prefix of the Redis keys mapping a job's identity to its pending job ID
+DEDUPE_PREFIX = "job:dedupe:"
+
+# Redis list of job IDs ready to run
+QUEUE_KEY = "jobs:queue"
+
+# Redis sorted set of job IDs waiting for a retry, scored by due time
+DELAYED_KEY = "jobs:delayed"
+
+# Redis list of job IDs taken by a worker and not yet finished
+PROCESSING_KEY = "jobs:processing"
+
+# Statuses of jobs that have not finished yet
+PENDING_STATUSES = ("queued", "running")
+
+# Runs a job from its parameters and returns a JSON-serializable result
+JobHandler = Callable[..., Awaitable[Any]]
+
+class JobFailed(Exception):
+    """
+    Raised by a handler for failures that retrying cannot fix.
+    """
+
+def job_identity(job_type: str, params: Dict[str, Any], user_id: Optional[str] = None) -> str:
+    """
+    Build the deduplication key of a job.
+
+    The owner is part of the key, so users never get each other's jobs,
+    which they could not read.
+
+    Args:
+        job_type: Job type
+        params: Handler parameters
+        user_id: ID of the user owning the job (optional)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    identity = json.dumps([job_type, params, user_id], sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+class JobQueue:
+    """
+    Queue of background jobs run by a pool of asyncio workers.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay: float = 5,
+        result_ttl: int = 86400,
+        lease_timeout: float = 60,
+        client: Optional[Any] = None
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            workers: Number of worker tasks started by start()
+            max_attempts: Maximum number of times a job is run
+            retry_delay: Seconds before the first retry, doubled for each later one
+            result_ttl: Seconds job records are kept
+            lease_timeout: Seconds without a heartbeat after which a running job is taken back
+            client: Async Redis client (default: the async cache's)
+        """
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.result_ttl = result_ttl
+        self.lease_timeout = lease_timeout
+        self.client = client
+        self._last_recovery = 0.0
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        # In-process fallback used when Redis is unavailable
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._timers: set = set()
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """
+        Register the handler of a job type.
+
+        Args:
+            job_type: Job type
+            handler: Coroutine function called with the job's parameters
+        """
+        self._handlers[job_type] = handler
+
+    @property
+    def _redis(self):
+        return self.client if self.client is not None else async_cache.client
+
+    def _local_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def _expire_local(self) -> None:
+        """
+        Drop in-process records of jobs that finished more than result_ttl seconds ago.
+        """
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job["status"] not in PENDING_STATUSES and job["updated_at"] < cutoff:
+                del self._jobs[job_id]
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = time.time()
+        if self._redis is None:
+            self._jobs[job["id"]] = job
+            return
+        await self._redis.set(KEY_PREFIX + job["id"], json.dumps(job, default=str), ex=self.result_ttl)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job record.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Job record, or None if unknown or expired
+        """
+        if self._redis is None:
+            self._expire_local()
+            return self._jobs.get(job_id)
+
+        try:
+            data = await self._redis.get(KEY_PREFIX + job_id)
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.error(f"Error reading job {job_id}: {str(e)}")
+            return None
+
+    async def _find_pending(self, identity: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the queued or running job with an identity, if any.
+        """
+        if self._redis is None:
+            job_id = self._pending.get(identity)
+        else:
+            job_id = await self._redis.get(DEDUPE_PREFIX + identity)
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+        if not job_id:
+            return None
+        job = await self.get(job_id)
+        if job is None or job["status"] not in PENDING_STATUSES or self._lease_expired(job):
+            return None
+        return job
+
+    def _lease_expired(self, job: Dict[str, Any]) -> bool:
+        """
+        Whether a job was taken by a worker that stopped renewing its lease.
+        """
+        return job["status"] == "running" and job.get("lease_until", float("inf")) < time.time()
+
+    async def _claim(self, identity: str, job_id: str) -> bool:
+        """
+        Record a job as the pending job of its identity unless another one is.
+        """
+        if self._redis is None:
+            if identity in self._pending:
+                return False
+            self._pending[identity] = job_id
+            return True
+
+        key = DEDUPE_PREFIX + identity
+        if await self._redis.set(key, job_id, nx=True, ex=self.result_ttl):
+            return True
+        # The previous job finished or its record expired without releasing the key
+        if await self._find_pending(identity) is None:
+            await self._redis.set(key, job_id, ex=self.result_ttl)
+            return True
+        return False
+
+    async def _release(self, job: Dict[str, Any]) -> None:
+        """
+        Allow identical jobs to be enqueued again once a job has finished.
+        """
+        identity = job["identity"]
+        if self._redis is None:
+            if self._pending.get(identity) == job["id"]:
+                del self._pending[identity]
+            return
+
+        key = DEDUPE_PREFIX + identity
+        job_id = await self._redis.get(key)
+        job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+        if job_id == job["id"]:
+            await self._redis.delete(key)
+
+    async def _push(self, job_id: str, delay: float = 0) -> None:
+        """
+        Make a job available to the workers, optionally after a delay.
+        """
+        if self._redis is not None:
+            if delay > 0:
+                await self._redis.zadd(DELAYED_KEY, {job_id: time.time() + delay})
+            else:
+                await self._redis.rpush(QUEUE_KEY, job_id)
+            return
+
+        queue = self._local_queue()
+        if delay <= 0:
+            queue.put_nowait(job_id)
+            return
+
+        def due() -> None:
+            self._timers.discard(handle)
+            queue.put_nowait(job_id)
+
+        handle = asyncio.get_running_loop().call_later(delay, due)
+        self._timers.add(handle)
+
+    async def _pop(self, timeout: float = 1) -> Optional[str]:
+        """
+        Take the next job ID, waiting at most timeout seconds.
+        """
+        if self._redis is None:
+            try:
+                return await asyncio.wait_for(self._local_queue().get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        # Move retries that are due to the queue; ZREM decides which worker moves each one
+        for job_id in await self._redis.zrangebyscore(DELAYED_KEY, "-inf", time.time()):
+            if await self._redis.zrem(DELAYED_KEY, job_id):
+                await self._redis.rpush(QUEUE_KEY, job_id)
+
+        if time.time() - self._last_recovery > self.lease_timeout / 2:
+            self._last_recovery = time.time()
+            await self._recover()
+
+        # The ID stays in the processing list until the attempt is over, so a dead worker's job is not lost
+        job_id = await self._redis.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "LEFT", "RIGHT")
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    async def _ack(self, job_id: str) -> None:
+        """
+        Remove a job from the processing list once its attempt is over.
+        """
+        if self._redis is not None:
+            await self._redis.lrem(PROCESSING_KEY, 0, job_id)
+
+    async def _recover(self) -> None:
+        """
+        Take back the jobs of workers that died, requeueing them or failing them once out of attempts.
+        """
+        for job_id in await self._redis.lrange(PROCESSING_KEY, 0, -1):
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            job = await self.get(job_id)
+            if job is not None and job["status"] in PENDING_STATUSES:
+                # Jobs taken but never started get the same grace period as a lease
+                stale = self._lease_expired(job) or (
+                    job["status"] == "queued" and job["updated_at"] < time.time() - self.lease_timeout
+                )
+                if not stale:
+                    continue
+
+            # LREM decides which worker recovers the job
+            if not await self._redis.lrem(PROCESSING_KEY, 0, job_id) or job is None:
+                continue
+            if job["status"] not in PENDING_STATUSES:
+                continue
+
+            superseded = await self._find_pending(job["identity"]) is not None
+            if superseded or job["attempts"] >= self.max_attempts:
+                logger.error(f"{job['type']} job {job_id} lost its worker after {job['attempts']} attempts")
+                job["status"] = "failed"
+                job["error"] = "Worker stopped before the job finished"
+                await self._save(job)
+                if not superseded:
+                    await self._release(job)
+            else:
+                logger.warning(f"{job['type']} job {job_id} lost its worker, requeueing")
+                job["status"] = "queued"
+                await self._save(job)
+                await self._push(job_id)
+
+    async def enqueue(self, job_type: str, params: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Enqueue a job, or return the identical job that is still pending.
+
+        Args:
+            job_type: Registered job type
+            params: JSON-serializable handler parameters
+            user_id: ID of the user owning the job (optional)
+
+        Returns:
+            Job record
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        user_id = str(user_id) if user_id is not None else None
+        identity = job_identity(job_type, params, user_id)
+        existing = await self._find_pending(identity)
+        if existing is not None:
+            return existing
+
+        now = time.time()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "params": params,
+            "user_id": user_id,
+            "identity": identity,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        if not await self._claim(identity, job["id"]):
+            existing = await self._find_pending(identity)
+            if existing is not None:
+                return existing
+
+        await self._save(job)
+        await self._push(job["id"])
+        logger.info(f"Enqueued {job_type} job {job['id']}")
+        return job
+
+    async def run_job(self, job_id: str) -> None:
+        """
+        Run one attempt of a job and record its outcome.
+
+        Args:
+            job_id: Job ID
+        """
+        job = await self.get(job_id)
+        if job is None or job["status"] not in PENDING_STATUSES:
+            await self._ack(job_id)
+            return
+
+        try:
+            await self._attempt(job)
+        finally:
+            await self._ack(job_id)
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        """
+        Renew the lease of a running job until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.lease_timeout / 3)
+            job["lease_until"] = time.time() + self.lease_timeout
+            await self._save(dict(job))
+
+    async def _attempt(self, job: Dict[str, Any]) -> None:
+        """
+        Run a job's handler under a lease and record the outcome.
+        """
+        job_id = job["id"]
+        handler = self._handlers.get(job["type"])
+        if handler is None:
+            logger.error(f"No handler registered for {job['type']} job {job_id}")
+            job["status"] = "failed"
+            job["error"] = f"Unknown job type: {job['type']}"
+            await self._save(job)
+            await self._release(job)
+            return
+
+        job["status"] = "running"
+        job["attempts"] += 1
+        job["lease_until"] = time.time() + self.lease_timeout
+        await self._save(job)
+
+        try:
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                result = await handler(**job["params"])
+            finally:
+                # Stop renewing before the outcome is saved, so a late renewal cannot overwrite it
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+            job["result"] = result
+            job["status"] = "succeeded"
+            job["error"] = None
+        except asyncio.CancelledError:
+            # Shutdown: leave the job for another worker
+            job["status"] = "queued"
+            job["attempts"] -= 1
+            await self._save(job)
+            await self._push(job_id)
+            raise
+        except Exception as e:
+            job["error"] = str(e)
+            if isinstance(e, JobFailed) or job["attempts"] >= self.max_attempts:
+                logger.error(f"{job['type']} job {job_id} failed after {job['attempts']} attempts: {str(e)}")
+                job["status"] = "failed"
+            else:
+                delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+                logger.warning(f"{job['type']} job {job_id} failed, retrying in {delay}s: {str(e)}")
+                job["status"] = "queued"
+                await self._save(job)
+                await self._push(job_id, delay)
+                return
+
+        await self._save(job)
+        await self._release(job)
+
+    async def _work(self) -> None:
+        """
+        Run jobs until cancelled.
+        """
+        while True:
+            try:
+                job_id = await self._pop()
+                if job_id is not None:
+                    await self.run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in job worker: {str(e)}")
+                await asyncio.sleep(1)
+
+    def start(self, workers: Optional[int] = None) -> List[asyncio.Task]:
+        """
+        Start the worker tasks on the running event loop.
+
+        Args:
+            workers: Number of workers (default: the queue's workers)
+
+        Returns:
+            Worker tasks
+        """
+        for _ in range(self.workers if workers is None else workers):
+            self._tasks.append(asyncio.create_task(self._work()))
+        return self._tasks
+
+    async def stop(self) -> None:
+        """
+        Cancel the worker tasks and wait for them to finish.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for handle in self._timers:
+            handle.cancel()
+        self._timers = set()
+        self._queue = None
+
+# Create job queue instance
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_delay=settings.JOB_RETRY_DELAY,
+    result_ttl=settings.JOB_RESULT_TTL,
+    lease_timeout=settings.JOB_LEASE_TIMEOUT
+)
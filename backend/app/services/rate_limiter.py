@@ -0,0 +1,220 @@
+"""
+Rate limiting with the generic cell rate algorithm (GCRA).
+
+Each bucket stores a single number, its theoretical arrival time (TAT): the
+time at which it would be empty again. A request of a bucket allowing
+``limit`` requests per ``period`` advances the TAT by ``period / limit`` and
+is allowed when the new TAT is at most ``period`` ahead of now. This gives
+smooth sliding-window behaviour with one key per bucket and no timestamps
+lists. Buckets live in Redis so limits hold across workers, with a bounded
+in-process fallback when Redis is unavailable. After a Redis error, requests
+are limited in-process for a short while before Redis is tried again, and
+only the switches between the two are logged.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.cache_service import async_cache
+
+# Check every bucket of a request and update them only if all allow it.
+# KEYS are buckets, ARGV holds an emission interval and a burst size in
+# milliseconds and requests per bucket. Returns allowed, remaining, reset
+# after (ms), retry after (ms) and the 1-based index of the binding bucket.
+GCRA_SCRIPT = """
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local result = nil
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local tat = math.max(tonumber(redis.call("GET", key) or 0), now)
+    local allow_at = tat + interval - interval * burst
+    if allow_at > now then
+        return {0, 0, tat - now, allow_at - now, i}
+    end
+    tats[i] = tat + interval
+    local remaining = math.floor((now - allow_at) / interval)
+    if result == nil or remaining < result[2] then
+        result = {1, remaining, tats[i] - now, 0, i}
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call("SET", key, tats[i], "PX", tats[i] - now)
+end
+return result
+"""
+
+# Prefix of the Redis keys holding bucket TATs
+KEY_PREFIX = "ratelimit:"
+
+class RateLimitRule(NamedTuple):
+    """
+    A limit of requests per period on one bucket.
+    """
+    key: str
+    limit: int
+    period: int
+
+class RateLimitResult(NamedTuple):
+    """
+    Outcome of a rate limit check, reported for the most constraining rule.
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+def parse_route_limits(spec: str) -> List[Tuple[Optional[str], str, int, int]]:
+    """
+    Parse a "[METHOD ]path-prefix=limit/seconds,..." specification.
+
+    Args:
+        spec: Comma-separated route limits, e.g. "POST /api/v1/auth/login=10/60"
+
+    Returns:
+        (method or None, path prefix, limit, period in seconds) tuples
+    """
+    routes = []
+    for item in spec.split(","):
+        route, _, rate = item.partition("=")
+        limit, _, period = rate.partition("/")
+        parts = route.split()
+        if not parts or not limit.strip() or not period.strip():
+            continue
+        method = parts[0].upper() if len(parts) == 2 else None
+        routes.append((method, parts[-1], int(limit), int(period)))
+    return routes
+
+def _interval_ms(rule: RateLimitRule) -> int:
+    """
+    Get the emission interval of a rule in whole milliseconds.
+    """
+    return max(1, round(rule.period * 1000 / rule.limit))
+
+class LocalRateLimiter:
+    """
+    In-process GCRA limiter keeping at most max_keys buckets.
+
+    Buckets are evicted least recently used first. An evicted bucket only
+    forgets requests of a client that has been idle the longest, so memory
+    stays bounded without resetting active clients.
+    """
+
+    def __init__(self, max_keys: int):
+        """
+        Initialize the local rate limiter.
+
+        Args:
+            max_keys: Maximum number of buckets kept
+        """
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, rules: Sequence[RateLimitRule]) -> RateLimitResult:
+        """
+        Count a request against every rule if all of them allow it.
+
+        Args:
+            rules: Rules the request is subject to
+
+        Returns:
+            Rate limit result
+        """
+        now = time.monotonic() * 1000
+        with self._lock:
+            result = None
+            tats = []
+            for rule in rules:
+                interval = _interval_ms(rule)
+                tat = max(self._tats.get(rule.key, 0.0), now)
+                allow_at = tat + interval - interval * rule.limit
+                if allow_at > now:
+                    return RateLimitResult(False, rule.limit, 0, (tat - now) / 1000, (allow_at - now) / 1000)
+                tats.append(tat + interval)
+                remaining = int((now - allow_at) // interval)
+                if result is None or remaining < result.remaining:
+                    result = RateLimitResult(True, rule.limit, remaining, (tats[-1] - now) / 1000, 0.0)
+
+            for rule, tat in zip(rules, tats):
+                self._tats[rule.key] = tat
+                self._tats.move_to_end(rule.key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+            return result
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+class RateLimiter:
+    """
+    GCRA rate limiter backed by Redis, falling back to an in-process limiter.
+    """
+
+    def __init__(self, max_local_keys: int = 10000, redis_retry_interval: float = 5):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_local_keys: Maximum number of buckets kept by the in-process fallback
+            redis_retry_interval: Seconds to limit in-process after a Redis error before trying Redis again
+        """
+        self.local = LocalRateLimiter(max_local_keys)
+        self.redis_retry_interval = redis_retry_interval
+        self._script = None
+        self._redis_failed = False
+        self._retry_redis_at = 0.0
+
+    async def hit(self, rules: Sequence[RateLimitRule]) -> RateLimitResult:
+        """
+        Count a request against every rule in one atomic step.
+
+        Args:
+            rules: Rules the request is subject to
+
+        Returns:
+            Rate limit result for the most constraining rule
+        """
+        client = async_cache.client
+        if client is None or time.monotonic() < self._retry_redis_at:
+            return self.local.hit(rules)
+
+        try:
+            if self._script is None:
+                self._script = client.register_script(GCRA_SCRIPT)
+
+            args = []
+            for rule in rules:
+                args.extend([_interval_ms(rule), rule.limit])
+            allowed, remaining, reset_ms, retry_ms, index = await self._script(
+                keys=[KEY_PREFIX + rule.key for rule in rules],
+                args=args
+            )
+            result = RateLimitResult(
+                bool(allowed),
+                rules[index - 1].limit,
+                int(remaining),
+                int(reset_ms) / 1000,
+                int(retry_ms) / 1000
+            )
+        except Exception as e:
+            if not self._redis_failed:
+                logger.warning(f"Falling back to local rate limiting: {str(e)}")
+            self._redis_failed = True
+            self._retry_redis_at = time.monotonic() + self.redis_retry_interval
+            return self.local.hit(rules)
+
+        if self._redis_failed:
+            logger.info("Rate limiting is back on Redis")
+            self._redis_failed = False
+        return result
+
+# Create rate limiter instance
+rate_limiter = RateLimiter(settings.RATE_LIMIT_LOCAL_MAX_KEYS, settings.RATE_LIMIT_REDIS_RETRY_INTERVAL)
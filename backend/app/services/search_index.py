@@ -0,0 +1,385 @@
+"""
+In-memory inverted index used when database full-text search is unavailable.
+"""
+
+import re
+import sys
+import threading
+from array import array
+from collections import Counter
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Maximum number of vocabulary terms a single query word may expand to
+MAX_PREFIX_EXPANSIONS = 64
+
+# Maximum number of query words whose scored postings are kept
+WORD_CACHE_SIZE = 256
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase, interned word tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    if not text:
+        return []
+    return [sys.intern(token) for token in TOKEN_PATTERN.findall(text.lower())]
+
+class InvertedIndex:
+    """
+    Tokenized inverted index with BM25 ranking and prefix matching.
+
+    Documents are assigned integer slots. Each term's postings are a pair of
+    arrays holding slots and weighted term frequencies, so memory stays close
+    to eight bytes per posting. Updating a document retires its old slot and
+    appends a new one, which keeps postings sorted without rewriting them.
+    Retired slots are dropped when the index is compacted.
+
+    Scoring runs on numpy views of the postings arrays, so a cold query costs
+    a few vectorized passes rather than a Python loop over every posting, and
+    only the best-scoring matches needed to fill the requested page are
+    sorted. The BM25-scored matches of recently queried words and word
+    combinations are cached. Writes evict the cached words that are prefixes
+    of the tokens they touch and every cached combination.
+    """
+
+    def __init__(
+        self,
+        id_field: str,
+        text_fields: Callable[[Dict], Sequence[Tuple[Optional[str], float]]],
+        filter_fields: Sequence[str] = ()
+    ):
+        """
+        Initialize the inverted index.
+
+        Args:
+            id_field: Name of the document ID field
+            text_fields: Function returning (text, weight) pairs for a document
+            filter_fields: Fields stored with each document for filtering
+        """
+        self.id_field = id_field
+        self.text_fields = text_fields
+        self.filter_fields = tuple(filter_fields)
+
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        """
+        Reset the index to an empty state.
+        """
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._slot_attrs: List[Optional[Tuple]] = []
+        self._slot_lengths = array("f")
+        self._slots: Dict[str, int] = {}
+        self._total_length = 0.0
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._word_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._query_cache: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def build(self, documents: Iterable[Dict]) -> None:
+        """
+        Replace the contents of the index with the given documents.
+
+        Args:
+            documents: Documents to index
+        """
+        with self._lock:
+            self._clear()
+            # Sort the vocabulary once at the end instead of inserting every new term
+            self._vocabulary_dirty = True
+            for document in documents:
+                self._add(document)
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+    def upsert(self, document: Dict) -> None:
+        """
+        Add a document or replace its previous version.
+
+        Args:
+            document: Document to index
+        """
+        with self._lock:
+            self._remove(str(document[self.id_field]))
+            self._add(document)
+            if self._retired_slots() > max(1024, len(self._slots)):
+                self._compact()
+
+    def remove(self, document_id: str) -> None:
+        """
+        Remove a document from the index.
+
+        Args:
+            document_id: Document ID
+        """
+        with self._lock:
+            self._remove(str(document_id))
+
+    def _add(self, document: Dict) -> None:
+        """
+        Index a document in a new slot.
+        """
+        slot = len(self._slot_ids)
+        document_id = str(document[self.id_field])
+
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for text, weight in self.text_fields(document):
+            tokens = tokenize(text)
+            length += weight * len(tokens)
+            for token, count in Counter(tokens).items():
+                frequencies[token] = frequencies.get(token, 0.0) + weight * count
+
+        self._query_cache.clear()
+        for token, frequency in frequencies.items():
+            if self._word_cache:
+                for end in range(1, len(token) + 1):
+                    self._word_cache.pop(token[:end], None)
+
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = (array("I"), array("f"))
+                if not self._vocabulary_dirty:
+                    insort(self._vocabulary, token)
+            postings[0].append(slot)
+            postings[1].append(frequency)
+
+        self._slots[document_id] = slot
+        self._slot_ids.append(document_id)
+        self._slot_attrs.append(tuple(str(document.get(field)) for field in self.filter_fields))
+        self._slot_lengths.append(length)
+        self._total_length += length
+
+    def _remove(self, document_id: str) -> None:
+        """
+        Retire the slot of a document if it is indexed.
+        """
+        slot = self._slots.pop(document_id, None)
+        if slot is None:
+            return
+        self._slot_ids[slot] = None
+        self._slot_attrs[slot] = None
+        self._total_length -= self._slot_lengths[slot]
+
+    def _retired_slots(self) -> int:
+        return len(self._slot_ids) - len(self._slots)
+
+    def _compact(self) -> None:
+        """
+        Renumber live slots and drop retired slots from every postings list.
+        """
+        mapping = {}
+        slot_ids: List[Optional[str]] = []
+        slot_attrs: List[Optional[Tuple]] = []
+        slot_lengths = array("f")
+        for old_slot, document_id in enumerate(self._slot_ids):
+            if document_id is None:
+                continue
+            mapping[old_slot] = len(slot_ids)
+            slot_ids.append(document_id)
+            slot_attrs.append(self._slot_attrs[old_slot])
+            slot_lengths.append(self._slot_lengths[old_slot])
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for token, (slots, frequencies) in self._postings.items():
+            new_slots = array("I")
+            new_frequencies = array("f")
+            for slot, frequency in zip(slots, frequencies):
+                new_slot = mapping.get(slot)
+                if new_slot is not None:
+                    new_slots.append(new_slot)
+                    new_frequencies.append(frequency)
+            if new_slots:
+                postings[token] = (new_slots, new_frequencies)
+
+        self._postings = postings
+        self._slot_ids = slot_ids
+        self._slot_attrs = slot_attrs
+        self._slot_lengths = slot_lengths
+        self._slots = {document_id: slot for slot, document_id in enumerate(slot_ids)}
+        self._vocabulary_dirty = True
+        self._word_cache = {}
+        self._query_cache = {}
+
+    def _expand(self, word: str) -> List[str]:
+        """
+        Get the vocabulary terms starting with a query word.
+        """
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+        terms = []
+        index = bisect_left(self._vocabulary, word)
+        while index < len(self._vocabulary) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            term = self._vocabulary[index]
+            if not term.startswith(word):
+                break
+            terms.append(term)
+            index += 1
+        return terms
+
+    def _word_scores(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the BM25 scores of every slot matching a query word as a prefix.
+
+        Returns:
+            Matching slots in ascending order and their scores
+        """
+        entry = self._word_cache.get(word)
+        if entry is not None:
+            return entry
+
+        live_documents = len(self._slots)
+        average_length = self._total_length / live_documents or 1.0
+        lengths = np.frombuffer(self._slot_lengths, dtype=np.float32)
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+
+        terms = self._expand(word)
+        if not terms:
+            entry = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32))
+            self._remember(self._word_cache, word, entry)
+            return entry
+
+        # Score the postings of every expansion in one pass, summing per slot
+        postings = [self._postings[term] for term in terms]
+        counts = [len(slots) for slots, _ in postings]
+        idfs = np.log1p((live_documents - np.array(counts) + 0.5) / (np.array(counts) + 0.5))
+        slots = np.concatenate([np.frombuffer(slots, dtype=np.uintc) for slots, _ in postings])
+        frequencies = np.concatenate([np.frombuffer(frequencies, dtype=np.float32) for _, frequencies in postings])
+        contributions = np.repeat(idfs, counts) * frequencies * (BM25_K1 + 1) / (frequencies + norms[slots])
+        scores = np.bincount(slots, weights=contributions, minlength=len(self._slot_ids))
+
+        # Cached as 32-bit values, eight bytes per match
+        matched = np.flatnonzero(scores)
+        entry = (matched.astype(np.uint32), scores[matched].astype(np.float32))
+        self._remember(self._word_cache, word, entry)
+        return entry
+
+    def _query_matches(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the slots matching every query word.
+
+        Returns:
+            Matching slots and their summed scores
+        """
+        if len(words) == 1:
+            return self._word_scores(words[0])
+
+        key = tuple(sorted(words))
+        matches = self._query_cache.get(key)
+        if matches is not None:
+            return matches
+
+        # Intersect starting from the most selective word
+        entries = sorted((self._word_scores(word) for word in words), key=lambda entry: len(entry[0]))
+        slots, totals = entries[0]
+        lookup = np.zeros(len(self._slot_ids), dtype=np.float32)
+        for other_slots, other_scores in entries[1:]:
+            lookup[other_slots] = other_scores
+            other = lookup[slots]
+            lookup[other_slots] = 0
+            found = other > 0
+            slots = slots[found]
+            totals = totals[found] + other[found]
+
+        matches = (slots, totals)
+        self._remember(self._query_cache, key, matches)
+        return matches
+
+    @staticmethod
+    def _top(slots: np.ndarray, scores: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get at least the count best-scoring slots in rank order, later slots first on ties.
+
+        Slots tied with the last one are all kept, so the result is always a
+        prefix of the full ranking.
+        """
+        if count < len(scores):
+            threshold = np.partition(scores, len(scores) - count)[len(scores) - count]
+            keep = scores >= threshold
+            slots, scores = slots[keep], scores[keep]
+        order = np.lexsort((-slots.astype(np.int64), -scores))
+        return slots[order], scores[order]
+
+    @staticmethod
+    def _remember(cache: Dict, key, value) -> None:
+        """
+        Store a value in a bounded cache, evicting the oldest entry when full.
+        """
+        if len(cache) >= WORD_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        filters: Optional[Dict] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find documents matching every query word as a prefix, ranked by BM25.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results to return
+            offset: Offset for pagination
+            filters: Required values of filter fields (optional)
+
+        Returns:
+            (document ID, score) pairs ordered by descending score
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+
+        required = []
+        for position, field in enumerate(self.filter_fields):
+            if filters and filters.get(field) is not None:
+                required.append((position, str(filters[field])))
+
+        with self._lock:
+            if not self._slots:
+                return []
+
+            # Walk the ranking until the requested page is filled
+            wanted = offset + limit
+            matches: List[Tuple[str, float]] = []
+            slots, scores = self._query_matches(words)
+            count, walked = max(wanted, 64), 0
+            while True:
+                # Filters may reject the best matches, so sort more of the ranking until the page is full
+                top_slots, top_scores = self._top(slots, scores, count)
+                for slot, score in zip(top_slots[walked:].tolist(), top_scores[walked:].tolist()):
+                    attrs = self._slot_attrs[slot]
+                    if attrs is None or any(attrs[position] != value for position, value in required):
+                        continue
+                    matches.append((self._slot_ids[slot], score))
+                    if len(matches) >= wanted:
+                        break
+                if len(matches) >= wanted or len(top_slots) >= len(slots):
+                    break
+                walked = len(top_slots)
+                count *= 4
+
+            return matches[offset:]
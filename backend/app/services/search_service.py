@@ -2,16 +2,100 @@
 Service for searching courses and content.
 """
 
-from typing import Dict, List, Optional
+import hashlib
+import json
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
+from app.core.config import settings
 from app.core.logging import logger
-from app.services.cache_service import cache
-from app.services.db import get_supabase_client
+from app.core.monitoring import SEARCH_CACHE_REQUESTS
+from app.services.cache_service import async_cache, cache
+from app.services.db import fetch_all, get_supabase_client
+from app.services.search_index import InvertedIndex
+
+# Columns returned for search results
+COURSE_COLUMNS = "course_id, title, description, instructor_id, status, created_at, updated_at"
+CONTENT_COLUMNS = "content_id, module_id, title, type, content, metadata, version, created_at, updated_at"
+
+# Columns loaded into the in-memory indexes
+COURSE_INDEX_COLUMNS = "course_id, title, description, status, instructor_id"
+CONTENT_INDEX_COLUMNS = "content_id, module_id, type, title, content"
+
+# Prefix of the keys published when a process updates its in-memory indexes
+INDEX_UPDATE_PREFIX = "search-index:"
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query to its lowercase words separated by single spaces.
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        Normalized query
+    """
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+def normalize_filters(filters: Optional[Dict], allowed: Sequence[str]) -> Dict[str, str]:
+    """
+    Keep the supported, non-empty filters as strings in a stable order.
+    
+    Args:
+        filters: Search filters
+        allowed: Supported filter names
+        
+    Returns:
+        Normalized filters
+    """
+    filters = filters or {}
+    return {name: str(filters[name]) for name in sorted(allowed) if filters.get(name)}
+
+def build_prefix_tsquery(query: str) -> str:
+    """
+    Build a to_tsquery expression matching every word of a query as a prefix.
+    
+    Only word characters are kept, so user input cannot inject tsquery operators.
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        tsquery expression, or an empty string if the query has no words
+    """
+    terms = re.findall(r"\w+", query.lower())
+    return " & ".join(f"{term}:*" for term in terms)
+
+def _course_text(course: Dict) -> Sequence[Tuple[Optional[str], float]]:
+    """
+    Get the weighted searchable text of a course.
+    """
+    return [(course.get("title"), 2.0), (course.get("description"), 1.0)]
+
+def _content_text(content: Dict) -> Sequence[Tuple[Optional[str], float]]:
+    """
+    Get the weighted searchable text of a content item.
+    """
+    content_data = content.get("content") or {}
+    if not isinstance(content_data, dict):
+        content_data = {}
+    return [
+        (content.get("title"), 2.0),
+        (content_data.get("text"), 1.0),
+        (content_data.get("transcript"), 1.0)
+    ]
 
 class SearchService:
     """
     Service for searching courses and content.
+    
+    With SEARCH_ENGINE=memory every process keeps its own inverted indexes.
+    A process indexing a write publishes the document's ID on the cache
+    invalidation channel and the other processes reload it into theirs, so
+    several workers require Redis; without it the memory engine is only
+    consistent with a single worker. Memory engine rankings are not cached
+    in Redis, since they reflect the index of the process computing them.
     """
     
     def __init__(self):
@@ -19,6 +103,241 @@ class SearchService:
         Initialize the search service.
         """
         self.supabase = get_supabase_client()
+        self.engine = settings.SEARCH_ENGINE
+        self.course_index = InvertedIndex("course_id", _course_text, filter_fields=("status", "instructor_id"))
+        self.content_index = InvertedIndex("content_id", _content_text, filter_fields=("module_id", "type"))
+        
+        if self.engine == "memory":
+            cache.subscribe(INDEX_UPDATE_PREFIX, self._apply_index_update)
+    
+    def build_indexes(self) -> bool:
+        """
+        Load every course and content item into the in-memory indexes.
+        
+        Returns:
+            True if the indexes were built, False otherwise
+        """
+        try:
+            courses = fetch_all(
+                lambda: self.supabase.table("courses").select(COURSE_INDEX_COLUMNS),
+                order=("course_id",)
+            )
+            self.course_index.build(courses)
+            
+            content_items = fetch_all(
+                lambda: self.supabase.table("content_items").select(CONTENT_INDEX_COLUMNS),
+                order=("content_id",)
+            )
+            self.content_index.build(content_items)
+            
+            logger.info(f"Search indexes built with {len(self.course_index)} courses and {len(self.content_index)} content items")
+            return True
+        except Exception as e:
+            logger.error(f"Error building search indexes: {str(e)}")
+            return False
+    
+    def index_course(self, course: Dict) -> None:
+        """
+        Update the in-memory index and invalidate cached course searches after a write.
+        
+        Args:
+            course: Course row
+        """
+        if self.engine == "memory":
+            self.course_index.upsert(course)
+            cache.publish(f"{INDEX_UPDATE_PREFIX}courses:{course['course_id']}")
+        self._invalidate(["courses"])
+    
+    def index_content(self, content: Dict) -> None:
+        """
+        Update the in-memory index and invalidate cached content searches after a write.
+        
+        Only searches scoped to the item's module and unscoped searches are
+        invalidated, searches of other modules stay cached.
+        
+        Args:
+            content: Content item row
+        """
+        if self.engine == "memory":
+            self.content_index.upsert(content)
+            cache.publish(f"{INDEX_UPDATE_PREFIX}content:{content['content_id']}")
+        self._invalidate(["content", f"module:{content.get('module_id')}"])
+    
+    async def index_course_async(self, course: Dict) -> None:
+        """
+        Update the in-memory index and invalidate cached course searches after a write,
+        without blocking the event loop.
+        
+        Args:
+            course: Course row
+        """
+        if self.engine == "memory":
+            self.course_index.upsert(course)
+            await async_cache.publish(f"{INDEX_UPDATE_PREFIX}courses:{course['course_id']}")
+        await self._invalidate_async(["courses"])
+    
+    async def index_content_async(self, content: Dict) -> None:
+        """
+        Update the in-memory index and invalidate cached content searches after a write,
+        without blocking the event loop.
+        
+        Args:
+            content: Content item row
+        """
+        if self.engine == "memory":
+            self.content_index.upsert(content)
+            await async_cache.publish(f"{INDEX_UPDATE_PREFIX}content:{content['content_id']}")
+        await self._invalidate_async(["content", f"module:{content.get('module_id')}"])
+    
+    def _apply_index_update(self, key: str) -> None:
+        """
+        Reload a document another process indexed into this process's index.
+        
+        Args:
+            key: Published key, e.g. "search-index:courses:<course_id>"
+        """
+        kind, _, document_id = key[len(INDEX_UPDATE_PREFIX):].partition(":")
+        if kind == "courses":
+            table, id_field, columns, index = "courses", "course_id", COURSE_INDEX_COLUMNS, self.course_index
+        elif kind == "content":
+            table, id_field, columns, index = "content_items", "content_id", CONTENT_INDEX_COLUMNS, self.content_index
+        else:
+            return
+        
+        response = self.supabase.table(table).select(columns).eq(id_field, document_id).execute()
+        if response.data:
+            index.upsert(response.data[0])
+        else:
+            index.remove(document_id)
+    
+    def _invalidate(self, tags: List[str]) -> None:
+        """
+        Invalidate every cached search tagged with any of the given tags.
+        
+        Cache keys embed the generation of their tags, so bumping a
+        generation makes older entries unreachable until they expire.
+        """
+        for tag in tags:
+            cache.increment(f"search:generation:{tag}")
+    
+    async def _invalidate_async(self, tags: List[str]) -> None:
+        """
+        Invalidate every cached search tagged with any of the given tags, without blocking the event loop.
+        """
+        for tag in tags:
+            await async_cache.increment(f"search:generation:{tag}")
+    
+    def _cache_key(self, kind: str, normalized_query: str, filters: Dict[str, str], tags: List[str]) -> str:
+        """
+        Build the cache key of a normalized search.
+        """
+        generations = ".".join(str(cache.get(f"search:generation:{tag}") or 0) for tag in tags)
+        digest = hashlib.sha1(json.dumps([normalized_query, filters]).encode()).hexdigest()
+        return f"search:{kind}:{generations}:{digest}"
+    
+    def _ranked_ids(
+        self,
+        kind: str,
+        query: str,
+        filters: Dict[str, str],
+        tags: List[str],
+        load: Callable[[str], List[Tuple[str, float]]]
+    ) -> List[Tuple[str, float]]:
+        """
+        Get the full ranked ID list of a search, from the cache when possible.
+        
+        Args:
+            kind: Kind of search ("courses" or "content")
+            query: Search query
+            filters: Search filters
+            tags: Invalidation tags of the search
+            load: Function computing the ranked IDs for a normalized query
+            
+        Returns:
+            (ID, rank) pairs in rank order
+        """
+        normalized_query = normalize_query(query)
+        if not normalized_query:
+            return []
+        
+        # In-memory rankings are cheap and reflect this process's index, so they are not shared
+        if self.engine == "memory":
+            return load(normalized_query)
+        
+        cache_key = self._cache_key(kind, normalized_query, filters, tags)
+        cached = cache.get(cache_key)
+        if isinstance(cached, list):
+            SEARCH_CACHE_REQUESTS.labels(kind=kind, result="hit").inc()
+            return [(document_id, rank) for document_id, rank in cached]
+        
+        SEARCH_CACHE_REQUESTS.labels(kind=kind, result="miss").inc()
+        ranked = load(normalized_query)
+        cache.set(cache_key, [[document_id, rank] for document_id, rank in ranked], expire=settings.SEARCH_CACHE_TTL)
+        return ranked
+    
+    def _load_page(
+        self,
+        table: str,
+        id_field: str,
+        columns: str,
+        ranked: List[Tuple[str, float]],
+        limit: int,
+        offset: int
+    ) -> List[Dict]:
+        """
+        Load the rows of one page of a ranked ID list in one query.
+        
+        Returns:
+            Rows in rank order, each with its rank
+        """
+        page = ranked[offset:offset + limit]
+        if not page:
+            return []
+        
+        response = self.supabase.table(table).select(columns).in_(id_field, [document_id for document_id, _ in page]).execute()
+        rows_by_id = {str(row[id_field]): row for row in response.data}
+        
+        return [
+            {**rows_by_id[document_id], "rank": rank}
+            for document_id, rank in page
+            if document_id in rows_by_id
+        ]
+    
+    def _load_course_ids(self, normalized_query: str, filters: Dict[str, str]) -> List[Tuple[str, float]]:
+        """
+        Rank every matching published course, up to SEARCH_RESULT_LIMIT.
+        """
+        if self.engine == "memory":
+            return self.course_index.search(
+                normalized_query,
+                limit=settings.SEARCH_RESULT_LIMIT,
+                filters={"status": "published", **filters}
+            )
+        
+        params = {"p_query": build_prefix_tsquery(normalized_query), "p_limit": settings.SEARCH_RESULT_LIMIT}
+        if "instructor_id" in filters:
+            params["p_instructor_id"] = filters["instructor_id"]
+        
+        # Match and rank against the GIN-indexed search vector
+        response = self.supabase.rpc("search_course_ids", params).execute()
+        return [(str(row["course_id"]), row["rank"]) for row in response.data]
+    
+    def _load_content_ids(self, normalized_query: str, filters: Dict[str, str]) -> List[Tuple[str, float]]:
+        """
+        Rank every matching content item, up to SEARCH_RESULT_LIMIT.
+        """
+        if self.engine == "memory":
+            return self.content_index.search(normalized_query, limit=settings.SEARCH_RESULT_LIMIT, filters=filters)
+        
+        params = {"p_query": build_prefix_tsquery(normalized_query), "p_limit": settings.SEARCH_RESULT_LIMIT}
+        if "module_id" in filters:
+            params["p_module_id"] = filters["module_id"]
+        if "type" in filters:
+            params["p_type"] = filters["type"]
+        
+        # Match and rank against the GIN-indexed search vector
+        response = self.supabase.rpc("search_content_ids", params).execute()
+        return [(str(row["content_id"]), row["rank"]) for row in response.data]
     
     def search_courses(
         self,
@@ -28,7 +347,7 @@ class SearchService:
         filters: Optional[Dict] = None
     ) -> List[Dict]:
         """
-        Search for courses.
+        Search for published courses, ranked by relevance.
         
         Args:
             query: Search query
@@ -40,56 +359,15 @@ class SearchService:
             List of matching courses
         """
         try:
-            # Check cache first
-            cache_key = f"search:courses:{query}:{limit}:{offset}:{filters}"
-            cached_results = cache.get(cache_key)
-            
-            if cached_results:
-                return cached_results
-            
-            # Normalize query
-            normalized_query = query.lower().strip()
-            
-            # Build search query
-            search_query = self.supabase.table("courses").select("*")
-            
-            # Add status filter (only published courses)
-            search_query = search_query.eq("status", "published")
-            
-            # Add additional filters
-            if filters:
-                if "instructor_id" in filters:
-                    search_query = search_query.eq("instructor_id", filters["instructor_id"])
-            
-            # Execute query
-            response = search_query.execute()
-            
-            # Filter results based on query
-            results = []
-            for course in response.data:
-                title = course.get("title", "").lower()
-                description = course.get("description", "").lower()
-                
-                if normalized_query in title or normalized_query in description:
-                    results.append(course)
-            
-            # Sort results by relevance (title match is more relevant than description match)
-            results.sort(
-                key=lambda c: (
-                    normalized_query in c.get("title", "").lower(),
-                    c.get("title", "").lower().find(normalized_query),
-                    c.get("description", "").lower().find(normalized_query)
-                ),
-                reverse=True
+            course_filters = normalize_filters(filters, ("instructor_id",))
+            ranked = self._ranked_ids(
+                "courses",
+                query,
+                course_filters,
+                ["courses"],
+                lambda normalized_query: self._load_course_ids(normalized_query, course_filters)
             )
-            
-            # Apply pagination
-            paginated_results = results[offset:offset + limit]
-            
-            # Cache results
-            cache.set(cache_key, paginated_results, expire=300)  # 5 minutes
-            
-            return paginated_results
+            return self._load_page("courses", "course_id", COURSE_COLUMNS, ranked, limit, offset)
         except Exception as e:
             logger.error(f"Error searching courses: {str(e)}")
             return []
@@ -102,7 +380,7 @@ class SearchService:
         filters: Optional[Dict] = None
     ) -> List[Dict]:
         """
-        Search for content.
+        Search for content, ranked by relevance.
         
         Args:
             query: Search query
@@ -114,71 +392,16 @@ class SearchService:
             List of matching content items
         """
         try:
-            # Check cache first
-            cache_key = f"search:content:{query}:{limit}:{offset}:{filters}"
-            cached_results = cache.get(cache_key)
-            
-            if cached_results:
-                return cached_results
-            
-            # Normalize query
-            normalized_query = query.lower().strip()
-            
-            # Build search query
-            search_query = self.supabase.table("content_items").select("*")
-            
-            # Add additional filters
-            if filters:
-                if "module_id" in filters:
-                    search_query = search_query.eq("module_id", filters["module_id"])
-                
-                if "type" in filters:
-                    search_query = search_query.eq("type", filters["type"])
-            
-            # Execute query
-            response = search_query.execute()
-            
-            # Filter results based on query
-            results = []
-            for content in response.data:
-                title = content.get("title", "").lower()
-                content_data = content.get("content", {})
-                
-                # Check if content matches query
-                if normalized_query in title:
-                    results.append(content)
-                    continue
-                
-                # Check content data for matches
-                if isinstance(content_data, dict):
-                    # For text content, check the text
-                    if content.get("type") == "text" and "text" in content_data:
-                        if normalized_query in content_data["text"].lower():
-                            results.append(content)
-                            continue
-                    
-                    # For video content, check the transcript
-                    if content.get("type") == "video" and "transcript" in content_data:
-                        if normalized_query in content_data["transcript"].lower():
-                            results.append(content)
-                            continue
-            
-            # Sort results by relevance (title match is more relevant than content match)
-            results.sort(
-                key=lambda c: (
-                    normalized_query in c.get("title", "").lower(),
-                    c.get("title", "").lower().find(normalized_query)
-                ),
-                reverse=True
+            content_filters = normalize_filters(filters, ("module_id", "type"))
+            tags = [f"module:{content_filters['module_id']}"] if "module_id" in content_filters else ["content"]
+            ranked = self._ranked_ids(
+                "content",
+                query,
+                content_filters,
+                tags,
+                lambda normalized_query: self._load_content_ids(normalized_query, content_filters)
             )
-            
-            # Apply pagination
-            paginated_results = results[offset:offset + limit]
-            
-            # Cache results
-            cache.set(cache_key, paginated_results, expire=300)  # 5 minutes
-            
-            return paginated_results
+            return self._load_page("content_items", "content_id", CONTENT_COLUMNS, ranked, limit, offset)
         except Exception as e:
             logger.error(f"Error searching content: {str(e)}")
             return []
@@ -201,27 +424,11 @@ class SearchService:
             Dictionary with courses and content results
         """
         try:
-            # Check cache first
-            cache_key = f"search:all:{query}:{limit}:{offset}"
-            cached_results = cache.get(cache_key)
-            
-            if cached_results:
-                return cached_results
-            
-            # Search courses and content
-            courses = self.search_courses(query, limit, offset)
-            content = self.search_content(query, limit, offset)
-            
-            # Combine results
-            results = {
-                "courses": courses,
-                "content": content
+            # Both searches are cached individually
+            return {
+                "courses": self.search_courses(query, limit, offset),
+                "content": self.search_content(query, limit, offset)
             }
-            
-            # Cache results
-            cache.set(cache_key, results, expire=300)  # 5 minutes
-            
-            return results
         except Exception as e:
             logger.error(f"Error searching all: {str(e)}")
             return {"courses": [], "content": []}
@@ -6,6 +6,7 @@ from typing import Dict, Optional
 from uuid import UUID
 
 from app.core.logging import logger
+from app.services.auth.auth_service import invalidate_principal
 from app.services.db import get_supabase_client
 
 def get_user_preferences(user_id: UUID) -> Dict:
@@ -55,6 +56,7 @@ def update_user_preferences(user_id: UUID, preferences: Dict) -> bool:
         
         # Update user in database
         supabase.table("users").update({"learning_preferences": merged_preferences}).eq("user_id", str(user_id)).execute()
+        invalidate_principal(user_id)
         
         return True
     except Exception as e:
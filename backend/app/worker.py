@@ -0,0 +1,49 @@
+"""
+Standalone background job worker.
+
+Runs job queue workers without serving HTTP, so long-running AI jobs can be
+scaled separately from the API. Jobs are shared through Redis, which must be
+configured. Set JOB_WORKERS=0 on the API processes to leave all jobs to
+these workers.
+
+    python -m app.worker [--workers 4]
+"""
+
+import argparse
+import asyncio
+
+from app.core.logging import logger
+from app.services.ai import background_jobs  # noqa: F401 - registers the job handlers
+from app.services.cache_service import async_cache
+from app.services.db import supabase_manager
+from app.services.job_queue import job_queue
+
+async def run(workers: int) -> None:
+    """
+    Run the workers until cancelled, then release connections.
+    """
+    if async_cache.client is None:
+        raise SystemExit("REDIS_URL must be set to run standalone job workers")
+
+    tasks = job_queue.start(workers)
+    logger.info(f"Started {len(tasks)} job workers")
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await job_queue.stop()
+        await async_cache.close()
+        supabase_manager.close()
+        await supabase_manager.close_async()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark for the per-request overhead of the middleware stack.
+
+Compares a trivial endpoint with no middleware, with the previous
+BaseHTTPMiddleware-based rate limiting and metrics middleware, and with the
+current ASGI middleware. Requests are sent straight to the ASGI app, so the
+numbers exclude network and server overhead.
+
+Run from the backend directory:
+
+    python -m benchmarks.middleware --requests 20000 [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.middleware import RateLimitMiddleware
+from app.core.monitoring import MetricsMiddleware
+
+# Separate registry so the previous middleware does not clash with app metrics
+LEGACY_REGISTRY = CollectorRegistry()
+LEGACY_REQUESTS = Counter("legacy_requests_total", "Requests", ["path", "method"], registry=LEGACY_REGISTRY)
+LEGACY_RESPONSES = Counter(
+    "legacy_responses_total", "Responses", ["path", "method", "status_code"], registry=LEGACY_REGISTRY
+)
+LEGACY_DURATION = Histogram("legacy_request_duration_seconds", "Duration", ["path", "method"], registry=LEGACY_REGISTRY)
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    The previous per-process rate limiter, kept for comparison.
+    """
+
+    def __init__(self, app, rate_limit_per_minute: int):
+        super().__init__(app)
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.requests: Dict[str, Dict[str, float]] = {}
+        self.window_size = 60
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        client_ip = request.client.host if request.client else "unknown"
+        current_time = time.time()
+
+        if client_ip in self.requests:
+            self.requests[client_ip] = {
+                timestamp: count
+                for timestamp, count in self.requests[client_ip].items()
+                if current_time - float(timestamp) < self.window_size
+            }
+            if sum(self.requests[client_ip].values()) >= self.rate_limit_per_minute:
+                return Response(content="Rate limit exceeded.", status_code=429, media_type="text/plain")
+        else:
+            self.requests[client_ip] = {}
+
+        timestamp = str(current_time)
+        self.requests[client_ip][timestamp] = self.requests[client_ip].get(timestamp, 0) + 1
+        return await call_next(request)
+
+def add_legacy_metrics(app: FastAPI) -> None:
+    """
+    Add the previous @app.middleware("http") metrics handler.
+    """
+    @app.middleware("http")
+    async def monitor_requests(request, call_next):
+        path = request.url.path
+        method = request.method
+        LEGACY_REQUESTS.labels(path=path, method=method).inc()
+        with LEGACY_DURATION.labels(path=path, method=method).time():
+            response = await call_next(request)
+        LEGACY_RESPONSES.labels(path=path, method=method, status_code=response.status_code).inc()
+        return response
+
+def make_app(stack: str, limit: int) -> FastAPI:
+    """
+    Build an app with a trivial endpoint and the given middleware stack.
+    """
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"status": "ok"}
+
+    if stack == "legacy":
+        add_legacy_metrics(app)
+        app.add_middleware(LegacyRateLimitMiddleware, rate_limit_per_minute=limit)
+    elif stack == "asgi":
+        app.add_middleware(MetricsMiddleware)
+        app.add_middleware(RateLimitMiddleware, rate_limit_per_minute=limit)
+    return app
+
+async def call(app, client_ip: str) -> int:
+    """
+    Send one GET /ping request to an ASGI app and return the status code.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"benchmark")],
+        "client": (client_ip, 50000),
+        "server": ("benchmark", 80)
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def run(app, requests: int, concurrency: int, clients: int) -> float:
+    """
+    Send requests in batches of concurrent calls and return the elapsed time.
+    """
+    # Warm up routing and lazily built middleware stacks
+    for i in range(100):
+        await call(app, f"10.0.0.{i % clients}")
+
+    started = time.perf_counter()
+    for batch in range(0, requests, concurrency):
+        statuses = await asyncio.gather(*(
+            call(app, f"10.0.{(batch + i) % clients // 256}.{(batch + i) % clients % 256}")
+            for i in range(min(concurrency, requests - batch))
+        ))
+        assert all(status == 200 for status in statuses), "requests were rate limited"
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=100, help="distinct client IPs")
+    args = parser.parse_args()
+
+    # High enough that no request is limited, so only the bookkeeping is measured
+    limit = args.requests * 10
+    baseline = None
+    for stack in ("none", "legacy", "asgi"):
+        elapsed = asyncio.run(run(make_app(stack, limit), args.requests, args.concurrency, args.clients))
+        per_request = elapsed / args.requests * 1e6
+        baseline = baseline if baseline is not None else per_request
+        print(
+            f"{stack:>6}: {args.requests / elapsed:9.0f} req/s  {per_request:7.1f} us/request  "
+            f"(+{per_request - baseline:6.1f} us middleware)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark for the in-memory search index.
+
+Run from the backend directory:
+
+    python -m benchmarks.search_index --items 100000 [--memory]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from app.services.search_index import InvertedIndex
+
+WORDS = [
+    "python", "machine", "learning", "data", "science", "neural", "network", "algebra",
+    "calculus", "statistics", "probability", "web", "development", "database", "design",
+    "cloud", "security", "testing", "deployment", "frontend", "backend", "api", "graph",
+    "optimization", "regression", "classification", "clustering", "vision", "language",
+    "processing", "introduction", "advanced", "fundamentals", "practical", "project"
+]
+
+QUERIES = ["python", "machine learning", "neur", "data sci", "advanced graph optimization", "xyz"]
+
+def make_documents(count: int, seed: int = 42):
+    """
+    Generate synthetic content items with a title and body text.
+    """
+    rng = random.Random(seed)
+    vocabulary = WORDS + [f"term{i}" for i in range(5000)]
+    for i in range(count):
+        yield {
+            "content_id": f"content-{i}",
+            "module_id": f"module-{i % 1000}",
+            "type": "text",
+            "title": " ".join(rng.choices(WORDS, k=4)),
+            "content": {"text": " ".join(rng.choices(vocabulary, k=40))}
+        }
+
+def content_text(document):
+    return [(document["title"], 2.0), (document["content"]["text"], 1.0)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--memory", action="store_true", help="also measure peak memory of the build")
+    args = parser.parse_args()
+
+    index = InvertedIndex("content_id", content_text, filter_fields=("module_id", "type"))
+
+    started = time.perf_counter()
+    index.build(make_documents(args.items))
+    print(f"built {len(index)} items in {time.perf_counter() - started:.2f}s")
+
+    if args.memory:
+        # Tracing slows the build down considerably, so measure it separately
+        tracemalloc.start()
+        InvertedIndex("content_id", content_text, filter_fields=("module_id", "type")).build(make_documents(args.items))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak memory while building {peak / 1024 / 1024:.1f} MiB")
+
+    for query in QUERIES:
+        # The first query of a word scores its postings, later ones reuse them
+        started = time.perf_counter()
+        results = index.search(query, limit=10)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            index.search(query, limit=10)
+        warm_ms = (time.perf_counter() - started) / args.repeat * 1000
+        print(f"{query!r:32} cold {cold_ms:8.3f} ms  warm {warm_ms:8.3f} ms/query  ({len(results)} results)")
+
+    started = time.perf_counter()
+    for document in make_documents(1000, seed=7):
+        index.upsert(document)
+    print(f"upserted 1000 items in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -120,6 +120,17 @@ CREATE TABLE IF NOT EXISTS content_views (
     device_info JSONB DEFAULT '{}'::jsonb
 );
 
+-- User Events Table (for analytics)
+CREATE TABLE IF NOT EXISTS user_events (
+    event_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    event_type TEXT NOT NULL,
+    event_data JSONB DEFAULT '{}'::jsonb,
+    session_id TEXT,
+    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    environment TEXT
+);
+
 -- Achievements Table
 CREATE TABLE IF NOT EXISTS achievements (
     achievement_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -161,6 +172,27 @@ CREATE TABLE IF NOT EXISTS learning_paths (
     UNIQUE(user_id, course_id)
 );
 
+-- Daily engagement rollups (maintained by refresh_daily_engagement)
+CREATE TABLE IF NOT EXISTS user_daily_engagement (
+    user_id UUID NOT NULL REFERENCES users(user_id),
+    course_id UUID NOT NULL REFERENCES courses(course_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    progress_updates INTEGER NOT NULL DEFAULT 0,
+    content_views INTEGER NOT NULL DEFAULT 0,
+    quiz_submissions INTEGER NOT NULL DEFAULT 0,
+    last_active TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (user_id, course_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS course_daily_engagement (
+    course_id UUID NOT NULL REFERENCES courses(course_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    active_users INTEGER NOT NULL DEFAULT 0,
+    content_views INTEGER NOT NULL DEFAULT 0,
+    quiz_submissions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day)
+);
+
 -- Row Level Security Policies
 
 -- Enable Row Level Security
@@ -267,3 +299,164 @@ CREATE INDEX idx_user_achievements_user ON user_achievements(user_id);
 CREATE INDEX idx_recommendations_user ON ai_recommendations(user_id);
 CREATE INDEX idx_learning_paths_user ON learning_paths(user_id);
 CREATE INDEX idx_learning_paths_course ON learning_paths(course_id);
+CREATE INDEX idx_user_daily_engagement_course ON user_daily_engagement(course_id, day);
+CREATE INDEX idx_user_events_type_timestamp ON user_events(event_type, timestamp);
+CREATE INDEX idx_user_events_user_timestamp ON user_events(user_id, timestamp);
+CREATE INDEX idx_users_created_at ON users(created_at);
+
+-- Full-text search columns, weighted so title matches rank above body matches
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+
+ALTER TABLE content_items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(content->>'text', '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(content->>'transcript', '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_courses_search ON courses USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_content_search ON content_items USING GIN (search_vector);
+
+-- Analytics functions
+
+-- Progress and completion totals per content item of a course
+CREATE OR REPLACE FUNCTION course_content_completion(p_course_id UUID)
+RETURNS TABLE (content_id UUID, progress_count BIGINT, completed_count BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT up.content_id,
+           COUNT(*) AS progress_count,
+           COUNT(*) FILTER (WHERE up.status = 'completed') AS completed_count
+    FROM user_progress up
+    JOIN content_items ci ON ci.content_id = up.content_id
+    JOIN modules m ON m.module_id = ci.module_id
+    WHERE m.course_id = p_course_id
+    GROUP BY up.content_id
+$$;
+
+-- Completed content items per user and module of a course
+CREATE OR REPLACE FUNCTION course_user_module_completion(p_course_id UUID)
+RETURNS TABLE (user_id UUID, module_id UUID, completed_count BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT up.user_id,
+           ci.module_id,
+           COUNT(*) AS completed_count
+    FROM user_progress up
+    JOIN content_items ci ON ci.content_id = up.content_id
+    JOIN modules m ON m.module_id = ci.module_id
+    WHERE m.course_id = p_course_id
+      AND up.status = 'completed'
+    GROUP BY up.user_id, ci.module_id
+$$;
+
+-- Rebuild daily engagement rollups for every day on or after p_since
+-- ('-infinity' rebuilds the whole history). Rows of those days are deleted
+-- first, so groups whose activity moved to another day do not keep stale counts.
+CREATE OR REPLACE FUNCTION refresh_daily_engagement(p_since DATE)
+RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM user_daily_engagement WHERE day >= p_since;
+    DELETE FROM course_daily_engagement WHERE day >= p_since;
+    WITH activity AS (
+        SELECT up.user_id, m.course_id, up.last_accessed AS ts, 1 AS progress_updates, 0 AS content_views, 0 AS quiz_submissions
+        FROM user_progress up
+        JOIN content_items ci ON ci.content_id = up.content_id
+        JOIN modules m ON m.module_id = ci.module_id
+        WHERE up.last_accessed >= p_since
+        UNION ALL
+        SELECT cv.user_id, cv.course_id, cv.viewed_at, 0, 1, 0
+        FROM content_views cv
+        WHERE cv.viewed_at >= p_since
+        UNION ALL
+        SELECT qs.user_id, m.course_id, qs.submitted_at, 0, 0, 1
+        FROM quiz_submissions qs
+        JOIN quizzes q ON q.quiz_id = qs.quiz_id
+        JOIN content_items ci ON ci.content_id = q.content_id
+        JOIN modules m ON m.module_id = ci.module_id
+        WHERE qs.submitted_at >= p_since
+    ),
+    user_rollup AS (
+        INSERT INTO user_daily_engagement (user_id, course_id, day, progress_updates, content_views, quiz_submissions, last_active)
+        SELECT user_id, course_id, ts::date, SUM(progress_updates), SUM(content_views), SUM(quiz_submissions), MAX(ts)
+        FROM activity
+        GROUP BY user_id, course_id, ts::date
+        ON CONFLICT (user_id, course_id, day) DO UPDATE SET
+            progress_updates = EXCLUDED.progress_updates,
+            content_views = EXCLUDED.content_views,
+            quiz_submissions = EXCLUDED.quiz_submissions,
+            last_active = EXCLUDED.last_active
+        RETURNING course_id, day, content_views, quiz_submissions
+    )
+    INSERT INTO course_daily_engagement (course_id, day, active_users, content_views, quiz_submissions)
+    SELECT course_id, day, COUNT(*), SUM(content_views), SUM(quiz_submissions)
+    FROM user_rollup
+    GROUP BY course_id, day
+    ON CONFLICT (course_id, day) DO UPDATE SET
+        active_users = EXCLUDED.active_users,
+        content_views = EXCLUDED.content_views,
+        quiz_submissions = EXCLUDED.quiz_submissions
+$$;
+
+-- Distinct users active in a course on or after p_since
+CREATE OR REPLACE FUNCTION course_active_user_count(p_course_id UUID, p_since DATE)
+RETURNS BIGINT
+LANGUAGE sql STABLE AS $$
+    SELECT COUNT(DISTINCT user_id)
+    FROM user_daily_engagement
+    WHERE course_id = p_course_id
+      AND day >= p_since
+$$;
+
+-- Distinct (user, day) pairs with a login in [p_start, p_end)
+CREATE OR REPLACE FUNCTION user_login_days(p_start TIMESTAMP WITH TIME ZONE, p_end TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (user_id UUID, day DATE)
+LANGUAGE sql STABLE AS $$
+    SELECT DISTINCT ue.user_id, ue.timestamp::date AS day
+    FROM user_events ue
+    WHERE ue.event_type = 'login'
+      AND ue.timestamp >= p_start
+      AND ue.timestamp < p_end
+    ORDER BY ue.user_id, day
+$$;
+
+-- Most viewed content items since p_since
+CREATE OR REPLACE FUNCTION popular_content(p_since TIMESTAMP WITH TIME ZONE, p_limit INTEGER)
+RETURNS TABLE (content_id UUID, view_count BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT (ue.event_data->>'content_id')::uuid AS content_id,
+           COUNT(*) AS view_count
+    FROM user_events ue
+    WHERE ue.event_type = 'content_view'
+      AND ue.timestamp >= p_since
+      AND ue.event_data ? 'content_id'
+    GROUP BY 1
+    ORDER BY view_count DESC
+    LIMIT p_limit
+$$;
+
+-- Ranked IDs of published courses matching a to_tsquery expression
+CREATE OR REPLACE FUNCTION search_course_ids(p_query TEXT, p_limit INTEGER, p_instructor_id UUID DEFAULT NULL)
+RETURNS TABLE (course_id UUID, rank REAL)
+LANGUAGE sql STABLE AS $$
+    SELECT c.course_id, ts_rank_cd(c.search_vector, q, 1) AS rank
+    FROM courses c, to_tsquery('english', p_query) q
+    WHERE c.search_vector @@ q
+      AND c.status = 'published'
+      AND (p_instructor_id IS NULL OR c.instructor_id = p_instructor_id)
+    ORDER BY rank DESC, c.title
+    LIMIT p_limit
+$$;
+
+-- Ranked IDs of content items matching a to_tsquery expression
+CREATE OR REPLACE FUNCTION search_content_ids(p_query TEXT, p_limit INTEGER, p_module_id UUID DEFAULT NULL, p_type TEXT DEFAULT NULL)
+RETURNS TABLE (content_id UUID, rank REAL)
+LANGUAGE sql STABLE AS $$
+    SELECT ci.content_id, ts_rank_cd(ci.search_vector, q, 1) AS rank
+    FROM content_items ci, to_tsquery('english', p_query) q
+    WHERE ci.search_vector @@ q
+      AND (p_module_id IS NULL OR ci.module_id = p_module_id)
+      AND (p_type IS NULL OR ci.type = p_type)
+    ORDER BY rank DESC, ci.title
+    LIMIT p_limit
+$$;
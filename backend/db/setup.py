@@ -3,9 +3,12 @@ Database setup script for the AI Learning Platform.
 This script initializes the database schema and loads seed data.
 """
 
+import argparse
 import os
+import re
 import sys
 from pathlib import Path
+from typing import List
 
 import dotenv
 from supabase import create_client, Client
@@ -15,12 +18,48 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.core.config import settings
 
-def setup_database():
-    """
-    Set up the database schema and seed data.
+# Opening delimiter of a dollar-quoted string, e.g. $$ or $body$
+DOLLAR_QUOTE = re.compile(r"\$[A-Za-z_]*\$")
+
+def split_statements(sql: str) -> List[str]:
     """
-    print("Setting up database...")
+    Split a SQL script into statements.
+    
+    Semicolons in comments, quoted strings and dollar-quoted function
+    bodies do not end a statement.
     
+    Args:
+        sql: SQL script
+        
+    Returns:
+        Non-empty statements without their terminating semicolons
+    """
+    statements = []
+    start = 0
+    i = 0
+    while i < len(sql):
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+        elif sql[i] == "'":
+            end = sql.find("'", i + 1)
+            i = len(sql) if end == -1 else end + 1
+        elif sql[i] == "$" and DOLLAR_QUOTE.match(sql, i):
+            delimiter = DOLLAR_QUOTE.match(sql, i).group()
+            end = sql.find(delimiter, i + len(delimiter))
+            i = len(sql) if end == -1 else end + len(delimiter)
+        elif sql[i] == ";":
+            statements.append(sql[start:i])
+            start = i = i + 1
+        else:
+            i += 1
+    statements.append(sql[start:])
+    return [statement.strip() for statement in statements if statement.strip()]
+
+def create_supabase_client() -> Client:
+    """
+    Create a Supabase client from the environment, exiting if it is not configured.
+    """
     # Load environment variables
     dotenv.load_dotenv()
     
@@ -33,7 +72,15 @@ def setup_database():
         sys.exit(1)
     
     # Create Supabase client
-    supabase = create_client(supabase_url, supabase_key)
+    return create_client(supabase_url, supabase_key)
+
+def setup_database():
+    """
+    Set up the database schema and seed data.
+    """
+    print("Setting up database...")
+    
+    supabase = create_supabase_client()
     
     # Read schema SQL
     schema_path = Path(__file__).parent / "schema.sql"
@@ -49,7 +96,7 @@ def setup_database():
     print("Creating database schema...")
     try:
         # Split the schema SQL into individual statements
-        schema_statements = schema_sql.split(";")
+        schema_statements = split_statements(schema_sql)
         for statement in schema_statements:
             if statement.strip():
                 # Execute each statement
@@ -63,7 +110,7 @@ def setup_database():
     print("Loading seed data...")
     try:
         # Split the seed SQL into individual statements
-        seed_statements = seed_sql.split(";")
+        seed_statements = split_statements(seed_sql)
         for statement in seed_statements:
             if statement.strip():
                 # Execute each statement
@@ -73,7 +120,40 @@ def setup_database():
         print(f"Error loading seed data: {e}")
         sys.exit(1)
     
+    backfill_engagement_rollups(supabase)
+    
     print("Database setup complete.")
 
+def backfill_engagement_rollups(supabase: Client):
+    """
+    Build the daily engagement rollups for the whole activity history.
+    
+    The background job only refreshes the last few days, so this must run
+    once on every database created before the rollup tables existed:
+    
+        python db/setup.py --backfill-engagement
+    
+    Args:
+        supabase: Supabase client
+    """
+    print("Backfilling engagement rollups...")
+    try:
+        supabase.rpc("refresh_daily_engagement", {"p_since": "-infinity"}).execute()
+        print("Engagement rollups backfilled successfully.")
+    except Exception as e:
+        print(f"Error backfilling engagement rollups: {e}")
+        sys.exit(1)
+
 if __name__ == "__main__":
-    setup_database()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--backfill-engagement",
+        action="store_true",
+        help="only backfill the engagement rollups of an existing database"
+    )
+    args = parser.parse_args()
+    
+    if args.backfill_engagement:
+        backfill_engagement_rollups(create_supabase_client())
+    else:
+        setup_database()
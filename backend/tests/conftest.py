@@ -7,6 +7,7 @@ from typing import Dict, Generator
 
 import pytest
 from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
 
 from app.main import app
@@ -57,3 +58,185 @@ def auth_headers(test_user_token: str) -> Dict[str, str]:
     Create authorization headers with JWT token.
     """
     return {"Authorization": f"Bearer {test_user_token}"}
+
+def sort_key(value):
+    """
+    Sort key placing NULLs last, as Postgres does in ascending order.
+    """
+    return (value is None, value if value is not None else 0)
+
+class FakeResponse:
+    """
+    Minimal stand-in for a PostgREST API response.
+    """
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """
+    Minimal PostgREST query builder that filters in-memory rows.
+    """
+
+    def __init__(self, db, table_name: str):
+        self.db = db
+        self.table_name = table_name
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.order_by = []
+        self.bounds = None
+
+    def select(self, columns: str = "*", count=None):
+        self.columns = columns
+        return self
+
+    def insert(self, payload):
+        self.operation = "insert"
+        self.payload = payload
+        return self
+
+    def update(self, payload):
+        self.operation = "update"
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def order(self, column, desc: bool = False):
+        self.order_by.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int):
+        self.bounds = (start, end + 1)
+        return self
+
+    def limit(self, size: int):
+        self.bounds = (0, size)
+        return self
+
+    def _project(self, row):
+        if self.columns.strip() == "*":
+            return dict(row)
+        columns = [column.strip() for column in self.columns.split(",")]
+        return {column: row.get(column) for column in columns}
+
+    def execute(self):
+        self.db.queries.append((self.table_name, self.operation))
+        rows = self.db.tables.setdefault(self.table_name, [])
+
+        if self.operation == "insert":
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            rows.extend(dict(row) for row in payload)
+            return FakeResponse(payload)
+
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+
+        if self.operation == "update":
+            for row in matched:
+                row.update(self.payload)
+            return FakeResponse([dict(row) for row in matched])
+
+        if self.operation == "delete":
+            self.db.tables[self.table_name] = [row for row in rows if row not in matched]
+            return FakeResponse(matched)
+
+        # Stable sorts from the last key to the first give multi-column order
+        for column, desc in reversed(self.order_by):
+            matched.sort(key=lambda row: sort_key(row.get(column)), reverse=desc)
+        if self.bounds:
+            matched = matched[self.bounds[0]:self.bounds[1]]
+        if self.db.max_rows is not None:
+            matched = matched[:self.db.max_rows]
+
+        return FakeResponse([self._project(row) for row in matched], count=len(matched))
+
+class FakeRpc:
+    """
+    Deferred call to a registered fake database function.
+    """
+
+    def __init__(self, db, name: str, params: Dict):
+        self.db = db
+        self.name = name
+        self.params = params
+        self.order_by = []
+        self.bounds = None
+
+    def order(self, column, desc: bool = False):
+        self.order_by.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        self.db.queries.append((self.name, "rpc"))
+        if self.name not in self.db.functions:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function {self.name}"})
+        data = self.db.functions[self.name](**self.params)
+        if isinstance(data, list):
+            data = list(data)
+            for column, desc in reversed(self.order_by):
+                data.sort(key=lambda row: sort_key(row.get(column)), reverse=desc)
+        if self.bounds is not None:
+            data = data[self.bounds[0]:self.bounds[1]]
+        if self.db.max_rows is not None:
+            data = data[:self.db.max_rows]
+        return FakeResponse(data)
+
+class FakeSupabase:
+    """
+    In-memory Supabase client that records every query it executes.
+
+    Like PostgREST, responses are capped at max_rows rows when it is set.
+    """
+
+    def __init__(self, tables: Dict = None, max_rows: int = None):
+        self.tables = tables or {}
+        self.functions = {}
+        self.queries = []
+        self.max_rows = max_rows
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def rpc(self, name: str, params: Dict = None) -> FakeRpc:
+        return FakeRpc(self, name, params or {})
+
+    @property
+    def query_count(self) -> int:
+        return len(self.queries)
+
+@pytest.fixture
+def fake_supabase() -> FakeSupabase:
+    """
+    Create an empty in-memory Supabase client.
+    """
+    return FakeSupabase()
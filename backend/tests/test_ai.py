@@ -2,8 +2,23 @@
 Tests for AI-related endpoints.
 """
 
+import asyncio
+import json
+import time
+from typing import Any
+
 import pytest
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
+from langchain_core.language_models.llms import LLM
+
+from app.core import disconnect
+from app.core.config import settings
+from app.core.disconnect import run_until_disconnected
+from app.core.streaming import NDJSON_MEDIA_TYPE, ndjson_response
+from app.services.ai import content_generation_service, generation_cache
+from app.services.ai.generation_cache import DiskCache, GenerationCache
+from app.services.ai.llm_registry import LLMRegistry, parse_model_limits
 
 def test_get_recommendations(test_client: TestClient, auth_headers):
     """
@@ -71,3 +86,279 @@ def test_get_learning_path(test_client: TestClient, auth_headers):
     assert "focus_areas" in learning_path
     assert "estimated_completion_time" in learning_path
     assert "learning_strategy" in learning_path
+
+@pytest.fixture
+def offline_registry(monkeypatch, tmp_path):
+    """
+    LLM registry serving the offline backend, used by the content generation service with an empty cache.
+    """
+    registry = LLMRegistry(backend="offline", max_concurrency=2, total_concurrency=3, timeout=1)
+    monkeypatch.setattr(generation_cache, "llm_registry", registry)
+    monkeypatch.setattr(content_generation_service, "generation_cache", GenerationCache(directory=str(tmp_path)))
+    return registry
+
+def test_llm_clients_are_shared_per_model_and_params(offline_registry):
+    """
+    Test that clients are reused for equal generation parameters and built once per distinct set.
+    """
+    built = []
+    offline_registry.register_backend("counting", lambda model, params: built.append((model, params)) or object())
+    offline_registry.use_backend("counting")
+
+    first = offline_registry.get(temperature=0.7, max_length=500)
+    assert offline_registry.get(max_length=500, temperature=0.7) is first
+    assert offline_registry.get(temperature=0.3, max_length=500) is not first
+    assert offline_registry.get("other/model", temperature=0.7, max_length=500) is not first
+    assert len(built) == 3
+
+    with pytest.raises(ValueError):
+        offline_registry.use_backend("missing")
+
+def test_offline_backend_serves_generation_without_network(offline_registry, monkeypatch):
+    """
+    Test that content generation runs against the offline stand-in.
+    """
+    monkeypatch.setattr("app.services.ai.llm_registry.settings.AI_OFFLINE_RESPONSE", " A short summary. ")
+
+    summary = asyncio.run(content_generation_service.generate_content_summary("Python lists", max_length=100))
+    assert summary == "A short summary."
+
+class SlowLLM:
+    """
+    Async stand-in model recording how many calls run at once.
+    """
+
+    def __init__(self, delay: float, running: list, peak: list):
+        self.delay = delay
+        self.running = running
+        self.peak = peak
+
+    async def ainvoke(self, prompt):
+        self.running[0] += 1
+        self.peak[0] = max(self.peak[0], self.running[0])
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running[0] -= 1
+        return prompt
+
+def test_llm_calls_are_limited_per_model_and_in_total(offline_registry):
+    """
+    Test that concurrent calls are bounded per model and across models.
+    """
+    assert parse_model_limits("org/model-a=1, model-b = 3,,bad") == {"org/model-a": 1, "model-b": 3}
+
+    running = [0]
+    peak = [0]
+    offline_registry.register_backend("slow", lambda model, params: SlowLLM(0.02, running, peak))
+    offline_registry.use_backend("slow")
+
+    async def run(models):
+        return await asyncio.gather(*(offline_registry.ainvoke("prompt", "test", model) for model in models))
+
+    assert asyncio.run(run(["a"] * 6)) == ["prompt"] * 6
+    assert peak[0] == 2
+
+    peak[0] = 0
+    asyncio.run(run(["a", "b", "c", "d"] * 2))
+    assert peak[0] == 3
+
+def test_llm_calls_time_out(offline_registry):
+    """
+    Test that a call exceeding its timeout is cancelled and frees its slot.
+    """
+    running = [0]
+    offline_registry.register_backend("slow", lambda model, params: SlowLLM(5, running, [0]))
+    offline_registry.use_backend("slow")
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(offline_registry.ainvoke("prompt", "test", timeout=0.05))
+    assert running[0] == 0
+
+class BlockingLLM(LLM):
+    """
+    Stand-in model with only a blocking implementation.
+    """
+
+    delay: float
+    started: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "blocking"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.started.append(prompt)
+        time.sleep(self.delay)
+        return prompt
+
+def test_timed_out_blocking_calls_keep_their_slots_until_they_return(offline_registry):
+    """
+    Test that blocking calls that timed out still count against the limits until their threads return.
+    """
+    started = []
+    offline_registry.register_backend("blocking", lambda model, params: BlockingLLM(delay=0.3, started=started))
+    offline_registry.use_backend("blocking")
+
+    async def run():
+        calls = [offline_registry.ainvoke("prompt", "test", timeout=0.05) for _ in range(2)]
+        for result in await asyncio.gather(*calls, return_exceptions=True):
+            assert isinstance(result, asyncio.TimeoutError)
+
+        # Both threads are still running, so no slot is free
+        with pytest.raises(asyncio.TimeoutError):
+            await offline_registry.ainvoke("prompt", "test", timeout=0.05)
+        assert len(started) == 2
+
+        await asyncio.sleep(0.4)
+        return await offline_registry.ainvoke("prompt", "test")
+
+    assert asyncio.run(run()) == "prompt"
+    assert len(started) == 3
+
+def test_work_is_cancelled_when_the_client_disconnects(monkeypatch):
+    """
+    Test that handler work is cancelled and reported as 499 once the client is gone.
+    """
+    monkeypatch.setattr(disconnect, "DISCONNECT_POLL_INTERVAL", 0.01)
+    cancelled = []
+
+    class DisconnectedRequest:
+        method = "GET"
+        url = type("URL", (), {"path": "/slow"})()
+
+        async def is_disconnected(self):
+            return True
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with pytest.raises(HTTPException) as error:
+            await run_until_disconnected(DisconnectedRequest(), slow())
+        await asyncio.sleep(0)
+        return error.value.status_code
+
+    assert asyncio.run(run()) == 499
+    assert cancelled == [True]
+
+def test_generated_content_is_reused_until_refreshed(offline_registry):
+    """
+    Test that identical requests call the model once, force_refresh calls it again and invalid output is not cached.
+    """
+    replies = ['["Explain lists"]', '["Explain tuples"]', "not json", "not json"]
+    calls = []
+
+    class StubLLM:
+        async def ainvoke(self, prompt):
+            calls.append(prompt)
+            return replies[len(calls) - 1]
+
+    offline_registry.register_backend("stub", lambda model, params: StubLLM())
+    offline_registry.use_backend("stub")
+    generate = lambda *args, **kwargs: asyncio.run(content_generation_service.generate_learning_objectives(*args, **kwargs))
+
+    assert generate("Python", "beginner", 1) == ["Explain lists"]
+    assert generate("Python", "beginner", 1) == ["Explain lists"]
+    assert len(calls) == 1
+
+    assert generate("Python", "beginner", 1, force_refresh=True) == ["Explain tuples"]
+    assert generate("Python", "beginner", 1) == ["Explain tuples"]
+    assert len(calls) == 2
+
+    generate("Rust", "beginner", 1)
+    generate("Rust", "beginner", 1)
+    assert len(calls) == 4
+
+def test_generation_streams_tokens_and_parsed_objects(offline_registry, monkeypatch):
+    """
+    Test that streamed generation forwards tokens, emits complete questions before the output ends and caches the result.
+    """
+    questions = [
+        {"text": "What is a list?", "options": [{"id": "a", "text": "A sequence"}], "correct_answer": {"id": "a"}},
+        {"text": "What is a tuple?", "options": [{"id": "a", "text": "An immutable sequence"}], "correct_answer": {"id": "a"}}
+    ]
+    monkeypatch.setattr("app.services.ai.llm_registry.settings.AI_OFFLINE_RESPONSE", json.dumps(questions))
+
+    async def collect():
+        return [event async for event in content_generation_service.stream_quiz_questions("Python", "easy", 2)]
+
+    events = asyncio.run(collect())
+    tokens = [event["text"] for event in events if event["event"] == "token"]
+    partials = [event["data"] for event in events if event["event"] == "partial"]
+
+    # The offline backend streams one character at a time
+    assert len(tokens) == len(json.dumps(questions))
+    assert "".join(tokens) == json.dumps(questions)
+    assert events[-1] == {"event": "done", "data": questions}
+
+    # The first question is complete well before the output ends
+    first_complete = next(i for i, event in enumerate(events) if event["event"] == "partial" and event["data"][:1] == questions[:1])
+    assert first_complete < len(events) / 2
+    assert partials[-1] == questions
+
+    # The streamed completion is cached and served as one chunk
+    events = asyncio.run(collect())
+    assert [event["event"] for event in events] == ["token", "partial", "done"]
+    assert events[-1]["data"] == questions
+
+def test_closed_streams_release_their_slots(offline_registry, monkeypatch):
+    """
+    Test that a stream abandoned by its consumer frees its concurrency slots.
+    """
+    monkeypatch.setattr("app.services.ai.llm_registry.settings.AI_OFFLINE_RESPONSE", "a long completion")
+
+    async def run():
+        stream = offline_registry.astream("prompt", "test")
+        assert await stream.__anext__() == "a"
+        assert offline_registry.semaphore().locked() is False
+        assert offline_registry.semaphore(settings.AI_MODEL_NAME)._value == 1
+        await stream.aclose()
+        return offline_registry.semaphore()._value, offline_registry.semaphore(settings.AI_MODEL_NAME)._value
+
+    assert asyncio.run(run()) == (3, 2)
+
+def test_streamed_events_are_sent_as_ndjson():
+    """
+    Test that events are written as one JSON document per line.
+    """
+    app = FastAPI()
+
+    async def events():
+        yield {"event": "token", "text": "["}
+        yield {"event": "done", "data": []}
+
+    @app.post("/stream")
+    async def stream():
+        return ndjson_response(events())
+
+    with TestClient(app) as client:
+        with client.stream("POST", "/stream") as response:
+            assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert lines == [{"event": "token", "text": "["}, {"event": "done", "data": []}]
+
+def test_disk_tier_is_bounded_in_size(tmp_path):
+    """
+    Test that the least recently used entries are evicted once the disk tier is full.
+    """
+    disk = DiskCache(str(tmp_path), max_bytes=2000)
+    disk.set("aa-first", "x" * 500)
+    time.sleep(0.01)
+    disk.set("bb-second", "x" * 500)
+    time.sleep(0.01)
+    assert disk.get("aa-first", ttl=60) == "x" * 500
+    time.sleep(0.01)
+
+    disk.set("cc-third", "x" * 500)
+    disk.set("dd-fourth", "x" * 500)
+
+    assert disk.get("bb-second", ttl=60) is None
+    assert disk.get("aa-first", ttl=60) == "x" * 500
+    assert disk.get("dd-fourth", ttl=60) == "x" * 500
+    assert disk.get("dd-fourth", ttl=-1) is None
@@ -0,0 +1,476 @@
+"""
+Tests for analytics services.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.services import cache_decorators
+from app.services.analytics import analytics_service, course_analytics_engine, engagement_service, retention
+from app.services.analytics.content_analytics_service import ContentAnalyticsService
+from app.services.analytics.user_analytics_service import UserAnalyticsService
+from app.services.cache_service import AsyncRedisCache, RedisCache
+from app.services.db import fetch_all
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+def populate_courses(fake_supabase, num_courses: int, modules_per_course: int, items_per_module: int):
+    """
+    Fill the fake database with enrolled courses, modules, content and progress.
+    """
+    tables = fake_supabase.tables
+    for c in range(num_courses):
+        course_id = f"course-{c}"
+        tables.setdefault("courses", []).append({"course_id": course_id, "title": f"Course {c}"})
+        tables.setdefault("enrollments", []).append({"user_id": USER_ID, "course_id": course_id, "status": "active"})
+
+        for m in range(modules_per_course):
+            module_id = f"{course_id}-module-{m}"
+            tables.setdefault("modules", []).append({"module_id": module_id, "course_id": course_id, "title": f"Module {m}"})
+
+            for i in range(items_per_module):
+                content_id = f"{module_id}-item-{i}"
+                tables.setdefault("content_items", []).append({"content_id": content_id, "module_id": module_id, "title": f"Item {i}"})
+
+                # Complete every other item
+                if i % 2 == 0:
+                    tables.setdefault("user_progress", []).append({
+                        "user_id": USER_ID,
+                        "content_id": content_id,
+                        "status": "completed",
+                        "completion_percentage": 100,
+                        "last_accessed": "2024-01-01T00:00:00"
+                    })
+
+def test_get_user_progress_aggregates(fake_supabase, monkeypatch):
+    """
+    Test that progress is aggregated per content item, module and course.
+    """
+    monkeypatch.setattr(analytics_service, "get_supabase_client", lambda: fake_supabase)
+    populate_courses(fake_supabase, num_courses=1, modules_per_course=2, items_per_module=2)
+
+    result = analytics_service.get_user_progress(USER_ID)
+
+    course = result["overall_progress"]["course-0"]
+    assert course["title"] == "Course 0"
+    assert course["completion_percentage"] == 50
+
+    module = course["module_progress"]["course-0-module-0"]
+    assert module["completion_percentage"] == 50
+    assert module["content_progress"]["course-0-module-0-item-0"]["status"] == "completed"
+    assert module["content_progress"]["course-0-module-0-item-1"] == {
+        "status": "not_started",
+        "completion_percentage": 0,
+        "last_accessed": None
+    }
+
+@pytest.mark.parametrize("num_courses,modules_per_course,items_per_module", [
+    (1, 1, 1),
+    (5, 10, 20),
+])
+def test_get_user_progress_query_count_is_bounded(
+    fake_supabase, monkeypatch, num_courses, modules_per_course, items_per_module
+):
+    """
+    Test that the number of queries does not grow with course size.
+    """
+    monkeypatch.setattr(analytics_service, "get_supabase_client", lambda: fake_supabase)
+    populate_courses(fake_supabase, num_courses, modules_per_course, items_per_module)
+
+    result = analytics_service.get_user_progress(USER_ID)
+
+    assert len(result["overall_progress"]) == num_courses
+    # 1000 content items fill a page, so paging needs one more query to see the end
+    assert fake_supabase.query_count <= 6
+
+def test_get_user_progress_is_not_truncated_by_max_rows(fake_supabase, monkeypatch):
+    """
+    Test that content items and progress rows beyond the PostgREST max-rows limit are read.
+    """
+    monkeypatch.setattr(analytics_service, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(analytics_service, "fetch_all", lambda build_query, order: fetch_all(build_query, order, page_size=3))
+    populate_courses(fake_supabase, num_courses=1, modules_per_course=2, items_per_module=4)
+    fake_supabase.max_rows = 3
+
+    result = analytics_service.get_user_progress(USER_ID)
+
+    modules = result["overall_progress"]["course-0"]["module_progress"]
+    assert all(len(module["content_progress"]) == 4 for module in modules.values())
+    assert all(module["completion_percentage"] == 50 for module in modules.values())
+
+def populate_course_students(fake_supabase, num_students: int, num_modules: int, items_per_module: int):
+    """
+    Fill the fake database with one course and students who completed the
+    first module only, except student 0 who completed everything.
+    """
+    tables = fake_supabase.tables
+    tables["courses"] = [{"course_id": "course-0", "title": "Course 0"}]
+    tables["modules"] = []
+    tables["content_items"] = []
+    tables["enrollments"] = []
+    tables["users"] = []
+    tables["user_progress"] = []
+
+    for m in range(num_modules):
+        module_id = f"module-{m}"
+        tables["modules"].append({"module_id": module_id, "course_id": "course-0", "title": f"Module {m}", "sequence_number": m})
+        for i in range(items_per_module):
+            tables["content_items"].append({"content_id": f"{module_id}-item-{i}", "module_id": module_id, "title": f"Item {i}", "type": "text"})
+
+    for u in range(num_students):
+        user_id = f"user-{u}"
+        tables["users"].append({"user_id": user_id, "username": f"student{u}", "email": f"student{u}@example.com"})
+        tables["enrollments"].append({"user_id": user_id, "course_id": "course-0", "status": "completed" if u == 0 else "active"})
+        for content in tables["content_items"]:
+            if u == 0 or content["module_id"] == "module-0":
+                tables["user_progress"].append({"user_id": user_id, "content_id": content["content_id"], "status": "completed"})
+
+def test_get_course_analytics(fake_supabase, monkeypatch):
+    """
+    Test module completion rates and struggling students for a course.
+    """
+    monkeypatch.setattr(course_analytics_engine, "get_supabase_client", lambda: fake_supabase)
+    populate_course_students(fake_supabase, num_students=4, num_modules=4, items_per_module=2)
+
+    result = analytics_service.get_course_analytics("course-0")
+
+    assert result["total_students"] == 4
+    first_item = result["module_completion"]["module-0"]["content_completion"]["module-0-item-0"]
+    assert first_item["completed_count"] == 4
+    assert first_item["completion_rate"] == 100
+    assert result["module_completion"]["module-1"]["content_completion"]["module-1-item-0"]["completed_count"] == 1
+
+    # Students 1-3 completed one of four modules (25%)
+    struggling = {student["user_id"]: student for student in result["struggling_students"]}
+    assert set(struggling) == {"user-1", "user-2", "user-3"}
+    assert struggling["user-1"]["completion_percentage"] == 25
+    assert struggling["user-1"]["email"] == "student1@example.com"
+
+def test_get_course_analytics_uses_database_functions(fake_supabase, monkeypatch):
+    """
+    Test that database-side aggregates are used when available.
+    """
+    monkeypatch.setattr(course_analytics_engine, "get_supabase_client", lambda: fake_supabase)
+    populate_course_students(fake_supabase, num_students=2, num_modules=1, items_per_module=1)
+    fake_supabase.functions["course_content_completion"] = lambda p_course_id: [
+        {"content_id": "module-0-item-0", "progress_count": 2, "completed_count": 2}
+    ]
+    fake_supabase.functions["course_user_module_completion"] = lambda p_course_id: [
+        {"user_id": "user-0", "module_id": "module-0", "completed_count": 1},
+        {"user_id": "user-1", "module_id": "module-0", "completed_count": 1}
+    ]
+
+    result = analytics_service.get_course_analytics("course-0")
+
+    assert result["module_completion"]["module-0"]["content_completion"]["module-0-item-0"]["completed_count"] == 2
+    assert result["struggling_students"] == []
+    assert ("user_progress", "select") not in fake_supabase.queries
+
+def test_course_analytics_functions_are_paged(fake_supabase, monkeypatch):
+    """
+    Test that database function results beyond the PostgREST max-rows limit are read.
+    """
+    monkeypatch.setattr(course_analytics_engine, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(course_analytics_engine, "fetch_all", lambda build_query, order: fetch_all(build_query, order, page_size=2))
+    populate_course_students(fake_supabase, num_students=5, num_modules=1, items_per_module=1)
+    fake_supabase.functions["course_content_completion"] = lambda p_course_id: [
+        {"content_id": "module-0-item-0", "progress_count": 5, "completed_count": 5}
+    ]
+    fake_supabase.functions["course_user_module_completion"] = lambda p_course_id: [
+        {"user_id": f"user-{u}", "module_id": "module-0", "completed_count": 1} for u in (3, 0, 4, 1, 2)
+    ]
+    fake_supabase.max_rows = 2
+
+    result = analytics_service.get_course_analytics("course-0")
+
+    assert result["struggling_students"] == []
+    assert ("user_progress", "select") not in fake_supabase.queries
+
+def test_course_structure_is_not_truncated_by_max_rows(fake_supabase, monkeypatch):
+    """
+    Test that modules and content items beyond the PostgREST max-rows limit are read.
+    """
+    monkeypatch.setattr(course_analytics_engine, "fetch_all", lambda build_query, order: fetch_all(build_query, order, page_size=2))
+    populate_course_students(fake_supabase, num_students=1, num_modules=3, items_per_module=3)
+    fake_supabase.tables["modules"].reverse()
+    fake_supabase.max_rows = 2
+
+    structure = course_analytics_engine.CourseAnalyticsEngine(fake_supabase).get_course_structure("course-0")
+
+    assert [module["sequence_number"] for module in structure["modules"]] == [0, 1, 2]
+    assert all(len(items) == 3 for items in structure["content_by_module"].values())
+    assert len(structure["content_module"]) == 9
+
+def test_course_analytics_function_errors_are_not_hidden(fake_supabase, monkeypatch):
+    """
+    Test that only missing database functions fall back to in-memory aggregation.
+    """
+    monkeypatch.setattr(course_analytics_engine, "get_supabase_client", lambda: fake_supabase)
+    populate_course_students(fake_supabase, num_students=2, num_modules=1, items_per_module=1)
+
+    def timeout(p_course_id):
+        raise APIError({"code": "57014", "message": "canceling statement due to statement timeout"})
+
+    fake_supabase.functions["course_content_completion"] = timeout
+
+    with pytest.raises(APIError):
+        analytics_service.get_course_analytics("course-0")
+
+def test_get_course_engagement(fake_supabase):
+    """
+    Test course engagement metrics and dropout detection.
+    """
+    populate_course_students(fake_supabase, num_students=4, num_modules=2, items_per_module=2)
+    service = ContentAnalyticsService()
+    service.supabase = fake_supabase
+    service.enabled = True
+
+    result = service.get_course_engagement("course-0")
+
+    assert result["enrollment_count"] == 4
+    assert result["active_enrollment_count"] == 3
+    assert result["completed_enrollment_count"] == 1
+    assert result["completion_rate"] == 25
+    assert [m["avg_completion_rate"] for m in result["module_engagement"]] == [100, 100]
+    assert result["dropout_points"] == []
+
+@pytest.mark.parametrize("num_students,num_modules,items_per_module", [
+    (2, 1, 1),
+    (50, 10, 10),
+])
+def test_course_analytics_query_count_is_bounded(
+    fake_supabase, monkeypatch, num_students, num_modules, items_per_module
+):
+    """
+    Test that course analytics query count does not grow with course size.
+    """
+    monkeypatch.setattr(course_analytics_engine, "get_supabase_client", lambda: fake_supabase)
+    populate_course_students(fake_supabase, num_students, num_modules, items_per_module)
+
+    analytics_service.get_course_analytics("course-0")
+
+    assert fake_supabase.query_count <= 10
+
+def test_get_course_engagement_metrics_reads_rollups(fake_supabase, monkeypatch):
+    """
+    Test that course engagement metrics are read from the daily rollup.
+    """
+    monkeypatch.setattr(engagement_service, "get_supabase_client", lambda: fake_supabase)
+    today = datetime.utcnow().date()
+    fake_supabase.tables["enrollments"] = [
+        {"user_id": f"user-{u}", "course_id": "course-0", "status": "active"} for u in range(4)
+    ]
+    fake_supabase.tables["course_daily_engagement"] = [
+        {"course_id": "course-0", "day": (today - timedelta(days=d)).isoformat(), "active_users": 2, "content_views": 5, "quiz_submissions": 1}
+        for d in range(3)
+    ]
+    fake_supabase.functions["course_active_user_count"] = lambda p_course_id, p_since: 3
+
+    result = engagement_service.get_course_engagement_metrics("course-0", days=7)
+
+    assert len(result["daily_metrics"]) == 8
+    assert result["daily_metrics"][-1]["active_students"] == 2
+    assert result["daily_metrics"][0]["active_students"] == 0
+    assert result["total_content_views"] == 15
+    assert result["total_active_students"] == 3
+    assert result["engagement_rate"] == 75
+    assert fake_supabase.query_count == 3
+
+def test_engagement_rollups_are_refreshed_by_one_process(monkeypatch):
+    """
+    Test that only the process holding the rollup lease refreshes the rollups.
+    """
+    leases = {}
+    refreshes = []
+
+    class LeaseCache:
+        client = object()
+
+        async def acquire_lock(self, key, timeout):
+            if key in leases:
+                return None
+            leases[key] = "token"
+            return "token"
+
+    monkeypatch.setattr(engagement_service, "async_cache", LeaseCache())
+    monkeypatch.setattr(engagement_service, "refresh_engagement_rollups", lambda: refreshes.append(True))
+
+    async def run():
+        jobs = [asyncio.create_task(engagement_service.run_engagement_rollup_job(0.01)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert refreshes == [True]
+    assert list(leases) == [engagement_service.ROLLUP_LOCK_KEY]
+
+def test_engagement_rollups_are_refreshed_while_redis_is_down(monkeypatch):
+    """
+    Test that failing lease requests do not stop every process from refreshing the rollups.
+    """
+    class DownRedis:
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+    async_cache = AsyncRedisCache(RedisCache())
+    async_cache.client = DownRedis()
+    refreshes = []
+    monkeypatch.setattr(engagement_service, "async_cache", async_cache)
+    monkeypatch.setattr(engagement_service, "refresh_engagement_rollups", lambda: refreshes.append(True))
+
+    async def run():
+        jobs = [asyncio.create_task(engagement_service.run_engagement_rollup_job(60)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    asyncio.run(run())
+
+    assert refreshes == [True, True]
+
+def test_daily_retention_matches_nested_loop():
+    """
+    Test that bitset retention matches a direct per-day scan of the logins.
+    """
+    start = date(2024, 1, 1)
+    days = 10
+    logins = [
+        ("user-a", "2024-01-01T08:00:00"), ("user-a", "2024-01-01T09:00:00"), ("user-a", "2024-01-04T10:00:00"),
+        ("user-b", "2024-01-02"), ("user-b", "2024-01-10"),
+        ("user-c", "2024-01-04"),
+        ("user-d", "2023-12-31"), ("user-d", "2024-01-11")
+    ]
+    bitsets = retention.activity_bitsets(logins, start, days)
+
+    user_days = {}
+    for user_id, day in logins:
+        offset = (date.fromisoformat(day[:10]) - start).days
+        if 0 <= offset < days:
+            user_days.setdefault(user_id, set()).add(offset)
+
+    result = retention.daily_retention(bitsets, start, days)
+    for i, row in enumerate(result):
+        on_day = [d for d in user_days.values() if i in d]
+        assert row["users"] == len(on_day)
+        assert row["retained_users"] == sum(1 for d in on_day if max(d) > i)
+    assert result[0] == {"date": "2024-01-01", "users": 1, "retained_users": 1, "retention_rate": 100}
+
+    day_n = retention.day_n_retention(bitsets, days)
+    assert day_n[0]["eligible_users"] == 3
+    assert day_n[3]["day_n_users"] == 1
+    assert day_n[3]["rolling_users"] == 2
+    assert day_n[9]["eligible_users"] == 1
+
+def test_get_cohort_retention(fake_supabase):
+    """
+    Test week-N retention for weekly signup cohorts.
+    """
+    service = UserAnalyticsService()
+    service.supabase = fake_supabase
+    service.enabled = True
+
+    current_week = datetime.utcnow().date() - timedelta(days=datetime.utcnow().weekday())
+    first_week = current_week - timedelta(weeks=2)
+    fake_supabase.tables["users"] = [
+        {"user_id": "user-a", "created_at": first_week.isoformat() + "T10:00:00"},
+        {"user_id": "user-b", "created_at": first_week.isoformat() + "T11:00:00"},
+        {"user_id": "user-c", "created_at": (first_week + timedelta(weeks=1)).isoformat() + "T10:00:00"}
+    ]
+    fake_supabase.tables["user_events"] = [
+        {"user_id": "user-a", "event_type": "login", "timestamp": (first_week + timedelta(days=1)).isoformat() + "T00:00:00"},
+        {"user_id": "user-a", "event_type": "login", "timestamp": (first_week + timedelta(days=8)).isoformat() + "T00:00:00"},
+        {"user_id": "user-b", "event_type": "login", "timestamp": first_week.isoformat() + "T12:00:00"},
+        {"user_id": "user-c", "event_type": "login", "timestamp": (first_week + timedelta(days=7)).isoformat() + "T12:00:00"}
+    ]
+
+    result = service.get_cohort_retention(weeks=3)
+
+    first, second, third = result["cohorts"]
+    assert first["cohort"] == first_week.isoformat()
+    assert first["users"] == 2
+    assert [week["active_users"] for week in first["retention"]] == [2, 1, 0]
+    assert first["retention"][1]["retention_rate"] == 50
+    assert second["users"] == 1
+    assert [week["active_users"] for week in second["retention"]] == [1, 0]
+    assert third["users"] == 0
+
+def test_get_popular_content(fake_supabase):
+    """
+    Test popular content ranking with metadata loaded in one bulk query.
+    """
+    service = UserAnalyticsService()
+    service.supabase = fake_supabase
+    service.enabled = True
+
+    now = datetime.utcnow().isoformat()
+    fake_supabase.tables["content_items"] = [
+        {"content_id": f"content-{i}", "title": f"Item {i}", "type": "text"} for i in range(3)
+    ]
+    fake_supabase.tables["user_events"] = [
+        {"user_id": "user-a", "event_type": "content_view", "event_data": {"content_id": f"content-{i}"}, "timestamp": now}
+        for i in (0, 1, 1, 2, 2, 2)
+    ]
+
+    result = service.get_popular_content(days=7, limit=2)
+
+    assert [(item["content_id"], item["view_count"]) for item in result] == [("content-2", 3), ("content-1", 2)]
+    assert result[0]["title"] == "Item 2"
+    assert fake_supabase.queries.count(("content_items", "select")) == 1
+
+def test_get_popular_content_does_not_hide_function_errors(fake_supabase):
+    """
+    Test that only a missing popular_content function falls back to counting view events.
+    """
+    service = UserAnalyticsService()
+    service.supabase = fake_supabase
+
+    def denied(p_since, p_limit):
+        raise APIError({"code": "42501", "message": "permission denied for function popular_content"})
+
+    fake_supabase.functions["popular_content"] = denied
+
+    with pytest.raises(APIError):
+        service._compute_popular_content(days=7, limit=10)
+    assert ("user_events", "select") not in fake_supabase.queries
+
+def test_get_popular_content_serves_stale_ranking_while_refreshing(fake_supabase, monkeypatch):
+    """
+    Test that an expired ranking is returned immediately and refreshed once in the background.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    redis_cache = RedisCache()
+    redis_cache.client = fakeredis.FakeRedis()
+    monkeypatch.setattr(cache_decorators, "cache", redis_cache)
+
+    service = UserAnalyticsService()
+    service.supabase = fake_supabase
+    service.enabled = True
+    redis_cache.set("popular_content:7:10", {"value": [{"content_id": "stale"}], "fresh_until": 0})
+    refreshed = []
+    release = threading.Event()
+
+    def compute(days, limit):
+        release.wait(1)
+        refreshed.append((days, limit))
+        return []
+
+    monkeypatch.setattr(service, "_compute_popular_content", compute)
+
+    assert service.get_popular_content(days=7, limit=10) == [{"content_id": "stale"}]
+    assert service.get_popular_content(days=7, limit=10) == [{"content_id": "stale"}]
+    release.set()
+
+    deadline = time.monotonic() + 2
+    while service.get_popular_content(days=7, limit=10) != [] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.get_popular_content(days=7, limit=10) == []
+    assert refreshed == [(7, 10)]
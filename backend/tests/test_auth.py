@@ -2,9 +2,17 @@
 Tests for authentication endpoints.
 """
 
+import asyncio
+from uuid import uuid4
+
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from app.schemas.user import User
+from app.services.auth import auth_service
+from app.services.auth.auth_service import create_access_token
+
 def test_login(test_client: TestClient):
     """
     Test the login endpoint.
@@ -59,3 +67,26 @@ def test_get_current_user_no_token(test_client: TestClient):
     response = test_client.get("/api/v1/auth/me")
     
     assert response.status_code == 401
+
+def test_get_current_user_uses_principal_from_token_claims(monkeypatch):
+    """
+    Test that tokens carrying a user ID resolve the principal without querying users by email.
+    """
+    user = User(id=uuid4(), email="student1@example.com", username="student1", role="student")
+    lookups = []
+
+    async def get_principal(user_id):
+        lookups.append(user_id)
+        return user
+
+    monkeypatch.setattr(auth_service, "get_principal", get_principal)
+    token = create_access_token({"sub": user.email, "uid": str(user.id)})
+
+    # No database client is passed, so a users lookup would fail
+    assert asyncio.run(auth_service.get_current_user(token, supabase=None)) == user
+    assert lookups == [str(user.id)]
+
+    other_token = create_access_token({"sub": "someone@example.com", "uid": str(user.id)})
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(auth_service.get_current_user(other_token, supabase=None))
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,437 @@
+"""
+Tests for the cache service.
+"""
+
+import asyncio
+import json
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.schemas.course import Course
+from app.services import cache_decorators
+from app.services.cache_codec import MAGIC, CacheCodec, CodecError
+from app.services.cache_decorators import bump_version, cached
+from app.services.cache_service import AsyncRedisCache, LocalCache, RedisCache, parse_namespace_ttls
+
+class FakeRedis:
+    """
+    Minimal in-memory Redis client that counts reads and records published messages.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.reads = 0
+        self.published = []
+
+    def get(self, key):
+        self.reads += 1
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def incrby(self, key, amount):
+        value = int(self.values.get(key, 0)) + amount
+        self.values[key] = str(value).encode()
+        return value
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+@pytest.fixture
+def redis_cache():
+    """
+    Cache service backed by FakeRedis with "course" cached locally.
+    """
+    cache = RedisCache()
+    cache.client = FakeRedis()
+    cache.namespace_ttls = {"course": 60}
+    return cache
+
+def test_parse_namespace_ttls():
+    """
+    Test parsing of namespace TTL specifications.
+    """
+    assert parse_namespace_ttls("course=60, module = 30,,bad") == {"course": 60, "module": 30}
+    assert parse_namespace_ttls("") == {}
+
+def test_local_cache_evicts_least_recently_used_and_expired():
+    """
+    Test size-bounded LRU eviction and expiry.
+    """
+    local = LocalCache(max_entries=2)
+    local.set("a", 1, ttl=60)
+    local.set("b", 2, ttl=60)
+    local.get("a")
+    local.set("c", 3, ttl=60)
+
+    assert local.get("b") is None
+    assert local.get("a") == 1
+    assert local.get("c") == 3
+
+    local.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert local.get("d") is None
+
+def test_local_namespace_reads_skip_redis(redis_cache):
+    """
+    Test that locally cached namespaces are served without a Redis round trip.
+    """
+    redis_cache.set("course:1", {"title": "Python"})
+    redis_cache.set("other:1", {"title": "Python"})
+
+    assert redis_cache.get("course:1") == {"title": "Python"}
+    assert redis_cache.get("other:1") == {"title": "Python"}
+    assert redis_cache.client.reads == 1
+
+    # Callers get independent copies
+    redis_cache.get("course:1")["title"] = "Changed"
+    assert redis_cache.get("course:1") == {"title": "Python"}
+
+def test_writes_publish_invalidations(redis_cache):
+    """
+    Test that writes evict local copies in other processes but not in the writer.
+    """
+    other = RedisCache()
+    other.client = redis_cache.client
+    other.namespace_ttls = {"course": 60}
+
+    redis_cache.set("course:1", {"title": "Old"})
+    assert other.get("course:1") == {"title": "Old"}
+
+    redis_cache.set("course:1", {"title": "New"})
+    channel, message = redis_cache.client.published[-1]
+    assert message == f"{redis_cache.instance_id} course:1"
+
+    # The writer ignores its own message, the other process evicts its copy
+    redis_cache._handle_invalidation({"data": message.encode()})
+    other._handle_invalidation({"data": message.encode()})
+    assert redis_cache.get("course:1") == {"title": "New"}
+    assert other.get("course:1") == {"title": "New"}
+
+    redis_cache.delete("course:1")
+    other._handle_invalidation({"data": redis_cache.client.published[-1][1]})
+    assert other.get("course:1") is None
+
+def test_invalidations_are_dispatched_to_subscribers(redis_cache):
+    """
+    Test that messages of other processes reach the subscribers of their prefix.
+    """
+    received = []
+    redis_cache.subscribe("search-index:", received.append)
+
+    redis_cache._handle_invalidation({"data": b"other search-index:courses:c1"})
+    redis_cache._handle_invalidation({"data": b"other course:1"})
+    redis_cache._handle_invalidation({"data": f"{redis_cache.instance_id} search-index:courses:c2".encode()})
+
+    assert received == ["search-index:courses:c1"]
+
+@pytest.fixture
+def fake_redis_cache():
+    """
+    Cache service backed by an in-memory Redis server that runs Lua scripts.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisCache()
+    cache.client = fakeredis.FakeRedis()
+    cache.namespace_ttls = {"course": 60}
+    return cache
+
+def test_batch_operations(fake_redis_cache):
+    """
+    Test multi-key get, set and delete, including locally cached keys.
+    """
+    assert fake_redis_cache.set_many({"course:1": {"title": "Python"}, "other:1": [1, 2]}, expire=60)
+    assert fake_redis_cache.get_many(["course:1", "other:1", "missing"]) == {
+        "course:1": {"title": "Python"},
+        "other:1": [1, 2]
+    }
+    assert fake_redis_cache.client.ttl("other:1") == 60
+
+    assert fake_redis_cache.delete_many(["course:1", "other:1"])
+    assert fake_redis_cache.get_many(["course:1", "other:1"]) == {}
+
+def test_scripted_helpers(fake_redis_cache):
+    """
+    Test the capped list push and increment-with-TTL scripts.
+    """
+    for i in range(25):
+        fake_redis_cache.push_capped("events", {"i": i}, max_length=20, expire=100)
+
+    events = fake_redis_cache.get_list("events")
+    assert len(events) == 20
+    assert events[0] == {"i": 5}
+    assert fake_redis_cache.client.ttl("events") == 100
+
+    assert fake_redis_cache.increment_with_ttl("counter", 2, expire=50) == 2
+    fake_redis_cache.client.expire("counter", 10)
+    assert fake_redis_cache.increment_with_ttl("counter", 1, expire=50) == 3
+    assert fake_redis_cache.client.ttl("counter") == 10
+
+def test_pipeline_runs_queued_commands_once(fake_redis_cache):
+    """
+    Test that queued commands run together and listed keys are evicted locally.
+    """
+    fake_redis_cache.set("course:1", {"title": "Old"})
+
+    with fake_redis_cache.pipeline(invalidate=["course:1"]) as pipe:
+        fake_redis_cache.push_capped("events", "viewed", max_length=2, pipeline=pipe)
+        fake_redis_cache.increment_with_ttl("counter", pipeline=pipe)
+        pipe.set("course:1", '{"title": "New"}')
+        assert fake_redis_cache.client.get("counter") is None
+
+    assert fake_redis_cache.get_list("events") == ["viewed"]
+    assert fake_redis_cache.client.get("counter") == b"1"
+    assert fake_redis_cache.get("course:1") == {"title": "New"}
+
+def test_codec_round_trips_models_without_pickle():
+    """
+    Test that Pydantic models round-trip through the JSON codec.
+    """
+    codec = CacheCodec(serializer="json", compression="none")
+    course = Course(id=uuid4(), instructor_id=uuid4(), title="Python", created_at=datetime(2024, 1, 1))
+
+    encoded = codec.encode({"courses": [course], "count": 1})
+
+    assert encoded[:2] == MAGIC + bytes([0x01])
+    assert b"pickle" not in encoded and not encoded[2:].startswith(b"\x80")
+    assert codec.decode(encoded) == {"courses": [course], "count": 1}
+
+def test_codec_compresses_large_values():
+    """
+    Test that payloads above the threshold are compressed and tagged as such.
+    """
+    codec = CacheCodec(serializer="json", compression="zlib", compression_threshold=100)
+    value = {"text": "python " * 200}
+
+    small = codec.encode({"text": "python"})
+    large = codec.encode(value)
+
+    assert small[1] >> 4 == 0
+    assert large[1] >> 4 == 1
+    assert len(large) < len(json.dumps(value))
+    assert codec.decode(large) == value
+
+def test_codec_never_guesses_untagged_values():
+    """
+    Test that legacy JSON is still read, but untagged pickles and unknown models are rejected.
+    """
+    codec = CacheCodec()
+
+    assert codec.decode(b'{"legacy": true}') == {"legacy": True}
+    with pytest.raises(CodecError):
+        codec.decode(pickle.dumps({"a": 1}))
+    with pytest.raises(CodecError):
+        codec.decode(MAGIC + bytes([0x01]) + b'{"__model__": "os:system", "data": {}}')
+    with pytest.raises(CodecError):
+        codec.decode(MAGIC + bytes([0x0F]) + b"{}")
+
+def test_codec_rejects_forged_pickles(redis_cache):
+    """
+    Test that values tagged as pickled are never unpickled and read as cache misses.
+    """
+    class Exploit:
+        def __reduce__(self):
+            return (exec, ("raise AssertionError('pickle payload was executed')",))
+
+    forged = MAGIC + bytes([0x03]) + pickle.dumps(Exploit())
+    with pytest.raises(CodecError):
+        CacheCodec().decode(forged)
+
+    redis_cache.client.set("other:1", forged)
+    assert redis_cache.get("other:1") is None
+
+@pytest.fixture
+def cached_caches(fake_redis_cache, monkeypatch):
+    """
+    Point the @cached decorator at in-memory sync and async Redis clients sharing one server.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    fake_redis_cache.client = fakeredis.FakeRedis(server=server)
+    async_cache = AsyncRedisCache(fake_redis_cache)
+    async_cache.client = fakeredis.FakeAsyncRedis(server=server)
+
+    monkeypatch.setattr(cache_decorators, "cache", fake_redis_cache)
+    monkeypatch.setattr(cache_decorators, "async_cache", async_cache)
+    return fake_redis_cache, async_cache
+
+def test_cached_coalesces_concurrent_sync_misses(cached_caches):
+    """
+    Test that concurrent misses for one key run the function once and invalidation forces a reload.
+    """
+    calls = []
+
+    @cached("course", ttl=60)
+    def load(course_id):
+        calls.append(course_id)
+        time.sleep(0.05)
+        return {"course_id": course_id}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(load, ["1"] * 8))
+
+    assert results == [{"course_id": "1"}] * 8
+    assert calls == ["1"]
+    assert load.cache_key("1") == "course:1"
+
+    load.invalidate("1")
+    assert load("1") == {"course_id": "1"}
+    assert calls == ["1", "1"]
+
+def test_cached_coalesces_concurrent_async_misses(cached_caches):
+    """
+    Test that concurrent async misses run once and share entries with sync functions.
+    """
+    sync_cache, _ = cached_caches
+    calls = []
+
+    @cached("quiz", ttl=60, key=lambda quiz_id: quiz_id)
+    async def load(quiz_id):
+        calls.append(quiz_id)
+        await asyncio.sleep(0.05)
+        return [quiz_id]
+
+    async def run():
+        return await asyncio.gather(*(load("1") for _ in range(8)))
+
+    assert asyncio.run(run()) == [["1"]] * 8
+    assert calls == ["1"]
+    assert sync_cache.get("quiz:1") == ["1"]
+    assert not sync_cache.client.exists("lock:quiz:1")
+
+    asyncio.run(load.invalidate_async("1"))
+    assert sync_cache.get("quiz:1") is None
+
+def test_cached_waits_for_lease_held_by_another_worker(cached_caches, monkeypatch):
+    """
+    Test that a worker finding the lease taken waits for the value instead of recomputing it.
+    """
+    sync_cache, _ = cached_caches
+    monkeypatch.setattr(cache_decorators, "LOCK_POLL_INTERVAL", 0.01)
+
+    @cached("course", ttl=60)
+    def load(course_id):
+        raise AssertionError("value should come from the other worker")
+
+    token = sync_cache.acquire_lock("course:2", timeout=5)
+    threading.Timer(0.05, sync_cache.set, args=("course:2", {"course_id": "2"})).start()
+
+    assert load("2") == {"course_id": "2"}
+    assert sync_cache.release_lock("course:2", token)
+
+def test_cached_stops_waiting_when_the_lease_is_released_without_a_value(cached_caches, monkeypatch):
+    """
+    Test that waiters compute at once when the other worker's result was None and not stored.
+    """
+    sync_cache, _ = cached_caches
+    monkeypatch.setattr(cache_decorators, "LOCK_POLL_INTERVAL", 0.01)
+
+    @cached("course", ttl=60)
+    def load(course_id):
+        return None
+
+    token = sync_cache.acquire_lock("course:3", timeout=5)
+    threading.Timer(0.05, sync_cache.release_lock, args=("course:3", token)).start()
+
+    started = time.monotonic()
+    assert load("3") is None
+    assert time.monotonic() - started < 1
+
+class DownRedis:
+    """
+    Redis client whose every command fails as if the server were unreachable.
+    """
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+        return command
+
+class DownAsyncRedis:
+    """
+    Async Redis client whose every command fails as if the server were unreachable.
+    """
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+        return command
+
+def test_cached_computes_at_once_when_redis_is_down(monkeypatch):
+    """
+    Test that misses are computed without waiting for a lease that cannot be requested.
+    """
+    sync_cache = RedisCache()
+    sync_cache.client = DownRedis()
+    async_cache = AsyncRedisCache(sync_cache)
+    async_cache.client = DownAsyncRedis()
+    monkeypatch.setattr(cache_decorators, "cache", sync_cache)
+    monkeypatch.setattr(cache_decorators, "async_cache", async_cache)
+
+    @cached("course", ttl=60)
+    def load(course_id):
+        return {"course_id": course_id}
+
+    @cached("course", ttl=60)
+    async def load_async(course_id):
+        return {"course_id": course_id}
+
+    started = time.monotonic()
+    assert load("1") == {"course_id": "1"}
+    assert asyncio.run(load_async("1")) == {"course_id": "1"}
+    assert time.monotonic() - started < 1
+
+def test_cached_versions_invalidate_groups_of_entries(cached_caches):
+    """
+    Test that bumping a version tag invalidates every entry cached under it.
+    """
+    calls = []
+
+    @cached("module", ttl=60, key=lambda course_id: f"course:{course_id}", version=lambda course_id: f"course:{course_id}")
+    def load(course_id):
+        calls.append(course_id)
+        return [len(calls)]
+
+    assert load("1") == [1]
+    assert load("1") == [1]
+
+    assert bump_version("course:1") == 1
+    assert load("1") == [2]
+
+    load.store([9], "1")
+    assert load("1") == [9]
+    assert calls == ["1", "1"]
+
+def test_cached_serves_stale_values_while_refreshing(cached_caches, monkeypatch):
+    """
+    Test that an expired value is returned immediately and replaced by a background refresh.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(cache_decorators.time, "time", lambda: now[0])
+    calls = []
+
+    @cached("course", ttl=60, stale_ttl=600)
+    def load(course_id):
+        calls.append(course_id)
+        return {"version": len(calls)}
+
+    assert load("1") == {"version": 1}
+
+    now[0] += 120
+    assert load("1") == {"version": 1}
+
+    deadline = time.monotonic() + 2
+    while load("1") != {"version": 2} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert load("1") == {"version": 2}
+    assert calls == ["1", "1"]
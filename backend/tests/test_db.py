@@ -0,0 +1,79 @@
+"""
+Tests for the shared Supabase client manager.
+"""
+
+import asyncio
+from pathlib import Path
+
+from app.services.db import SupabaseClientManager
+from db.setup import split_statements
+
+def make_manager() -> SupabaseClientManager:
+    """
+    Create a client manager for an unreachable database.
+    """
+    return SupabaseClientManager(url="http://127.0.0.1:9", key="dummy", connect_timeout=1.0)
+
+def test_failed_health_check_replaces_client_without_closing_it():
+    """
+    Test that services holding the client keep a usable one after it is replaced.
+    """
+    manager = make_manager()
+    held = manager.get_client()
+    held_http = manager._http_client
+
+    assert manager.check_health(force=True) is False
+
+    replacement = manager.get_client()
+    assert replacement is not held
+    assert not held_http.is_closed
+
+    manager.close()
+    assert not held_http.is_closed
+    assert manager._http_client is None
+
+def test_failed_async_health_check_replaces_async_client_without_closing_it():
+    """
+    Test that the async client is health-checked and replaced like the sync one.
+    """
+    manager = make_manager()
+
+    async def run():
+        held = await manager.get_async_client()
+        held_http = manager._async_http_client
+        healthy = await manager.check_async_health(force=True)
+        replacement = await manager.get_async_client()
+        await manager.close_async()
+        return held, held_http, healthy, replacement
+
+    held, held_http, healthy, replacement = asyncio.run(run())
+
+    assert healthy is False
+    assert replacement is not held
+    assert not held_http.is_closed
+
+def test_split_statements_keeps_function_bodies_whole():
+    """
+    Test that semicolons in comments, strings and function bodies do not split statements.
+    """
+    sql = """
+    INSERT INTO t VALUES ('a;b'); -- trailing; comment
+    CREATE FUNCTION f() RETURNS void LANGUAGE plpgsql AS $body$
+    BEGIN
+        DELETE FROM t;
+        INSERT INTO t VALUES ('c');
+    END
+    $body$;
+    """
+
+    statements = split_statements(sql)
+
+    assert len(statements) == 2
+    assert statements[0] == "INSERT INTO t VALUES ('a;b')"
+    assert statements[1].startswith("-- trailing; comment")
+    assert statements[1].endswith("$body$")
+
+    schema = split_statements((Path(__file__).parent.parent / "db" / "schema.sql").read_text())
+    for statement in schema:
+        if "CREATE OR REPLACE FUNCTION" in statement:
+            assert statement.endswith("$$")
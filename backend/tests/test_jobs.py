@@ -0,0 +1,260 @@
+"""
+Tests for the background job queue.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import JobFailed, JobQueue
+
+async def wait_for_status(queue: JobQueue, job_id: str, statuses=("succeeded", "failed")) -> dict:
+    """
+    Poll a job until it reaches one of the given statuses.
+    """
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+class FakeAsyncRedis:
+    """
+    Async Redis client backed by a sync fakeredis client.
+
+    fakeredis' own async client may swallow a cancellation on Python 3.11,
+    which would keep cancelled workers running, and its BLMOVE does not block.
+    """
+
+    def __init__(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        self._redis = fakeredis.FakeRedis()
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return call
+
+    async def blmove(self, first_list, second_list, timeout, src="LEFT", dest="RIGHT"):
+        deadline = time.time() + timeout
+        while True:
+            item = self._redis.lmove(first_list, second_list, src, dest)
+            if item is not None or time.time() >= deadline:
+                return item
+            await asyncio.sleep(0.01)
+
+@pytest.fixture
+def local_queue(monkeypatch):
+    monkeypatch.setattr(job_queue_module.async_cache, "client", None)
+    return JobQueue(workers=2, max_attempts=3, retry_delay=0.01)
+
+@pytest.fixture
+def redis_queue():
+    return JobQueue(workers=2, max_attempts=3, retry_delay=0.01, client=FakeAsyncRedis())
+
+@pytest.mark.parametrize("queue_fixture", ["local_queue", "redis_queue"])
+def test_jobs_run_in_the_background_and_store_results(queue_fixture, request):
+    """
+    Test that enqueued jobs are run by the workers and their results kept.
+    """
+    queue = request.getfixturevalue(queue_fixture)
+    release = None
+    calls = []
+
+    async def handler(user_id):
+        calls.append(user_id)
+        await release.wait()
+        return {"user_id": user_id, "style": "visual"}
+
+    queue.register("analysis", handler)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        queue.start()
+        try:
+            job = await queue.enqueue("analysis", {"user_id": "u1"}, user_id="u1")
+            assert job["status"] == "queued"
+
+            # Identical jobs are deduplicated while the first one is pending
+            duplicate = await queue.enqueue("analysis", {"user_id": "u1"}, user_id="u1")
+            other = await queue.enqueue("analysis", {"user_id": "u2"}, user_id="u2")
+            assert duplicate["id"] == job["id"]
+            assert other["id"] != job["id"]
+
+            release.set()
+            finished = await wait_for_status(queue, job["id"])
+            await wait_for_status(queue, other["id"])
+
+            # Once finished, the same work can be requested again
+            again = await queue.enqueue("analysis", {"user_id": "u1"}, user_id="u1")
+            await wait_for_status(queue, again["id"])
+            return finished, again
+        finally:
+            await queue.stop()
+
+    finished, again = asyncio.run(run())
+
+    assert finished["status"] == "succeeded"
+    assert finished["attempts"] == 1
+    assert finished["result"] == {"user_id": "u1", "style": "visual"}
+    assert finished["user_id"] == "u1"
+    assert again["id"] != finished["id"]
+    assert sorted(calls) == ["u1", "u1", "u2"]
+
+@pytest.mark.parametrize("queue_fixture", ["local_queue", "redis_queue"])
+def test_failed_jobs_are_retried_with_backoff(queue_fixture, request):
+    """
+    Test that failing jobs are retried up to the attempt limit.
+    """
+    queue = request.getfixturevalue(queue_fixture)
+    attempts = {"flaky": 0, "broken": 0}
+
+    async def flaky():
+        attempts["flaky"] += 1
+        if attempts["flaky"] < 2:
+            raise RuntimeError("model unavailable")
+        return "ok"
+
+    async def broken():
+        attempts["broken"] += 1
+        raise RuntimeError("still unavailable")
+
+    queue.register("flaky", flaky)
+    queue.register("broken", broken)
+
+    async def run():
+        queue.start()
+        try:
+            flaky_job = await queue.enqueue("flaky", {})
+            broken_job = await queue.enqueue("broken", {})
+            return await wait_for_status(queue, flaky_job["id"]), await wait_for_status(queue, broken_job["id"])
+        finally:
+            await queue.stop()
+
+    flaky_job, broken_job = asyncio.run(run())
+
+    assert flaky_job["status"] == "succeeded"
+    assert flaky_job["attempts"] == 2
+    assert flaky_job["error"] is None
+    assert broken_job["status"] == "failed"
+    assert broken_job["attempts"] == 3
+    assert broken_job["error"] == "still unavailable"
+
+@pytest.mark.parametrize("queue_fixture", ["local_queue", "redis_queue"])
+def test_identical_jobs_of_different_users_are_not_shared(queue_fixture, request):
+    """
+    Test that deduplication never hands one user's job to another.
+    """
+    queue = request.getfixturevalue(queue_fixture)
+
+    async def handler(topics):
+        return topics
+
+    queue.register("quiz_questions", handler)
+
+    async def run():
+        params = {"topics": [{"topic": "Python", "difficulty": "easy"}]}
+        first = await queue.enqueue("quiz_questions", params, user_id="A")
+        duplicate = await queue.enqueue("quiz_questions", params, user_id="A")
+        other = await queue.enqueue("quiz_questions", params, user_id="B")
+        return first, duplicate, other
+
+    first, duplicate, other = asyncio.run(run())
+
+    assert duplicate["id"] == first["id"]
+    assert other["id"] != first["id"]
+    assert other["user_id"] == "B"
+
+def test_jobs_of_dead_workers_are_recovered():
+    """
+    Test that a job whose worker died mid-run is requeued once its lease expires, instead of staying running.
+    """
+    queue = JobQueue(workers=1, lease_timeout=0.2, client=FakeAsyncRedis())
+    calls = []
+
+    async def handler(user_id):
+        calls.append(user_id)
+        return "done"
+
+    queue.register("analysis", handler)
+
+    async def run():
+        job = await queue.enqueue("analysis", {"user_id": "u1"}, user_id="u1")
+
+        # A worker takes the job, marks it running and is killed without cleaning up
+        assert await queue._pop() == job["id"]
+        job = await queue.get(job["id"])
+        job.update(status="running", attempts=1, lease_until=time.time() + 0.2)
+        await queue._save(job)
+
+        # While the lease holds, identical requests get the running job
+        assert (await queue.enqueue("analysis", {"user_id": "u1"}, user_id="u1"))["id"] == job["id"]
+
+        await asyncio.sleep(0.3)
+        queue.start()
+        try:
+            return await wait_for_status(queue, job["id"]), await queue._redis.llen(job_queue_module.PROCESSING_KEY)
+        finally:
+            await queue.stop()
+
+    job, processing = asyncio.run(run())
+
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert calls == ["u1"]
+    assert processing == 0
+
+def test_running_jobs_with_expired_leases_are_not_deduplicated(local_queue):
+    """
+    Test that a job whose lease expired is not handed to new identical requests.
+    """
+    async def handler():
+        return None
+
+    local_queue.register("analysis", handler)
+
+    async def run():
+        job = await local_queue.enqueue("analysis", {})
+        job.update(status="running", lease_until=time.time() - 1)
+        return job, await local_queue.enqueue("analysis", {})
+
+    stale, fresh = asyncio.run(run())
+
+    assert fresh["id"] != stale["id"]
+
+def test_permanent_failures_are_not_retried(local_queue):
+    """
+    Test that jobs raising JobFailed fail at once.
+    """
+    async def missing_course():
+        raise JobFailed("Course not found")
+
+    local_queue.register("learning_path", missing_course)
+
+    async def run():
+        local_queue.start()
+        try:
+            job = await local_queue.enqueue("learning_path", {})
+            return await wait_for_status(local_queue, job["id"])
+        finally:
+            await local_queue.stop()
+
+    job = asyncio.run(run())
+
+    assert job["status"] == "failed"
+    assert job["attempts"] == 1
+    assert job["error"] == "Course not found"
+
+def test_unknown_job_types_are_rejected(local_queue):
+    """
+    Test that only registered job types can be enqueued.
+    """
+    with pytest.raises(ValueError):
+        asyncio.run(local_queue.enqueue("missing", {}))
@@ -0,0 +1,106 @@
+"""
+Tests for request metrics.
+"""
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.monitoring import OTHER_ROUTE, UNMATCHED_ROUTE, MetricsMiddleware
+from app.services.db import InstrumentedTransport, query_labels
+
+def responses(path: str, method: str = "GET", status_code: str = "200") -> float:
+    """
+    Get the number of responses recorded for a label combination.
+    """
+    labels = {"path": path, "method": method, "status_code": status_code}
+    return REGISTRY.get_sample_value("app_responses_total", labels) or 0.0
+
+def make_client(max_route_labels: int) -> TestClient:
+    """
+    Create a client for an app with two parameterized routes.
+    """
+    app = FastAPI()
+
+    @app.get("/metrics-test/items/{item_id}")
+    def get_item(item_id: str):
+        return {"item_id": item_id}
+
+    @app.get("/metrics-test/users/{user_id}")
+    def get_user(user_id: str):
+        return {"user_id": user_id}
+
+    app.add_middleware(MetricsMiddleware, max_route_labels=max_route_labels)
+    return TestClient(app)
+
+def test_metrics_are_labeled_by_route_template():
+    """
+    Test that distinct URLs of one route share a label and unmatched paths are grouped.
+    """
+    client = make_client(max_route_labels=10)
+    before = responses("/metrics-test/items/{item_id}")
+    unmatched_before = responses(UNMATCHED_ROUTE, status_code="404")
+
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/metrics-test/items/{item_id}").status_code == 200
+    client.get("/metrics-test/missing/1")
+
+    assert responses("/metrics-test/items/{item_id}") == before + 3
+    assert responses("/metrics-test/items/a") == 0
+    assert responses(UNMATCHED_ROUTE, status_code="404") == unmatched_before + 1
+
+def test_route_labels_are_capped():
+    """
+    Test that route templates beyond the cap are grouped under one label.
+    """
+    client = make_client(max_route_labels=1)
+    other_before = responses(OTHER_ROUTE)
+
+    client.get("/metrics-test/items/a")
+    client.get("/metrics-test/users/a")
+
+    assert responses(OTHER_ROUTE) == other_before + 1
+
+def test_supabase_requests_are_labeled_by_table_and_operation():
+    """
+    Test that PostgREST, RPC and auth requests get bounded table and operation labels.
+    """
+    base = "https://project.supabase.co"
+
+    assert query_labels(httpx.Request("GET", f"{base}/rest/v1/courses?id=eq.1")) == ("courses", "select")
+    assert query_labels(httpx.Request("HEAD", f"{base}/rest/v1/courses")) == ("courses", "count")
+    assert query_labels(httpx.Request(
+        "POST", f"{base}/rest/v1/user_progress", headers={"Prefer": "resolution=merge-duplicates"}
+    )) == ("user_progress", "upsert")
+    assert query_labels(httpx.Request("POST", f"{base}/rest/v1/rpc/get_streak")) == ("get_streak", "rpc")
+    assert query_labels(httpx.Request("POST", f"{base}/auth/v1/token")) == ("auth", "post")
+
+def test_database_queries_are_counted_per_request():
+    """
+    Test that queries made by an endpoint are counted, timed and reported in the debug header.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        status_code = 404 if "missing" in request.url.path else 200
+        return httpx.Response(status_code, json=[])
+
+    http_client = httpx.Client(transport=InstrumentedTransport(httpx.MockTransport(handler)))
+    app = FastAPI()
+
+    @app.get("/metrics-test/queries")
+    def run_queries():
+        http_client.get("https://project.supabase.co/rest/v1/metrics_test")
+        http_client.get("https://project.supabase.co/rest/v1/metrics_test_missing")
+        return {}
+
+    app.add_middleware(MetricsMiddleware, query_count_header=True)
+    labels = {"table": "metrics_test_missing", "operation": "select", "outcome": "error"}
+    errors_before = REGISTRY.get_sample_value("app_db_queries_total", labels) or 0.0
+
+    response = TestClient(app).get("/metrics-test/queries")
+
+    assert response.headers["x-db-query-count"] == "2"
+    assert REGISTRY.get_sample_value("app_db_queries_total", labels) == errors_before + 1
+    assert REGISTRY.get_sample_value(
+        "app_db_queries_per_request_sum", {"path": "/metrics-test/queries"}
+    ) >= 2
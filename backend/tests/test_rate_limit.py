@@ -0,0 +1,137 @@
+"""
+Tests for rate limiting.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import middleware
+from app.core.middleware import setup_middleware
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import LocalRateLimiter, RateLimiter, RateLimitRule, parse_route_limits
+
+def test_parse_route_limits():
+    """
+    Test parsing of route limit specifications.
+    """
+    assert parse_route_limits("post /api/v1/auth/login=10/60, /api/v1/ai=30/60,,bad") == [
+        ("POST", "/api/v1/auth/login", 10, 60),
+        (None, "/api/v1/ai", 30, 60)
+    ]
+
+def test_local_limiter_allows_burst_then_refills():
+    """
+    Test that a bucket allows its limit, then one request per emission interval.
+    """
+    limiter = LocalRateLimiter(max_keys=10)
+    rule = RateLimitRule("ip:1", limit=5, period=1)
+
+    results = [limiter.hit([rule]) for _ in range(6)]
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert [result.remaining for result in results[:5]] == [4, 3, 2, 1, 0]
+    assert 0 < results[-1].retry_after <= 0.2
+
+def test_local_limiter_checks_every_rule_atomically_and_stays_bounded():
+    """
+    Test that a denied route rule does not consume the client bucket and old buckets are evicted.
+    """
+    limiter = LocalRateLimiter(max_keys=3)
+    client = RateLimitRule("ip:1", limit=10, period=60)
+    route = RateLimitRule("POST:/login:ip:1", limit=1, period=60)
+
+    assert limiter.hit([client, route]).allowed
+    denied = limiter.hit([client, route])
+    assert not denied.allowed and denied.limit == 1
+    assert limiter.hit([client]).remaining == 8
+
+    for i in range(10):
+        limiter.hit([RateLimitRule(f"ip:{i + 2}", limit=10, period=60)])
+    assert len(limiter) == 3
+
+def test_redis_limiter_runs_one_script_per_request(monkeypatch):
+    """
+    Test the Redis GCRA script against an in-memory Redis server.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(rate_limiter_module.async_cache, "client", fakeredis.FakeAsyncRedis())
+    limiter = RateLimiter(max_local_keys=10)
+    rules = [RateLimitRule("user:1", limit=3, period=60), RateLimitRule("*:/api/v1/ai:user:1", limit=2, period=60)]
+
+    async def run():
+        return [await limiter.hit(rules) for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert [result.allowed for result in results] == [True, True, False]
+    assert [(result.limit, result.remaining) for result in results[:2]] == [(2, 1), (2, 0)]
+    assert 0 < results[-1].retry_after <= 30
+    assert len(limiter.local) == 0
+
+def test_redis_errors_fall_back_to_local_limits_quietly(monkeypatch, caplog):
+    """
+    Test that after a Redis error requests are limited locally for a while and the fallback is logged once.
+    """
+    calls = []
+
+    class DownRedis:
+        def register_script(self, script):
+            async def run(keys, args):
+                calls.append(keys)
+                raise ConnectionError("Redis is down")
+            return run
+
+    monkeypatch.setattr(rate_limiter_module.async_cache, "client", DownRedis())
+    limiter = RateLimiter(max_local_keys=10, redis_retry_interval=0.05)
+    rules = [RateLimitRule("ip:1", limit=5, period=60)]
+
+    async def run():
+        results = [await limiter.hit(rules) for _ in range(3)]
+        await asyncio.sleep(0.06)
+        results.append(await limiter.hit(rules))
+        return results
+
+    with caplog.at_level("INFO"):
+        results = asyncio.run(run())
+
+    assert [result.remaining for result in results] == [4, 3, 2, 1]
+    assert len(calls) == 2
+    assert sum("Falling back to local rate limiting" in record.message for record in caplog.records) == 1
+
+def test_rate_limit_headers(test_client: TestClient):
+    """
+    Test that responses report the client's rate limit.
+    """
+    response = test_client.get("/health")
+
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    assert int(response.headers["X-RateLimit-Remaining"]) < 100
+
+def test_cors_wraps_rate_limiting(monkeypatch):
+    """
+    Test that preflight requests are not rate limited and limited responses carry CORS headers.
+    """
+    monkeypatch.setattr(middleware.settings, "RATE_LIMIT_PER_MINUTE", 1)
+    monkeypatch.setattr(middleware.settings, "RATE_LIMIT_ROUTES", "")
+    monkeypatch.setattr(middleware.settings, "CORS_ORIGINS", ["http://frontend.test"])
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.get("/items")
+    def items():
+        return []
+
+    client = TestClient(app, client=("203.0.113.7", 50000))
+    origin = {"Origin": "http://frontend.test"}
+
+    for _ in range(3):
+        preflight = client.options("/items", headers={**origin, "Access-Control-Request-Method": "GET"})
+        assert preflight.status_code == 200
+        assert "X-RateLimit-Limit" not in preflight.headers
+
+    assert client.get("/items", headers=origin).status_code == 200
+    limited = client.get("/items", headers=origin)
+    assert limited.status_code == 429
+    assert limited.headers["Access-Control-Allow-Origin"] == "http://frontend.test"
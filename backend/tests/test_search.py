@@ -0,0 +1,237 @@
+"""
+Tests for the search service.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import search_service as search_service_module
+from app.services.search_index import InvertedIndex
+from app.services.search_service import SearchService, build_prefix_tsquery
+
+def make_course_index() -> InvertedIndex:
+    """
+    Build a small course index.
+    """
+    index = InvertedIndex(
+        "course_id",
+        lambda course: [(course["title"], 2.0), (course.get("description"), 1.0)],
+        filter_fields=("status",)
+    )
+    index.build([
+        {"course_id": "c1", "title": "Python Basics", "description": "Learn programming", "status": "published"},
+        {"course_id": "c2", "title": "Data Science", "description": "Python for data analysis", "status": "published"},
+        {"course_id": "c3", "title": "Python Internals", "description": "Draft notes", "status": "draft"},
+        {"course_id": "c4", "title": "Web Design", "description": "Layouts", "status": "published"}
+    ])
+    return index
+
+def test_build_prefix_tsquery():
+    """
+    Test that queries become prefix-matching tsquery expressions without user operators.
+    """
+    assert build_prefix_tsquery("Machine Learn") == "machine:* & learn:*"
+    assert build_prefix_tsquery("python & (!sql) | 'x'") == "python:* & sql:* & x:*"
+    assert build_prefix_tsquery("  !& ") == ""
+
+class DictCache:
+    """
+    Dictionary-backed stand-in for the Redis cache.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, expire=3600):
+        self.values[key] = value
+        return True
+
+    def increment(self, key, amount=1):
+        self.values[key] = self.values.get(key, 0) + amount
+        return self.values[key]
+
+    def publish(self, key):
+        self.published.append(key)
+
+class AsyncDictCache:
+    """
+    Async stand-in for the Redis cache sharing a DictCache's values.
+    """
+
+    def __init__(self, sync_cache):
+        self.sync = sync_cache
+
+    async def increment(self, key, amount=1):
+        return self.sync.increment(key, amount)
+
+    async def publish(self, key):
+        self.sync.publish(key)
+
+@pytest.fixture
+def dict_cache(monkeypatch):
+    """
+    Replace the search service's caches with an in-memory dictionary.
+    """
+    cache = DictCache()
+    monkeypatch.setattr(search_service_module, "cache", cache)
+    monkeypatch.setattr(search_service_module, "async_cache", AsyncDictCache(cache))
+    return cache
+
+def test_search_courses_ranks_in_database(fake_supabase, dict_cache):
+    """
+    Test that course search ranks in the database and loads one page of rows.
+    """
+    calls = []
+    fake_supabase.functions["search_course_ids"] = lambda **params: calls.append(params) or [
+        {"course_id": f"course-{i}", "rank": 1.0 / (i + 1)} for i in range(3)
+    ]
+    fake_supabase.tables["courses"] = [{"course_id": f"course-{i}", "title": f"Course {i}"} for i in range(3)]
+    service = SearchService()
+    service.supabase = fake_supabase
+
+    results = service.search_courses("Pyth", limit=2, offset=1, filters={"instructor_id": "instructor-1"})
+
+    assert [course["course_id"] for course in results] == ["course-1", "course-2"]
+    assert results[0]["rank"] == 0.5
+    assert calls == [{"p_query": "pyth:*", "p_limit": 500, "p_instructor_id": "instructor-1"}]
+
+def test_search_cache_is_normalized_and_invalidated(fake_supabase, dict_cache):
+    """
+    Test that equivalent queries and other pages share one cached ranking until a write.
+    """
+    fake_supabase.functions["search_content_ids"] = lambda **params: [{"content_id": "content-1", "rank": 1.0}]
+    fake_supabase.tables["content_items"] = [{"content_id": "content-1", "module_id": "module-1", "title": "Python"}]
+    service = SearchService()
+    service.supabase = fake_supabase
+
+    service.search_content("Python", filters={"module_id": "module-1"})
+    service.search_content("  python ", limit=5, offset=0, filters={"module_id": "module-1", "type": None})
+    assert fake_supabase.queries.count(("search_content_ids", "rpc")) == 1
+
+    # Writes to another module keep the cached ranking
+    service.index_content({"content_id": "content-2", "module_id": "module-2", "title": "Other"})
+    service.search_content("python", filters={"module_id": "module-1"})
+    assert fake_supabase.queries.count(("search_content_ids", "rpc")) == 1
+
+    service.index_content({"content_id": "content-1", "module_id": "module-1", "title": "Python 2"})
+    service.search_content("python", filters={"module_id": "module-1"})
+    assert fake_supabase.queries.count(("search_content_ids", "rpc")) == 2
+
+def test_async_writes_invalidate_through_the_async_cache(fake_supabase, dict_cache, monkeypatch):
+    """
+    Test that writes from the event loop invalidate and publish without the blocking cache client.
+    """
+    service = SearchService()
+    service.supabase = fake_supabase
+    service.engine = "memory"
+    monkeypatch.setattr(dict_cache, "increment", lambda *args: pytest.fail("blocking cache client used"))
+    monkeypatch.setattr(dict_cache, "publish", lambda *args: pytest.fail("blocking cache client used"))
+    async_cache = AsyncDictCache(DictCache())
+    monkeypatch.setattr(search_service_module, "async_cache", async_cache)
+
+    asyncio.run(service.index_course_async({"course_id": "c1", "title": "Python", "status": "published"}))
+    asyncio.run(service.index_content_async({"content_id": "content-1", "module_id": "module-1", "title": "Python"}))
+
+    assert async_cache.sync.values == {
+        "search:generation:courses": 1,
+        "search:generation:content": 1,
+        "search:generation:module:module-1": 1
+    }
+    assert async_cache.sync.published == ["search-index:courses:c1", "search-index:content:content-1"]
+    assert len(service.course_index) == 1
+    assert len(service.content_index) == 1
+
+def test_search_content_ignores_queries_without_words(fake_supabase):
+    """
+    Test that a query with no searchable words returns no results without a query.
+    """
+    service = SearchService()
+    service.supabase = fake_supabase
+
+    assert service.search_content("!!") == []
+    assert fake_supabase.query_count == 0
+
+def test_inverted_index_ranks_prefix_matches():
+    """
+    Test prefix matching, title weighting, AND semantics and filters.
+    """
+    index = make_course_index()
+
+    # Title matches outrank description matches
+    assert [doc_id for doc_id, _ in index.search("pyth", filters={"status": "published"})] == ["c1", "c2"]
+    assert [doc_id for doc_id, _ in index.search("python data")] == ["c2"]
+    assert [doc_id for doc_id, _ in index.search("pyth", limit=1, offset=1, filters={"status": "published"})] == ["c2"]
+    assert index.search("missing") == []
+
+def test_inverted_index_incremental_updates():
+    """
+    Test that upserts replace earlier versions, including cached rankings, and compaction.
+    """
+    index = make_course_index()
+    assert [doc_id for doc_id, _ in index.search("web")] == ["c4"]
+
+    index.upsert({"course_id": "c4", "title": "Web Python", "description": None, "status": "published"})
+    index.upsert({"course_id": "c5", "title": "Websockets", "description": None, "status": "published"})
+
+    assert sorted(doc_id for doc_id, _ in index.search("web")) == ["c4", "c5"]
+    assert "c4" in [doc_id for doc_id, _ in index.search("python")]
+    assert index.search("layouts") == []
+
+    # Compaction drops retired slots and keeps results intact
+    index._compact()
+    assert len(index) == 5
+    assert sorted(doc_id for doc_id, _ in index.search("web")) == ["c4", "c5"]
+
+def test_search_courses_with_memory_engine(fake_supabase, dict_cache):
+    """
+    Test that the memory engine ranks in process and loads rows in one query.
+    """
+    fake_supabase.tables["courses"] = [
+        {"course_id": "c1", "title": "Python Basics", "description": "Intro", "status": "published", "instructor_id": "i1"},
+        {"course_id": "c2", "title": "Advanced Python", "description": "Python python", "status": "published", "instructor_id": "i2"},
+        {"course_id": "c3", "title": "Python Draft", "description": None, "status": "draft", "instructor_id": "i1"}
+    ]
+    fake_supabase.tables["content_items"] = []
+    service = SearchService()
+    service.supabase = fake_supabase
+    service.engine = "memory"
+    assert service.build_indexes()
+
+    results = service.search_courses("python", filters={"instructor_id": "i1"})
+
+    assert [course["course_id"] for course in results] == ["c1"]
+    assert results[0]["rank"] > 0
+    assert fake_supabase.queries[-1] == ("courses", "select")
+
+    service.index_course({"course_id": "c4", "title": "Python Again", "description": None, "status": "published", "instructor_id": "i1"})
+    assert len(service.course_index) == 4
+
+def test_memory_indexes_follow_writes_of_other_processes(fake_supabase, dict_cache):
+    """
+    Test that a process reloads the documents another process indexed and does not share rankings.
+    """
+    fake_supabase.tables["courses"] = [
+        {"course_id": "c1", "title": "Python Basics", "description": "Intro", "status": "published", "instructor_id": "i1"}
+    ]
+    fake_supabase.tables["content_items"] = []
+    writer, reader = SearchService(), SearchService()
+    for service in (writer, reader):
+        service.supabase = fake_supabase
+        service.engine = "memory"
+        assert service.build_indexes()
+
+    updated = {"course_id": "c1", "title": "Rust Basics", "description": "Intro", "status": "published", "instructor_id": "i1"}
+    fake_supabase.tables["courses"][0] = updated
+    writer.index_course(updated)
+    assert dict_cache.published == ["search-index:courses:c1"]
+
+    assert [course["course_id"] for course in reader.search_courses("python")] == ["c1"]
+    reader._apply_index_update(dict_cache.published[0])
+    assert reader.search_courses("python") == []
+    assert [course["course_id"] for course in reader.search_courses("rust")] == ["c1"]
+    assert not [key for key in dict_cache.values if key.startswith("search:courses:")]